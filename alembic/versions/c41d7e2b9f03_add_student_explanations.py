@@ -0,0 +1,39 @@
+"""add_student_explanations
+
+Revision ID: c41d7e2b9f03
+Revises: a8f17b850981
+Create Date: 2026-10-19 09:12:44.105327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2b9f03'
+down_revision: Union[str, Sequence[str], None] = 'a8f17b850981'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('student_explanations',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('risk_level', sa.String(length=10), nullable=False),
+        sa.Column('features_hash', sa.String(length=64), nullable=False),
+        sa.Column('explanation', sa.Text(), nullable=False),
+        sa.Column('recommendation', sa.JSON(), nullable=False),
+        sa.Column('llm_model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_version', sa.String(length=20), nullable=False),
+        sa.Column('generated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('student_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('student_explanations')
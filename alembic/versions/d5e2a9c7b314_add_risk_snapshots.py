@@ -0,0 +1,48 @@
+"""add_risk_snapshots
+
+Revision ID: d5e2a9c7b314
+Revises: c41d7e2b9f03
+Create Date: 2026-10-19 14:03:27.518240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2a9c7b314'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e2b9f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('risk_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('course', sa.String(length=255), nullable=True),
+        sa.Column('risk_level', sa.String(length=10), nullable=True),
+        sa.Column('churn_probability', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_risk_snapshots_snapshot_date'), 'risk_snapshots', ['snapshot_date'], unique=False)
+    op.create_index('ix_risk_snapshots_student_date', 'risk_snapshots', ['student_id', 'snapshot_date'], unique=False)
+    op.create_table('risk_daily_rollups',
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('course', sa.String(length=255), nullable=False),
+        sa.Column('risk_level', sa.String(length=10), nullable=False),
+        sa.Column('students', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('snapshot_date', 'course', 'risk_level')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('risk_daily_rollups')
+    op.drop_index('ix_risk_snapshots_student_date', table_name='risk_snapshots')
+    op.drop_index(op.f('ix_risk_snapshots_snapshot_date'), table_name='risk_snapshots')
+    op.drop_table('risk_snapshots')
@@ -0,0 +1,61 @@
+"""add_interventions
+
+Revision ID: e7b3c1f4a926
+Revises: d5e2a9c7b314
+Create Date: 2026-10-19 16:41:09.882731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c1f4a926'
+down_revision: Union[str, Sequence[str], None] = 'd5e2a9c7b314'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('interventions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('risk_level', sa.String(length=10), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('outcome', sa.String(length=20), nullable=True),
+        sa.Column('recommended_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('outcome_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_interventions_student_action', 'interventions', ['student_id', 'action'], unique=False)
+    op.create_table('action_stats',
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('recommended', sa.Integer(), nullable=False),
+        sa.Column('taken', sa.Integer(), nullable=False),
+        sa.Column('successful', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('action')
+    )
+    op.create_table('action_weekly_stats',
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('recommended', sa.Integer(), nullable=False),
+        sa.Column('taken', sa.Integer(), nullable=False),
+        sa.Column('successful', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('week_start', 'action')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('action_weekly_stats')
+    op.drop_table('action_stats')
+    op.drop_index('ix_interventions_student_action', table_name='interventions')
+    op.drop_table('interventions')
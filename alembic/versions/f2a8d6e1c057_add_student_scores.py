@@ -0,0 +1,42 @@
+"""add_student_scores
+
+Revision ID: f2a8d6e1c057
+Revises: e7b3c1f4a926
+Create Date: 2026-10-19 18:20:52.364118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8d6e1c057'
+down_revision: Union[str, Sequence[str], None] = 'e7b3c1f4a926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('student_scores',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course', sa.String(length=255), nullable=False),
+        sa.Column('churn_probability', sa.Float(), nullable=False),
+        sa.Column('risk_level', sa.String(length=10), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('model_version', sa.String(length=20), nullable=False),
+        sa.Column('scored_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('student_id')
+    )
+    op.create_index('ix_student_scores_probability', 'student_scores', ['churn_probability'], unique=False)
+    op.create_index('ix_student_scores_course_probability', 'student_scores', ['course', 'churn_probability'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_student_scores_course_probability', table_name='student_scores')
+    op.drop_index('ix_student_scores_probability', table_name='student_scores')
+    op.drop_table('student_scores')
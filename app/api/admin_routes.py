@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Optional
+import json
+import os
+
+from app.core.config import get_settings
+from app.core.profiling import profile_path, profiling_authorized
+
+router = APIRouter()
+
+
+def _require_profiling_token(token: Optional[str]) -> None:
+    if not get_settings().PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling_authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/profiles")
+async def list_profiles(x_profile_token: Optional[str] = Header(None)) -> List[str]:
+    """Сохраненные профили запросов (новые первыми)"""
+    _require_profiling_token(x_profile_token)
+
+    directory = get_settings().PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        (name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json")),
+        reverse=True
+    )
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)) -> Dict:
+    """
+    Сводка профиля запроса: маршрут, длительность, топ функций по сэмплам
+    (profile_id - из заголовка X-Profile-Id ответа)
+    """
+    _require_profiling_token(x_profile_token)
+
+    path = profile_path(profile_id, ".json")
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    with open(path, encoding="utf-8") as summary_file:
+        return json.load(summary_file)
+
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_stacks(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Стеки профиля в collapsed формате (flamegraph.pl, speedscope)"""
+    _require_profiling_token(x_profile_token)
+
+    path = profile_path(profile_id, ".collapsed")
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    with open(path, encoding="utf-8") as collapsed_file:
+        return PlainTextResponse(collapsed_file.read())
@@ -0,0 +1,119 @@
+"""
+Разбор и векторизованная валидация строк фич для пакетного скоринга
+"""
+import io
+import json
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+from annotated_types import Ge, Le
+
+from app.api.schemas import StudentFeatures
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FEATURE_NAMES = list(StudentFeatures.model_fields.keys())
+
+# Максимум ошибок в ответе 422, чтобы не раздувать ответ на больших файлах
+MAX_REPORTED_ERRORS = 20
+
+
+class BatchInputError(ValueError):
+    """Ошибка входных данных пакетного скоринга"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _feature_bounds() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Границы (ge/le) и целочисленность фич из схемы StudentFeatures"""
+    lower = np.full(len(FEATURE_NAMES), -np.inf)
+    upper = np.full(len(FEATURE_NAMES), np.inf)
+    integer = np.zeros(len(FEATURE_NAMES), dtype=bool)
+
+    for i, name in enumerate(FEATURE_NAMES):
+        field = StudentFeatures.model_fields[name]
+        integer[i] = field.annotation is int
+        for constraint in field.metadata:
+            if isinstance(constraint, Ge):
+                lower[i] = constraint.ge
+            elif isinstance(constraint, Le):
+                upper[i] = constraint.le
+
+    return lower, upper, integer
+
+
+LOWER_BOUNDS, UPPER_BOUNDS, INTEGER_FEATURES = _feature_bounds()
+
+
+def parse_json_rows(body: bytes) -> "pd.DataFrame":
+    """Разобрать JSON {"rows": [...]} (или просто список) в DataFrame"""
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise BatchInputError([f"Некорректный JSON: {e}"])
+
+    rows = payload.get("rows") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise BatchInputError(['Ожидается {"rows": [{...}, ...]} со строками фич'])
+
+    # pandas (~0.3 с импорта) нужен только пакетному скорингу: импорт при первом вызове
+    import pandas as pd
+
+    return pd.DataFrame.from_records(rows, columns=FEATURE_NAMES)
+
+
+def parse_csv_rows(body: bytes) -> "pd.DataFrame":
+    """Разобрать CSV с заголовком (лишние колонки игнорируются)"""
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(io.BytesIO(body))
+    except (ValueError, pd.errors.ParserError) as e:
+        raise BatchInputError([f"Некорректный CSV: {e}"])
+
+    missing = [name for name in FEATURE_NAMES if name not in df.columns]
+    if missing:
+        raise BatchInputError([f"В CSV нет колонок: {', '.join(missing)}"])
+
+    return df[FEATURE_NAMES]
+
+
+def validate_feature_frame(df: "pd.DataFrame") -> np.ndarray:
+    """
+    Векторизованная проверка всех строк сразу (типы, границы, целые значения)
+
+    Returns:
+        Матрица фич (n, 6) в порядке FEATURE_NAMES
+
+    Raises:
+        BatchInputError: Со списком первых ошибок (строка, фича, причина)
+    """
+    import pandas as pd
+
+    X = np.column_stack([
+        pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+        for name in FEATURE_NAMES
+    ]).reshape(-1, len(FEATURE_NAMES))
+
+    invalid = np.isnan(X) | ~np.isfinite(X)
+    out_of_bounds = ~invalid & ((X < LOWER_BOUNDS) | (X > UPPER_BOUNDS))
+    not_integer = ~invalid & INTEGER_FEATURES & (X != np.floor(X))
+
+    errors = []
+    for mask, reason in (
+        (invalid, "отсутствует или не число"),
+        (out_of_bounds, "вне допустимого диапазона"),
+        (not_integer, "должно быть целым"),
+    ):
+        for row, col in zip(*np.nonzero(mask)):
+            errors.append(f"строка {row}: {FEATURE_NAMES[col]} {reason}")
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                raise BatchInputError(errors)
+
+    if errors:
+        raise BatchInputError(errors)
+
+    return X
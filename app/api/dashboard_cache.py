@@ -0,0 +1,347 @@
+"""
+In-memory dashboard cache refreshed in the background.
+
+The dashboard payload is computed off the request path (on an interval or
+when the roster/model version changes) and requests only read the snapshot.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.etag import roster_etag
+from app.api.schemas import (
+    CohortStats,
+    CohortsResponse,
+    DashboardResponse,
+    RiskDistribution,
+    RiskTrendItem,
+    RootCauseItem,
+    ActionEffectivenessItem,
+    DashboardStats
+)
+from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS, stage
+from app.core.profiling import SamplingProfiler, append_collapsed
+from app.data.db_data import get_student_columns
+from app.data.interventions import get_action_stats, get_action_stats_version, get_week_totals
+from app.data.risk_history import get_latest_rollup_date, get_risk_change, get_risk_trend
+from app.db.database import SessionLocal
+from app.models.ml_model import ChurnPredictor
+from app.models.registry import get_predictor
+
+logger = logging.getLogger(__name__)
+
+# Colors for UI
+FACTOR_COLORS = {
+    "attendance_rate": "#EF4444",       # Red
+    "homework_completion": "#F59E0B",   # Orange
+    "test_avg_score": "#3B82F6",        # Blue
+    "missed_classes_streak": "#8B5CF6", # Purple
+    "communication_activity": "#10B981",# Green
+    "days_enrolled": "#6B7280"          # Gray
+}
+
+# Colors for recommended actions (same names as in the LLM prompt)
+ACTION_COLORS = {
+    "Mentor Call": "#10B981",
+    "Mentor Meeting": "#3B82F6",
+    "Additional Support": "#8B5CF6",
+    "WhatsApp Reminder": "#F59E0B",
+    "Do Nothing": "#EF4444"
+}
+
+# Human readable names
+FACTOR_NAMES = {
+    "attendance_rate": "Attendance",
+    "homework_completion": "Homework",
+    "test_avg_score": "Grades",
+    "missed_classes_streak": "Missed Classes",
+    "communication_activity": "Communication",
+    "days_enrolled": "Tenure"
+}
+
+
+@dataclass
+class DashboardSnapshot:
+    payload: Dict
+    cohorts: Dict
+    etag: str
+    generated_at: float
+
+
+@dataclass
+class RosterScores:
+    """All students scored once; shared by the dashboard and cohort views"""
+    columns: Dict[str, tuple]
+    X: np.ndarray
+    probabilities: np.ndarray
+    risk_levels: np.ndarray
+    confidences: np.ndarray
+    contributions: np.ndarray
+
+
+def score_roster(predictor: ChurnPredictor, db) -> RosterScores:
+    """Fetch all students as columns and score them in one call"""
+    columns = get_student_columns(db)
+    X = predictor.matrix_from_columns(columns)
+    probabilities, risk_levels, confidences = predictor.predict_batch(X)
+    return RosterScores(
+        columns=columns,
+        X=X,
+        probabilities=probabilities,
+        risk_levels=risk_levels,
+        confidences=confidences,
+        contributions=predictor.feature_importance_batch(X)
+    )
+
+
+def root_cause_items(predictor: ChurnPredictor, totals: np.ndarray, top: int) -> List[RootCauseItem]:
+    """Top factors by summed contribution, normalized to percentages of the top"""
+    sorted_factors = sorted(
+        zip(predictor.feature_names, totals.tolist()),
+        key=lambda x: x[1],
+        reverse=True
+    )[:top]
+    total_score = sum(v for k, v in sorted_factors)
+
+    return [
+        RootCauseItem(
+            factor=FACTOR_NAMES.get(k, k),
+            # Normalize to percentage roughly (just for visual relative size)
+            value=round((v / total_score) * 100 if total_score > 0 else 0, 1),
+            color=FACTOR_COLORS.get(k, "#9CA3AF")
+        )
+        for k, v in sorted_factors
+    ]
+
+
+def compute_dashboard(predictor: ChurnPredictor, db, scores: RosterScores) -> Dict:
+    """
+    Build the dashboard payload from one batched scoring pass.
+    Trends come from the daily risk rollups (snapshot_risks.py),
+    action effectiveness from the intervention counters.
+    """
+    # 1. Risk distribution
+    total_students = len(scores.X)
+    risk_levels = scores.risk_levels
+    confidences = scores.confidences
+    risk_counts = {
+        level: int(np.count_nonzero(risk_levels == level))
+        for level in ("Low", "Medium", "High")
+    }
+
+    # 2. Root Causes (Top 5 factors for HIGH risk students only)
+    root_causes = []
+    high_risk = risk_levels == "High"
+    if high_risk.any():
+        root_causes = root_cause_items(predictor, scores.contributions[high_risk].sum(axis=0), top=5)
+
+    # 3. Stats
+    avg_conf = float(confidences.mean()) if total_students > 0 else 0
+    actions_this_week, successful_this_week = get_week_totals(db=db)
+
+    stats = DashboardStats(
+        totalStudents=total_students,
+        atRiskStudents=risk_counts["High"],
+        riskChange=get_risk_change(days=7, risk_level="High", db=db),
+        avgConfidence=round(avg_conf, 2),
+        actionsThisWeek=actions_this_week,
+        successfulActions=successful_this_week
+    )
+
+    # Distribution
+    distribution = RiskDistribution(
+        low=risk_counts["Low"],
+        medium=risk_counts["Medium"],
+        high=risk_counts["High"],
+        total=total_students
+    )
+
+    # Trends (Last 8 weeks) from the daily rollups
+    today = datetime.date.today()
+    # Monday of the week 7 weeks ago: exactly 8 ISO weeks including the current one
+    first_week = today - datetime.timedelta(days=today.weekday(), weeks=7)
+    weekly = get_risk_trend(first_week, today, db=db)
+    # Calendar week labels (2026-W42), as in /dashboard/risk-trend:
+    # weeks without rollups stay visible as gaps instead of shifting the labels
+    trends = [
+        RiskTrendItem(
+            week=item["period"],
+            date=item["date"],
+            low=item["low"],
+            medium=item["medium"],
+            high=item["high"]
+        )
+        for item in weekly
+    ]
+
+    # Action effectiveness: share of resolved actions where the student stayed
+    actions = []
+    for row in get_action_stats(db):
+        resolved = row["successful"] + row["failed"]
+        if resolved == 0:
+            continue
+        actions.append(ActionEffectivenessItem(
+            action=row["action"],
+            successRate=round(row["successful"] / resolved * 100, 1),
+            color=ACTION_COLORS.get(row["action"], "#9CA3AF")
+        ))
+    actions.sort(key=lambda item: item.successRate, reverse=True)
+
+    return DashboardResponse(
+        riskDistribution=distribution,
+        riskTrend=trends,
+        rootCauses=root_causes,
+        actionsEffectiveness=actions,
+        stats=stats
+    ).model_dump(mode="json")
+
+
+def compute_cohorts(predictor: ChurnPredictor, scores: RosterScores) -> Dict:
+    """
+    Per-course risk distribution, mean probability, mean features and
+    top root causes in one grouped pass (bincount over course codes)
+    """
+    courses, codes = np.unique(
+        np.asarray(scores.columns["course"], dtype=object),
+        return_inverse=True
+    )
+    n_courses = len(courses)
+
+    # Low=0, Medium=1, High=2
+    level_codes = (scores.risk_levels == "Medium") + 2 * (scores.risk_levels == "High")
+    distribution = np.bincount(
+        codes * 3 + level_codes, minlength=n_courses * 3
+    ).reshape(n_courses, 3)
+    totals = distribution.sum(axis=1)
+
+    def group_sum(values: np.ndarray, mask=slice(None)) -> np.ndarray:
+        return np.bincount(codes[mask], weights=values[mask], minlength=n_courses)
+
+    mean_probability = group_sum(scores.probabilities) / np.maximum(totals, 1)
+    mean_features = np.column_stack([
+        group_sum(scores.X[:, j]) for j in range(len(predictor.feature_names))
+    ]) / np.maximum(totals, 1)[:, None]
+
+    # Root causes: contributions of HIGH risk students, summed per course
+    high_risk = scores.risk_levels == "High"
+    cause_totals = np.column_stack([
+        group_sum(scores.contributions[:, j], high_risk)
+        for j in range(len(predictor.feature_names))
+    ])
+
+    cohorts = []
+    for i, course in enumerate(courses.tolist()):
+        low, medium, high = distribution[i].tolist()
+        cohorts.append(CohortStats(
+            course=course,
+            totalStudents=int(totals[i]),
+            riskDistribution=RiskDistribution(low=low, medium=medium, high=high, total=int(totals[i])),
+            meanProbability=round(float(mean_probability[i]), 4),
+            meanFeatures={
+                name: round(float(value), 2)
+                for name, value in zip(predictor.feature_names, mean_features[i].tolist())
+            },
+            rootCauses=root_cause_items(predictor, cause_totals[i], top=3) if high > 0 else []
+        ))
+
+    return CohortsResponse(cohorts=cohorts).model_dump(mode="json")
+
+
+class DashboardCache:
+    """Holds the latest dashboard snapshot and refreshes it when data changes"""
+
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        self.snapshot: Optional[DashboardSnapshot] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> DashboardSnapshot:
+        """
+        Recompute the snapshot if students, the model file, the date,
+        the latest risk rollup or the action counters changed,
+        or the snapshot is older than max_age_seconds. Blocking: call from a thread.
+        With PROFILE_DASHBOARD_REFRESH the recompute is sampled and its stacks
+        are added to PROFILE_DIR/dashboard_refresh.collapsed.
+        """
+        with self._lock:
+            db = SessionLocal()
+            try:
+                # Same shared predictor (and reload rule) as the roster endpoints
+                predictor = get_predictor()
+                model_version = predictor.model_version
+                extra = ":".join([
+                    datetime.date.today().isoformat(),
+                    str(get_latest_rollup_date(db)),
+                    str(get_action_stats_version(db))
+                ])
+                etag = roster_etag(model_version, db, extra=extra)
+
+                current = self.snapshot
+                if (
+                    not force
+                    and current is not None
+                    and current.etag == etag
+                    and time.time() - current.generated_at < self.max_age_seconds
+                ):
+                    CACHE_REQUESTS.inc("dashboard_refresh", "hit")
+                    return current
+
+                CACHE_REQUESTS.inc("dashboard_refresh", "miss")
+
+                settings = get_settings()
+                profiler = None
+                if settings.PROFILE_DASHBOARD_REFRESH:
+                    profiler = SamplingProfiler(
+                        interval=settings.PROFILE_SAMPLE_INTERVAL,
+                        thread_ids=[threading.get_ident()]
+                    )
+                    profiler.start()
+
+                try:
+                    with stage("dashboard.refresh"):
+                        scores = score_roster(predictor, db)
+                        self.snapshot = DashboardSnapshot(
+                            payload=compute_dashboard(predictor, db, scores),
+                            cohorts=compute_cohorts(predictor, scores),
+                            etag=etag,
+                            generated_at=time.time()
+                        )
+                finally:
+                    if profiler is not None:
+                        profiler.stop()
+                        # Aggregate across refreshes: one flame graph for the scoring loop
+                        append_collapsed(
+                            os.path.join(settings.PROFILE_DIR, "dashboard_refresh.collapsed"),
+                            profiler
+                        )
+                return self.snapshot
+            finally:
+                db.close()
+
+
+@lru_cache()
+def get_dashboard_cache() -> DashboardCache:
+    settings = get_settings()
+    return DashboardCache(max_age_seconds=settings.DASHBOARD_REFRESH_SECONDS)
+
+
+async def run_dashboard_refresher(poll_seconds: float) -> None:
+    """Background loop: check for data changes every poll_seconds and refresh"""
+    cache = get_dashboard_cache()
+    while True:
+        try:
+            await run_in_threadpool(cache.refresh)
+        except Exception:
+            # Keep serving the previous snapshot
+            logger.exception("Error refreshing dashboard data")
+        await asyncio.sleep(poll_seconds)
@@ -0,0 +1,41 @@
+"""
+Conditional GET: ETag для списков и дашборда по версии данных и модели
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.data.db_data import get_roster_version
+
+
+def roster_etag(model_version: str, db: Session = None, extra: str = "") -> str:
+    """
+    ETag из max(students.updated_at), количества студентов и версии модели
+
+    Args:
+        model_version: Версия загруженной ML модели
+        db: Сессия БД (если None, открывается своя)
+        extra: Дополнительная часть ключа (например, дата для данных с датами)
+    """
+    max_updated_at, count = get_roster_version(db)
+    updated = max_updated_at.isoformat() if max_updated_at is not None else ""
+    raw = f"{updated}|{count}|{model_version}|{extra}"
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Совпадает ли If-None-Match запроса с текущим ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    """Пустой ответ 304 Not Modified"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
@@ -0,0 +1,27 @@
+"""
+Быстрая JSON сериализация для больших списков (без Pydantic валидации)
+"""
+import json
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson опционален: extra "fast" (uv sync --extra fast)
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Сериализовать dict/list в JSON байты (orjson если установлен)"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON ответ, который пишет уже готовые dict/list без response_model"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
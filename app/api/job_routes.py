@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Optional
+
+from app.api.schemas import JOB_PARAMS, Job, JobCreateRequest, JobListResponse, JobStatus
+from app.data.jobs import JobStateError, create_job, finish_job, get_job, list_jobs, request_job_cancel
+from app.jobs.runner import get_job_runner
+
+router = APIRouter()
+
+
+@router.post("", response_model=Job, status_code=202)
+async def create_job_endpoint(body: JobCreateRequest, response: Response):
+    """
+    Запустить фоновую задачу и сразу вернуть ее (202 Accepted)
+
+    - `pregenerate` - генерация LLM объяснений (`risk_levels`, `force`)
+    - `rescore` - пересчет student_scores текущей моделью (`chunk_size`)
+    - `rebuild_features` - пересборка обучающего CSV из SQL дампа
+
+    Статус и прогресс - GET /api/jobs/{id} (адрес в заголовке Location).
+    """
+    try:
+        params = JOB_PARAMS[body.kind](**body.params).model_dump(mode="json")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    job = await run_in_threadpool(create_job, body.kind.value, params)
+    try:
+        get_job_runner().submit(job)
+    except RuntimeError as e:
+        # Пулы уже остановлены (процесс завершается)
+        await run_in_threadpool(finish_job, job["id"], "failed", None, str(e))
+        raise HTTPException(status_code=503, detail="Сервис останавливается, повторите запрос позже")
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return job
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs_endpoint(
+    status: Optional[JobStatus] = Query(None, description="Фильтр по статусу"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Последние задачи, новые первыми"""
+    jobs = await run_in_threadpool(list_jobs, status.value if status is not None else None, limit)
+    return {"jobs": jobs}
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job_endpoint(job_id: int):
+    """Статус, прогресс и результат задачи"""
+    try:
+        return await run_in_threadpool(get_job, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/{job_id}", response_model=Job)
+async def cancel_job_endpoint(job_id: int):
+    """
+    Отменить задачу: ожидающая отменяется сразу, выполняемая - на ближайшей
+    записи прогресса (до этого cancel_requested=true и статус running)
+    """
+    try:
+        return await run_in_threadpool(request_job_cancel, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -1,28 +1,84 @@
 """
 FastAPI роуты для API прогнозирования оттока студентов
 """
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from contextlib import closing
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import logging
+import threading
+import numpy as np
 
 from app.api.schemas import (
     StudentRiskListResponse,
     StudentListResponse,
     RiskAssessment,
     DetailedAnalysis,
-    Recommendation
+    Recommendation,
+    BatchPredictRequest,
+    BatchPredictionResponse,
+    RiskLevel,
+    WhatIfResponse,
+    Intervention,
+    InterventionTakenRequest,
+    InterventionOutcomeRequest,
+    TopRiskResponse
 )
-from app.data.db_data import get_students, get_student_by_id  # ← Database instead of mock
+from app.api.batch_input import (
+    BatchInputError,
+    FEATURE_NAMES,
+    parse_csv_rows,
+    parse_json_rows,
+    validate_feature_frame
+)
+from app.api.etag import is_not_modified, not_modified_response, roster_etag
+from app.api.fast_json import FastJSONResponse
+from app.data.risk_export import EXPORT_FORMATS, gzip_stream, iter_export
+from app.data.db_data import (  # ← Database instead of mock
+    get_students,
+    get_student_by_id,
+    get_student_columns,
+    get_student_version
+)
+from app.models.registry import get_predictor, is_ready, readiness
+from app.models.counterfactual import CounterfactualSearch
 from app.models.ml_model import ChurnPredictor
-from app.models.llm_service import LLMExplainer
+from app.data.explanations import features_hash, get_stored_explanation
+from app.data.scores import get_top_scores, scores_are_fresh
+from app.data.interventions import (
+    InterventionStateError,
+    get_student_interventions,
+    mark_taken,
+    record_outcome,
+    record_recommendation
+)
+from app.models.llm_service import LLMExplainer, PROMPT_VERSION
+from app.models.llm_cache import get_llm_cache
+from app.models.local_explainer import LocalExplainer
+from app.core.admission import AdmissionRejected, get_llm_admission
 from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 # Инициализация роутера
 router = APIRouter(prefix="/api", tags=["Student Churn Prediction"])
 
-# Инициализация моделей (singleton pattern)
+# Инициализация моделей: ML модель - в registry (загружается в lifespan)
 settings = get_settings()
-ml_model = ChurnPredictor(model_path=settings.MODEL_PATH)
 llm_explainer = None  # Будет инициализирован при первом использовании
+local_explainer = LocalExplainer()
+# Одновременные запросы анализа одного студента ждут одно вычисление
+# (деградированные из-за перегрузки LLM ответы не кэшируются)
+analysis_flight = SingleFlight(
+    ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+    name="analysis",
+    cache_if=lambda analysis: not analysis.degraded
+)
 
 
 def get_llm_explainer() -> LLMExplainer:
@@ -39,15 +95,45 @@ def get_llm_explainer() -> LLMExplainer:
     return llm_explainer
 
 
+@lru_cache(maxsize=1)
+def get_what_if_search(predictor: ChurnPredictor) -> CounterfactualSearch:
+    """Поиск для текущей модели (после перезагрузки модели создается заново)"""
+    return CounterfactualSearch(predictor)
+
+
 @router.get("/students/risks", response_model=StudentRiskListResponse)
-async def get_student_risks():
+async def get_student_risks(
+    request: Request,
+    fast: bool = Query(False, description="Быстрый путь: пакетный скоринг и JSON без Pydantic моделей")
+):
     """
     Получить список всех студентов с оценкой риска
     
+    Поддерживает If-None-Match: если данные и модель не менялись, 
+    возвращается 304 без скоринга.
+    
     Returns:
         Список студентов с риск-уровнями (Low/Medium/High)
     """
+    etag = await run_in_threadpool(_current_roster_etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    # Чтение БД, скоринг и сериализация списка - в пуле потоков, не в event loop
+    risks_response = await run_in_threadpool(_fast_student_risks if fast else _student_risks)
+    risks_response.headers["ETag"] = etag
+    return risks_response
+
+
+def _current_roster_etag() -> str:
+    """ETag списка студентов для текущей модели (запрос к БД: вызывать в пуле потоков)"""
+    return roster_etag(get_predictor().model_version)
+
+
+def _student_risks() -> FastJSONResponse:
+    """StudentRiskListResponse: построчный скоринг через Pydantic модели"""
     students = get_students()
+    predictor = get_predictor()
     risk_assessments: List[RiskAssessment] = []
     
     for student in students:
@@ -55,7 +141,7 @@ async def get_student_risks():
         features_dict = student.features.model_dump()
         
         # Получаем предсказание
-        risk_level, confidence, _ = ml_model.predict(features_dict)
+        risk_level, confidence, _ = predictor.predict(features_dict)
         
         risk_assessments.append(
             RiskAssessment(
@@ -68,10 +154,95 @@ async def get_student_risks():
             )
         )
     
-    return StudentRiskListResponse(
+    return FastJSONResponse(StudentRiskListResponse(
         total=len(risk_assessments),
         students=risk_assessments
-    )
+    ).model_dump(mode="json"))
+
+
+@router.get("/students/top-risk", response_model=TopRiskResponse)
+async def get_top_risk_students(
+    k: int = Query(20, ge=1, le=1000, description="Сколько студентов вернуть"),
+    course: Optional[str] = Query(None, description="Только один курс")
+):
+    """
+    K студентов с наибольшей вероятностью оттока (по курсу или по всем)
+    
+    Если сохраненные оценки актуальны (rescore_students.py), читает их
+    через ORDER BY ... LIMIT по индексу. Иначе оценивает студентов одним
+    пакетным вызовом модели и выбирает топ-K частичной сортировкой.
+    """
+    def top_risk() -> Dict:
+        if scores_are_fresh(get_predictor().model_version):
+            return {"source": "scores", "students": get_top_scores(k, course)}
+        return {"source": "live", "students": _live_top_risk(k, course)}
+    
+    result = await run_in_threadpool(top_risk)
+    return FastJSONResponse({"k": k, "course": course, **result})
+
+
+def _live_top_risk(k: int, course: Optional[str]) -> List[Dict]:
+    """Топ-K по свежему скорингу: argpartition O(n) + сортировка только K строк"""
+    columns = get_student_columns()
+    rows = np.arange(len(columns["id"]))
+    if course is not None:
+        rows = rows[np.asarray(columns["course"], dtype=object) == course]
+    if len(rows) == 0:
+        return []
+    
+    predictor = get_predictor()
+    X = predictor.matrix_from_columns(columns)[rows]
+    probabilities, risk_levels, confidences = predictor.predict_batch(X)
+    
+    # Порог K-й вероятности за O(n); равные порогу берем все, чтобы порядок
+    # (вероятность по убыванию, затем id) совпадал с ORDER BY в get_top_scores
+    k = min(k, len(rows))
+    threshold = probabilities[np.argpartition(-probabilities, k - 1)[k - 1]]
+    top = np.flatnonzero(probabilities >= threshold)
+    ids = np.asarray(columns["id"])[rows[top]]
+    top = top[np.lexsort((ids, -probabilities[top]))][:k]
+    
+    return [
+        {
+            "student_id": columns["id"][rows[i]],
+            "student_name": columns["name"][rows[i]],
+            "student_course_name": columns["course"][rows[i]],
+            "student_phone_number": columns["phone_number"][rows[i]],
+            "risk_level": risk_levels[i],
+            "confidence": round(float(confidences[i]), 2),
+            "churn_probability": round(float(probabilities[i]), 4)
+        }
+        for i in top.tolist()
+    ]
+
+
+@router.get("/students/risks/export")
+async def export_student_risks(
+    format: str = Query("ndjson", description="Формат: ndjson или csv"),
+    gzip: bool = Query(False, description="Сжать ответ gzip"),
+    chunk_size: int = Query(1000, ge=1, le=50000, description="Размер порции скоринга")
+):
+    """
+    Потоковая выгрузка всех студентов с оценкой риска (для синхронизации CRM)
+    
+    Студенты читаются и оцениваются порциями, строки отправляются сразу:
+    память не растет с размером списка.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Неизвестный формат '{format}', доступны: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="student_risks.{format}"'}
+    
+    body = iter_export(get_predictor(), format, chunk_size)
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
 @router.get("/students/{student_id}/analysis", response_model=DetailedAnalysis)
@@ -85,18 +256,72 @@ async def get_student_analysis(student_id: int):
     Returns:
         Полный анализ: риск, объяснение, рекомендации, ключевые факторы
     """
-    # Получаем данные студента
+    # Ключ: ID + версия данных, чтобы после изменения студента не отдать старый анализ
     try:
-        student = get_student_by_id(student_id)
+        version = await run_in_threadpool(get_student_version, student_id)
+        return await analysis_flight.do(
+            (student_id, version),
+            lambda: _build_student_analysis(student_id)
+        )
     except ValueError:
         raise HTTPException(status_code=404, detail=f"Студент с ID {student_id} не найден")
+
+
+async def _build_student_analysis(student_id: int) -> DetailedAnalysis:
+    """
+    Собрать детальный анализ: DB и ML - в общем threadpool,
+    LLM - в пуле admission control (при переполнении - шаблон или 503)
+    """
+    student, risk_level, confidence, feature_importance, precomputed = await run_in_threadpool(
+        _score_for_analysis, student_id
+    )
+    features_dict = student.features.model_dump()
+    degraded = False
+    
+    if precomputed is not None:
+        explanation, recommendation_data = precomputed
+    else:
+        try:
+            explanation, recommendation_data = await get_llm_admission().run(
+                _llm_analysis, features_dict, risk_level, feature_importance
+            )
+        except AdmissionRejected as e:
+            _shed_llm_request("analysis", e)
+            degraded = True
+            explanation, recommendation_data = _local_analysis(features_dict, risk_level, feature_importance)
+    
+    recommendation = Recommendation(**recommendation_data)
+    intervention_id = await run_in_threadpool(
+        _record_recommendation, student_id, recommendation.action, risk_level
+    )
     
+    return DetailedAnalysis(
+        student=student,
+        risk_level=risk_level,
+        confidence=round(confidence, 2),
+        explanation=explanation,
+        recommendation=recommendation,
+        key_factors=feature_importance,
+        intervention_id=intervention_id,
+        degraded=degraded
+    )
+
+
+def _score_for_analysis(student_id: int):
+    """(student, risk_level, confidence, feature_importance, precomputed) - блокирующие DB и ML вызовы"""
+    student = get_student_by_id(student_id)
     features_dict = student.features.model_dump()
     
     # ML предсказание
-    risk_level, confidence, feature_importance = ml_model.predict(features_dict)
+    risk_level, confidence, feature_importance = get_predictor().predict(features_dict)
     
-    # LLM объяснение и рекомендации
+    # Шаблон для Low риска или заранее сгенерированные объяснения
+    precomputed = _get_precomputed_analysis(student_id, features_dict, risk_level, feature_importance)
+    return student, risk_level, confidence, feature_importance, precomputed
+
+
+def _llm_analysis(features_dict: Dict, risk_level: str, feature_importance: Dict[str, float]):
+    """(explanation, recommendation) от LLM (выполняется в пуле admission control)"""
     llm = get_llm_explainer()
     
     try:
@@ -110,50 +335,459 @@ async def get_student_analysis(student_id: int):
             features_dict,
             risk_level
         )
+        Recommendation(**recommendation_data)
+        return explanation, recommendation_data
         
-        recommendation = Recommendation(**recommendation_data)
-        
-    except Exception as e:
-        # Fallback если LLM не работает
-        explanation = f"Студент в зоне риска '{risk_level}'. (LLM недоступен: {str(e)})"
-        recommendation = Recommendation(
-            action="Связаться со студентом",
-            reason="Рекомендация по умолчанию",
-            success_probability=0.5,
-            urgency="medium"
+    except Exception:
+        # Fallback если LLM не работает - локальный шаблонный explainer
+        return _local_analysis(features_dict, risk_level, feature_importance)
+
+
+def _local_analysis(features_dict: Dict, risk_level: str, feature_importance: Dict[str, float]):
+    """(explanation, recommendation) локального шаблонного explainer"""
+    return (
+        local_explainer.generate_explanation(features_dict, risk_level, feature_importance),
+        local_explainer.generate_recommendations(features_dict, risk_level)
+    )
+
+
+def _shed_llm_request(endpoint: str, rejected: AdmissionRejected) -> None:
+    """
+    Очередь LLM заполнена: в режиме reject - 503 с Retry-After,
+    в режиме degrade - учесть и продолжить без LLM
+    """
+    admission = get_llm_admission()
+    if settings.LLM_SHED_MODE == "reject":
+        admission.record_shed(endpoint, "rejected")
+        raise HTTPException(
+            status_code=503,
+            detail="LLM сервис перегружен, повторите запрос позже",
+            headers={"Retry-After": str(int(rejected.retry_after))}
         )
+    admission.record_shed(endpoint, "degraded")
+
+
+@router.get("/students/{student_id}/analysis/stream")
+async def stream_student_analysis(student_id: int):
+    """
+    Потоковый анализ студента через Server-Sent Events
     
-    return DetailedAnalysis(
-        student=student,
-        risk_level=risk_level,
-        confidence=round(confidence, 2),
-        explanation=explanation,
-        recommendation=recommendation,
-        key_factors=feature_importance
+    Сразу отправляет ML-оценку риска и ключевые факторы (событие `risk`),
+    затем токены объяснения по мере генерации (`explanation`),
+    рекомендацию (`recommendation`) и завершающее событие `done`.
+    Если очередь LLM заполнена, `risk` содержит `degraded: true`,
+    а объяснение и рекомендация берутся из шаблона.
+    
+    Args:
+        student_id: ID студента
+    """
+    try:
+        student, risk_level, confidence, feature_importance, precomputed = await run_in_threadpool(
+            _score_for_analysis, student_id
+        )
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Студент с ID {student_id} не найден")
+    
+    features_dict = student.features.model_dump()
+    degraded = False
+    llm_future = None
+    deltas: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    
+    if precomputed is None:
+        llm = get_llm_explainer()
+        try:
+            llm_future = get_llm_admission().submit(
+                _stream_llm_analysis, llm, asyncio.get_running_loop(), deltas, cancelled,
+                features_dict, risk_level, feature_importance
+            )
+        except AdmissionRejected as e:
+            _shed_llm_request("analysis_stream", e)
+            degraded = True
+            precomputed = _local_analysis(features_dict, risk_level, feature_importance)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            yield _sse_event("risk", {
+                "student": student.model_dump(),
+                "risk_level": risk_level,
+                "confidence": round(confidence, 2),
+                "key_factors": feature_importance,
+                "degraded": degraded
+            })
+            
+            if llm_future is None:
+                explanation, recommendation_data = precomputed
+                yield _sse_event("explanation", {"delta": explanation})
+            else:
+                while (delta := await deltas.get()) is not None:
+                    yield _sse_event("explanation", {"delta": delta})
+                recommendation_data = await asyncio.wrap_future(llm_future)
+            
+            recommendation = Recommendation(**recommendation_data)
+            intervention_id = await run_in_threadpool(
+                _record_recommendation, student_id, recommendation.action, risk_level
+            )
+            yield _sse_event("recommendation", {
+                **recommendation.model_dump(),
+                "intervention_id": intervention_id
+            })
+            yield _sse_event("done", {})
+        finally:
+            # Клиент отключился - поток LLM прекращает генерацию и освобождает слот
+            cancelled.set()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+def _stream_llm_analysis(
+    llm: LLMExplainer,
+    loop: asyncio.AbstractEventLoop,
+    deltas: asyncio.Queue,
+    cancelled: threading.Event,
+    features_dict: Dict,
+    risk_level: str,
+    feature_importance: Dict[str, float]
+) -> Optional[Dict]:
+    """
+    Генерация для SSE в пуле admission control: дельты объяснения - в очередь
+    event loop (None - конец), рекомендация - результат задачи
+    """
+    try:
+        # closing: при отключении клиента генератор закрывается сразу и отпускает circuit breaker
+        with closing(llm.stream_explanation(features_dict, risk_level, feature_importance)) as explanation:
+            for delta in explanation:
+                if cancelled.is_set():
+                    return None
+                loop.call_soon_threadsafe(deltas.put_nowait, delta)
+    finally:
+        loop.call_soon_threadsafe(deltas.put_nowait, None)
+    
+    if cancelled.is_set():
+        return None
+    return llm.generate_recommendations(features_dict, risk_level)
+
+
+@router.get("/students/{student_id}/what-if", response_model=WhatIfResponse)
+async def get_student_what_if(
+    student_id: int,
+    target: Optional[RiskLevel] = Query(None, description="Целевой уровень риска (по умолчанию на один ниже)"),
+    limit: int = Query(5, ge=1, le=20, description="Сколько сценариев вернуть")
+):
+    """
+    What-if анализ: самые простые изменения, снижающие уровень риска студента
+    
+    Перебирает тысячи вариантов изменений фич (посещаемость, ДЗ, тесты,
+    общение, серия пропусков) в границах StudentFeatures и оценивает их
+    одним пакетным вызовом модели.
+    """
+    try:
+        student = await run_in_threadpool(get_student_by_id, student_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Студент с ID {student_id} не найден")
+    
+    result = await run_in_threadpool(
+        get_what_if_search(get_predictor()).search,
+        student.features.model_dump(),
+        target.value if target is not None else None,
+        limit
+    )
+    return WhatIfResponse(student_id=student_id, **result)
+
+
+def _get_precomputed_analysis(
+    student_id: int,
+    features_dict: Dict,
+    risk_level: str,
+    feature_importance: Dict[str, float]
+):
+    """
+    (explanation, recommendation) без вызова LLM или None
+    
+    Для Low риска - локальный шаблон, иначе - актуальные заранее
+    сгенерированные объяснения (pregenerate_explanations.py)
+    """
+    if risk_level == "Low" and not settings.LLM_FOR_LOW_RISK:
+        return (
+            local_explainer.generate_explanation(features_dict, risk_level, feature_importance),
+            local_explainer.generate_recommendations(features_dict, risk_level)
+        )
+    
+    return get_stored_explanation(
+        student_id,
+        risk_level,
+        features_hash(features_dict),
+        settings.GROQ_MODEL,
+        PROMPT_VERSION
+    )
+
+
+def _record_recommendation(student_id: int, action: str, risk_level: str) -> Optional[int]:
+    """
+    Записать показанную рекомендацию для учета эффективности действий.
+    Для Low риска не пишем; ошибка записи не должна ломать анализ.
+    """
+    if risk_level == "Low":
+        return None
+    
+    try:
+        return record_recommendation(student_id, action, risk_level)
+    except Exception:
+        logger.exception("Не удалось записать рекомендацию для студента %s", student_id)
+        return None
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Сформировать одно SSE событие"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": BatchPredictRequest.model_json_schema(ref_template="#/components/schemas/{model}")
+                },
+                "text/csv": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def predict_batch(request: Request):
+    """
+    Пакетный скоринг произвольных строк фич без записи в БД
+    
+    Принимает JSON `{"rows": [StudentFeatures, ...]}` или CSV (`Content-Type: text/csv`)
+    с колонками фич. Все строки проверяются векторизованно и оцениваются одним
+    вызовом модели. Лимиты: BATCH_PREDICT_MAX_ROWS строк, BATCH_PREDICT_MAX_BYTES байт.
+    
+    Returns:
+        Вероятность, уровень риска, уверенность и вклад фич для каждой строки
+    """
+    body = await _read_limited_body(request, settings.BATCH_PREDICT_MAX_BYTES)
+    content_type = request.headers.get("content-type", "")
+    
+    try:
+        if "csv" in content_type:
+            df = parse_csv_rows(body)
+        else:
+            df = parse_json_rows(body)
+        
+        if len(df) > settings.BATCH_PREDICT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Слишком много строк: {len(df)} (максимум {settings.BATCH_PREDICT_MAX_ROWS})"
+            )
+        
+        X = validate_feature_frame(df)
+    except BatchInputError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    
+    return FastJSONResponse(await run_in_threadpool(_score_feature_matrix, X))
+
+
+async def _read_limited_body(request: Request, max_bytes: int) -> bytes:
+    """Прочитать тело запроса, прерываясь с 413 при превышении лимита"""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Запрос больше {max_bytes} байт")
+    
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Запрос больше {max_bytes} байт")
+    return bytes(body)
+
+
+def _score_feature_matrix(X: np.ndarray) -> Dict:
+    """Один пакетный вызов модели + векторизованные вклады фич"""
+    predictor = get_predictor()
+    probabilities, risk_levels, confidences = predictor.predict_batch(X)
+    contributions = np.round(predictor.feature_importance_batch(X), 4).tolist()
+    
+    predictions = [
+        {
+            "index": index,
+            "churn_probability": probability,
+            "risk_level": risk_level,
+            "confidence": confidence,
+            "contributions": dict(zip(FEATURE_NAMES, row_contributions))
+        }
+        for index, (probability, risk_level, confidence, row_contributions) in enumerate(zip(
+            np.round(probabilities, 4).tolist(),
+            risk_levels.tolist(),
+            np.round(confidences, 2).tolist(),
+            contributions
+        ))
+    ]
+    return {"total": len(predictions), "predictions": predictions}
+
+
+@router.get("/students/{student_id}/interventions", response_model=List[Intervention])
+async def list_student_interventions(student_id: int):
+    """Рекомендованные и выполненные действия по студенту с итогами, новые первыми"""
+    return await run_in_threadpool(get_student_interventions, student_id)
+
+
+@router.post(
+    "/students/{student_id}/interventions",
+    response_model=Intervention,
+    status_code=201
+)
+async def take_student_intervention(student_id: int, body: InterventionTakenRequest):
+    """
+    Отметить выполненное действие по студенту
+    
+    Передайте `intervention_id` из анализа, если выполнена показанная рекомендация,
+    иначе создается новая запись. Счетчики эффективности на дашборде
+    обновляются сразу.
+    """
+    try:
+        return await run_in_threadpool(mark_taken, student_id, body.action, body.intervention_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InterventionStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/interventions/{intervention_id}/outcome", response_model=Intervention)
+async def set_intervention_outcome(intervention_id: int, body: InterventionOutcomeRequest):
+    """Записать итог выполненного действия: retained (студент остался) или churned"""
+    try:
+        return await run_in_threadpool(record_outcome, intervention_id, body.outcome.value)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InterventionStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "service": "Student Churn Prediction API",
-        "ml_model": "loaded" if ml_model.model is not None else "not loaded"
+        "ml_model": "loaded" if is_ready() else "loading"
     }
 
 
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 после загрузки и прогрева модели, до этого 503
+    (в отличие от /health, который отвечает сразу после старта процесса)
+    """
+    state = readiness()
+    status_code = 200 if state["status"] == "ready" else 503
+    return FastJSONResponse(state, status_code=status_code)
+
+
+@router.get("/llm/cache")
+async def llm_cache_stats():
+    """Статистика кэша ответов LLM: hit rate и сэкономленные токены"""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **cache.stats()}
+
+
 @router.get("/students", response_model=StudentListResponse)
-async def get_students_list():
+async def get_students_list(
+    request: Request,
+    fast: bool = Query(False, description="Быстрый путь: JSON из колонок БД без Pydantic моделей")
+):
     """
     Получить список всех студентов с их данными (без ML предсказаний)
     
     Returns:
         Список всех студентов с features
     """
+    etag = await run_in_threadpool(_current_roster_etag)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    students_response = await run_in_threadpool(_fast_students_list if fast else _students_list)
+    students_response.headers["ETag"] = etag
+    return students_response
+
+
+def _students_list() -> FastJSONResponse:
+    """StudentListResponse через Pydantic модели студентов"""
     students = get_students()
     
-    return StudentListResponse(
+    return FastJSONResponse(StudentListResponse(
         total=len(students),
         students=students
-    )
+    ).model_dump(mode="json"))
+
+
+def _fast_student_risks() -> FastJSONResponse:
+    """
+    Тот же ответ, что StudentRiskListResponse, но из колоночных результатов:
+    один вызов модели на всех и без построения/валидации моделей на строку
+    """
+    columns = get_student_columns()
+    predictor = get_predictor()
+    _, risk_levels, confidences = predictor.predict_batch(predictor.matrix_from_columns(columns))
+    
+    students = [
+        {
+            "student_id": student_id,
+            "student_name": name,
+            "student_course_name": course,
+            "student_phone_number": phone_number,
+            "risk_level": risk_level,
+            "confidence": confidence
+        }
+        for student_id, name, course, phone_number, risk_level, confidence in zip(
+            columns["id"],
+            columns["name"],
+            columns["course"],
+            columns["phone_number"],
+            risk_levels.tolist(),
+            np.round(confidences, 2).tolist()
+        )
+    ]
+    
+    return FastJSONResponse({"total": len(students), "students": students})
+
+
+def _fast_students_list() -> FastJSONResponse:
+    """Тот же ответ, что StudentListResponse, собранный напрямую из колонок БД"""
+    columns = get_student_columns()
+    
+    students = [
+        {
+            "id": student_id,
+            "name": name,
+            "email": email,
+            "course": course,
+            "student_course_name": course,
+            "student_phone_number": phone_number,
+            "features": {
+                "attendance_rate": float(attendance_rate),
+                "homework_completion": float(homework_completion),
+                "test_avg_score": float(test_avg_score),
+                "communication_activity": communication_activity,
+                "days_enrolled": days_enrolled,
+                "missed_classes_streak": missed_classes_streak
+            }
+        }
+        for (
+            student_id, name, email, course, phone_number,
+            attendance_rate, homework_completion, test_avg_score,
+            communication_activity, days_enrolled, missed_classes_streak
+        ) in zip(*columns.values())
+    ]
+    
+    return FastJSONResponse({"total": len(students), "students": students})
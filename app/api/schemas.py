@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 from enum import Enum
 
 
@@ -75,6 +76,8 @@ class DetailedAnalysis(BaseModel):
     explanation: str = Field(..., description="AI объяснение причин риска")
     recommendation: Recommendation
     key_factors: Dict[str, float] = Field(..., description="Ключевые факторы влияния")
+    intervention_id: Optional[int] = Field(None, description="ID записанной рекомендации (для отметки о выполнении)")
+    degraded: bool = Field(False, description="LLM перегружен: объяснение и рекомендация из шаблона")
 
 
 class StudentRiskListResponse(BaseModel):
@@ -83,6 +86,170 @@ class StudentRiskListResponse(BaseModel):
     students: List[RiskAssessment]
 
 
+class TopRiskStudent(RiskAssessment):
+    """Студент из топа риска"""
+    churn_probability: float = Field(..., ge=0, le=1, description="Вероятность оттока")
+
+
+class TopRiskResponse(BaseModel):
+    """K студентов с наибольшим риском"""
+    k: int
+    course: Optional[str] = None
+    source: str = Field(..., description="scores - сохраненные оценки, live - скоринг при запросе")
+    students: List[TopRiskStudent]
+
+
+class BatchPredictRequest(BaseModel):
+    """Пакетный скоринг произвольных строк фич (абитуриенты, what-if сценарии)"""
+    rows: List[StudentFeatures] = Field(..., description="Строки фич для скоринга")
+
+
+class BatchPrediction(BaseModel):
+    """Результат скоринга одной строки"""
+    index: int = Field(..., description="Номер строки во входных данных")
+    churn_probability: float = Field(..., ge=0, le=1, description="Вероятность отчисления")
+    risk_level: RiskLevel
+    confidence: float = Field(..., ge=0, le=1, description="Уверенность модели")
+    contributions: Dict[str, float] = Field(..., description="Вклад каждой фичи")
+
+
+class BatchPredictionResponse(BaseModel):
+    """Ответ пакетного скоринга"""
+    total: int
+    predictions: List[BatchPrediction]
+
+
+class WhatIfChange(BaseModel):
+    """Изменение одной фичи в сценарии"""
+    feature: str
+    from_value: float
+    to_value: float
+    delta: float
+
+
+class WhatIfScenario(BaseModel):
+    """Сценарий изменений, переводящий студента в целевой уровень риска"""
+    changes: List[WhatIfChange]
+    churn_probability: float = Field(..., ge=0, le=1)
+    risk_level: RiskLevel
+    cost: float = Field(..., description="Условная цена изменений (меньше = проще)")
+
+
+class WhatIfResponse(BaseModel):
+    """Результат what-if анализа студента"""
+    student_id: int
+    current_risk_level: RiskLevel
+    current_probability: float
+    target_risk_level: Optional[RiskLevel] = None
+    candidates_evaluated: int
+    scenarios: List[WhatIfScenario]
+
+
+class InterventionOutcome(str, Enum):
+    RETAINED = "retained"
+    CHURNED = "churned"
+
+
+class InterventionTakenRequest(BaseModel):
+    """Отметка о выполненном действии"""
+    action: str = Field(..., min_length=1, max_length=100, description="Выполненное действие")
+    intervention_id: Optional[int] = Field(None, description="ID выполненной рекомендации")
+
+
+class InterventionOutcomeRequest(BaseModel):
+    """Итог действия"""
+    outcome: InterventionOutcome
+
+
+class Intervention(BaseModel):
+    """Рекомендованное или выполненное действие по студенту"""
+    id: int
+    student_id: int
+    action: str
+    risk_level: Optional[str] = None
+    status: str = Field(..., description="recommended или taken")
+    outcome: Optional[InterventionOutcome] = None
+    recommended_at: Optional[datetime] = None
+    taken_at: Optional[datetime] = None
+    outcome_at: Optional[datetime] = None
+
+
+class JobKind(str, Enum):
+    PREGENERATE = "pregenerate"
+    RESCORE = "rescore"
+    REBUILD_FEATURES = "rebuild_features"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class PregenerateJobParams(BaseModel):
+    """Параметры pregenerate (как у pregenerate_explanations.py)"""
+    risk_levels: Optional[List[RiskLevel]] = Field(None, description="По умолчанию PREGEN_RISK_LEVELS")
+    force: bool = Field(False, description="Перегенерировать даже актуальные объяснения")
+
+    class Config:
+        extra = "forbid"
+
+
+class RescoreJobParams(BaseModel):
+    """Параметры rescore (как у rescore_students.py)"""
+    chunk_size: int = Field(1000, ge=100, le=50000, description="Размер порции (студентов)")
+    workers: int = Field(1, ge=1, le=32, description="Локальных процессов, считающих порции")
+
+    class Config:
+        extra = "forbid"
+
+
+class RebuildFeaturesJobParams(BaseModel):
+    """rebuild_features без параметров: пути берутся из FEATURES_DUMP_PATH и FEATURES_OUTPUT_PATH"""
+
+    class Config:
+        extra = "forbid"
+
+
+JOB_PARAMS = {
+    JobKind.PREGENERATE: PregenerateJobParams,
+    JobKind.RESCORE: RescoreJobParams,
+    JobKind.REBUILD_FEATURES: RebuildFeaturesJobParams,
+}
+
+
+class JobCreateRequest(BaseModel):
+    """Новая фоновая задача"""
+    kind: JobKind
+    params: Dict[str, Any] = Field(default_factory=dict, description="Параметры задачи (зависят от kind)")
+
+
+class JobProgress(BaseModel):
+    done: int
+    total: Optional[int] = None
+
+
+class Job(BaseModel):
+    """Фоновая задача: статус, прогресс и результат"""
+    id: int
+    kind: JobKind
+    status: JobStatus
+    params: Dict[str, Any]
+    progress: JobProgress
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobListResponse(BaseModel):
+    jobs: List[Job]
+
+
 # Dashboard Models
 
 class RiskDistribution(BaseModel):
@@ -122,3 +289,18 @@ class DashboardResponse(BaseModel):
     rootCauses: List[RootCauseItem]
     actionsEffectiveness: List[ActionEffectivenessItem]
     stats: DashboardStats
+    generatedAt: Optional[str] = None
+    stalenessSeconds: Optional[float] = None
+
+class CohortStats(BaseModel):
+    course: str
+    totalStudents: int
+    riskDistribution: RiskDistribution
+    meanProbability: float
+    meanFeatures: Dict[str, float]
+    rootCauses: List[RootCauseItem]
+
+class CohortsResponse(BaseModel):
+    cohorts: List[CohortStats]
+    generatedAt: Optional[str] = None
+    stalenessSeconds: Optional[float] = None
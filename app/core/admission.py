@@ -0,0 +1,125 @@
+"""
+Admission control для медленной работы (вызовы Groq LLM)
+
+LLM вызовы выполняются в отдельном пуле потоков с ограниченной очередью,
+а не в общем threadpool FastAPI: всплеск /analysis не занимает потоки,
+нужные дешевым маршрутам (/api/students/risks). Если все слоты и места в
+очереди заняты, задача не ставится в ожидание - сразу AdmissionRejected,
+и вызывающий код деградирует до ML-ответа или отдает 503 с Retry-After.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+from app.core.config import get_settings
+from app.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_SHED,
+)
+
+
+class AdmissionRejected(Exception):
+    """Очередь пула заполнена; повторить запрос стоит через retry_after секунд"""
+
+    def __init__(self, pool: str, retry_after: float):
+        super().__init__(f"Очередь пула {pool} заполнена")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Пул из max_concurrency потоков с очередью не длиннее max_queue
+
+    Одновременно выполняется не больше max_concurrency задач, еще max_queue
+    ждут слота. Следующая задача отклоняется сразу, без ожидания.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, retry_after: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-admission")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.admitted = 0
+        self.shed = 0
+        self._publish()
+
+    def submit(self, func: Callable, *args: Any) -> Future:
+        """
+        Поставить func(*args) в пул
+
+        Raises:
+            AdmissionRejected: Все слоты и очередь заняты
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_concurrency + self.max_queue:
+                self.shed += 1
+                raise AdmissionRejected(self.name, self.retry_after)
+            self._queued += 1
+            self.admitted += 1
+            self._publish()
+
+        queued_at = time.perf_counter()
+        # Контекст вызывающего (текущий спан трассы): иначе спаны llm.* теряются
+        context = contextvars.copy_context()
+
+        def run():
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - queued_at, self.name)
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._publish()
+            try:
+                return context.run(func, *args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._publish()
+
+        return self._executor.submit(run)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Выполнить func(*args) в пуле и дождаться результата (AdmissionRejected - сразу)"""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def record_shed(self, endpoint: str, action: str) -> None:
+        """Учесть отклоненный запрос в admission_shed_total (action: degraded / rejected)"""
+        ADMISSION_SHED.inc(self.name, endpoint, action)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self._running,
+                "queued": self._queued,
+                "admitted": self.admitted,
+                "shed": self.shed
+            }
+
+    def _publish(self) -> None:
+        # Вызывается под self._lock
+        ADMISSION_IN_FLIGHT.set(self._running, self.name)
+        ADMISSION_QUEUE_DEPTH.set(self._queued, self.name)
+
+
+@lru_cache()
+def get_llm_admission() -> AdmissionController:
+    """Пул для вызовов LLM из API (LLM_MAX_CONCURRENCY / LLM_MAX_QUEUE)"""
+    settings = get_settings()
+    return AdmissionController(
+        "llm",
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        max_queue=settings.LLM_MAX_QUEUE,
+        retry_after=settings.LLM_RETRY_AFTER_SECONDS
+    )
@@ -0,0 +1,64 @@
+"""
+Circuit breaker для внешних вызовов (Groq LLM)
+"""
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Простой circuit breaker: closed -> open -> half-open
+
+    После failure_threshold ошибок подряд цепь размыкается на reset_timeout
+    секунд, и вызовы сразу уходят в fallback. Затем пропускается один
+    пробный вызов: успех замыкает цепь, ошибка снова размыкает ее.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние: closed / open / half-open"""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Можно ли выполнить вызов сейчас"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # half-open: пропускаем только один пробный вызов
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Вызов прерван без результата (клиент отключился): следующий вызов снова может быть пробным"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
@@ -6,15 +6,115 @@ class Settings(BaseSettings):
     APP_NAME: str = "Student Churn Prediction API"
     VERSION: str = "1.0.0"
     DEBUG: bool = True
+    LOG_LEVEL: str = "INFO"
     # Database
     DATABASE_URL: str = "postgresql://localhost/crm-softclub"
     
     # Groq API Settings
     GROQ_API_KEY: str = ""  
     GROQ_MODEL: str = "llama-3.3-70b-versatile"  
+    # Другой Groq-совместимый endpoint (например, benchmarks/fake_groq.py для нагрузочных тестов)
+    GROQ_BASE_URL: str = ""
+    
+    # Таймаут и circuit breaker для Groq (при сбое - локальный шаблонный explainer)
+    LLM_TIMEOUT_SECONDS: float = 8.0
+    LLM_MAX_RETRIES: int = 0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 3
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    # Для Low риска LLM не вызывается (шаблонное объяснение)
+    LLM_FOR_LOW_RISK: bool = False
+    # Admission control: LLM вызовы API - в отдельном пуле с ограниченной очередью.
+    # При заполненной очереди: degrade - ответ без LLM (шаблонный explainer),
+    # reject - 503 с Retry-After
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE: int = 16
+    LLM_SHED_MODE: str = "degrade"
+    LLM_RETRY_AFTER_SECONDS: int = 5
+    
+    # Кэш готовых ответов /analysis (single-flight + короткий TTL)
+    ANALYSIS_CACHE_TTL_SECONDS: float = 30.0
+    
+    # LLM response cache (SQLite)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = ".cache/llm_responses.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    # Шаг округления фич для ключа кэша (похожие студенты делят один ответ)
+    LLM_CACHE_BUCKETS: dict = {
+        "attendance_rate": 5,
+        "homework_completion": 5,
+        "test_avg_score": 5,
+        "communication_activity": 2,
+        "days_enrolled": 30,
+        "missed_classes_streak": 1,
+    }
+    
+    # Ночная пакетная генерация объяснений (лимиты Groq)
+    PREGEN_RISK_LEVELS: list = ["High", "Medium"]
+    PREGEN_REQUESTS_PER_MINUTE: int = 30
+    PREGEN_TOKENS_PER_MINUTE: int = 6000
+    PREGEN_CONCURRENCY: int = 4
+    PREGEN_MAX_RETRIES: int = 5
+    PREGEN_BACKOFF_SECONDS: float = 2.0
+    
+    # Фоновые задачи POST /api/jobs: pregenerate - в потоках, rescore и
+    # rebuild_features - в отдельных процессах (0 - тоже в потоках)
+    JOBS_THREAD_WORKERS: int = 2
+    JOBS_PROCESS_WORKERS: int = 1
+    JOBS_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    # Heartbeat задач процессом-владельцем; задачи без heartbeat дольше таймаута
+    # (процесс упал или перезапущен) помечаются failed
+    JOBS_HEARTBEAT_SECONDS: float = 10.0
+    JOBS_HEARTBEAT_TIMEOUT_SECONDS: float = 60.0
+    # Распределенный пересчет student_scores: аренда порции (после нее порцию
+    # упавшего воркера забирает другой) и пауза, когда свободных порций нет
+    RESCORE_LEASE_SECONDS: float = 120.0
+    RESCORE_POLL_SECONDS: float = 1.0
+    # rebuild_features: SQL дамп Softclub и итоговый CSV для обучения
+    FEATURES_DUMP_PATH: str = "softclub.sql"
+    FEATURES_OUTPUT_PATH: str = "data/softclub_training.csv"
+    
+    # POST /api/predict/batch: лимиты размера запроса
+    BATCH_PREDICT_MAX_ROWS: int = 10000
+    BATCH_PREDICT_MAX_BYTES: int = 5_000_000
+    
+    # Дашборд: фоновое обновление снимка в памяти
+    DASHBOARD_REFRESH_SECONDS: float = 300.0
+    DASHBOARD_POLL_SECONDS: float = 10.0
+    
+    # /metrics: задержки запросов по маршрутам (middleware)
+    METRICS_ENABLED: bool = True
+    
+    # Трассировка запросов: доля запросов в выборке и ротируемый JSONL файл спанов
+    TRACE_SAMPLE_RATE: float = 0.0
+    # Заголовок X-Trace-Id включает трассировку запроса в обход выборки
+    # (иначе он только задает id трассы, если запрос попал в выборку)
+    TRACE_FORCE_BY_HEADER: bool = False
+    TRACE_FILE: str = ".cache/traces.jsonl"
+    TRACE_FILE_MAX_BYTES: int = 10_000_000
+    TRACE_FILE_BACKUP_COUNT: int = 5
+    # Очередь фоновой записи трасс (при переполнении трассы отбрасываются)
+    TRACE_QUEUE_SIZE: int = 1000
+    
+    # Профилирование по запросу (заголовок X-Profile-Token); пустой токен - выключено
+    PROFILING_TOKEN: str = ""
+    PROFILE_DIR: str = ".cache/profiles"
+    PROFILE_SAMPLE_INTERVAL: float = 0.001
+    # Накопительные стеки пересчета дашборда в PROFILE_DIR/dashboard_refresh.collapsed
+    PROFILE_DASHBOARD_REFRESH: bool = False
+    
+    # Ежедневный снимок риска: минимальное изменение вероятности для записи
+    RISK_SNAPSHOT_MIN_DELTA: float = 0.02
     
     MODEL_PATH: str = "models/trained/churn_model.json"
     
+    # Production сервер (python -m app.core.server): prefork воркеры с общей моделью
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 0  # 0 - по числу CPU
+    KEEPALIVE_SECONDS: float = 5.0
+    BACKLOG: int = 2048
+    
     CORS_ORIGINS: list = ["*"]
     
     class Config:
@@ -0,0 +1,238 @@
+"""
+Профилирование по запросу: сэмплирующий профайлер на sys._current_frames
+
+Включается на один запрос заголовком X-Profile-Token (= PROFILING_TOKEN).
+Обработчики работают и в event loop, и в потоках threadpool, поэтому
+профайлер снимает стеки всех потоков (кроме ожидающих в select/wait) -
+параллельные запросы тоже попадут в отчет. Отчет - стеки в collapsed
+формате (flamegraph.pl, speedscope) и топ функций - пишется в PROFILE_DIR.
+"""
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Кадры, в которых поток просто ждет работы (event loop, пустой threadpool)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+}
+
+PROFILE_ID_CHARS = set("0123456789abcdefghijklmnopqrstuvwxyz-_.")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профайлер: каждые interval секунд снимает стеки потоков
+
+    Args:
+        interval: Период сэмплирования (секунды)
+        thread_ids: Только эти потоки (по умолчанию все, кроме самого профайлера)
+    """
+
+    def __init__(self, interval: float = 0.001, thread_ids: Optional[List[int]] = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def collapsed(self) -> str:
+        """Стеки в collapsed формате: "outer;inner;leaf count" на строку"""
+        lines = [
+            ";".join(self._label(code) for code in stack) + f" {count}"
+            for stack, count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top(self, limit: int = 25) -> List[Dict]:
+        """Функции по числу сэмплов: self - на вершине стека, total - где-либо в стеке"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.samples.items():
+            self_counts[stack[-1]] += count
+            for code in set(stack):
+                total_counts[code] += count
+
+        return [
+            {
+                "function": self._label(code),
+                "self_samples": self_counts.get(code, 0),
+                "total_samples": total,
+                "total_ms": round(total * self.interval * 1000, 1)
+            }
+            for code, total in total_counts.most_common(limit)
+        ]
+
+
+def profiling_authorized(token: Optional[str]) -> bool:
+    """Профилирование включено (PROFILING_TOKEN задан) и токен совпадает"""
+    expected = get_settings().PROFILING_TOKEN
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def profile_path(profile_id: str, suffix: str) -> Optional[str]:
+    """Путь к файлу отчета в PROFILE_DIR (None для недопустимого id)"""
+    if not profile_id or not set(profile_id) <= PROFILE_ID_CHARS or ".." in profile_id:
+        return None
+    return os.path.join(get_settings().PROFILE_DIR, profile_id + suffix)
+
+
+def save_profile(profile_id: str, profiler: SamplingProfiler, meta: Dict) -> None:
+    """Сохранить collapsed стеки и сводку (топ функций) в PROFILE_DIR"""
+    directory = get_settings().PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    with open(profile_path(profile_id, ".collapsed"), "w", encoding="utf-8") as collapsed_file:
+        collapsed_file.write(profiler.collapsed())
+    with open(profile_path(profile_id, ".json"), "w", encoding="utf-8") as summary_file:
+        json.dump({
+            **meta,
+            "interval_ms": profiler.interval * 1000,
+            "samples": profiler.sample_count,
+            "top": profiler.top()
+        }, summary_file, ensure_ascii=False, indent=2)
+
+
+def append_collapsed(path: str, profiler: SamplingProfiler) -> None:
+    """
+    Добавить стеки профайлера в накопительный collapsed файл
+    (счетчики одинаковых стеков суммируются)
+    """
+    totals: Counter = Counter()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as existing:
+            for line in existing:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    totals[stack] += int(count)
+
+    for line in profiler.collapsed().splitlines():
+        stack, _, count = line.rpartition(" ")
+        totals[stack] += int(count)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as output:
+        for stack, count in totals.most_common():
+            output.write(f"{stack} {count}\n")
+    os.replace(tmp_path, path)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: сэмплирующий профайлер вокруг одного запроса
+    с заголовком X-Profile-Token. В ответе - X-Profile-Id, отчет доступен
+    через GET /api/admin/profiles/{profile_id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile-token":
+                token = value.decode("latin-1")
+                break
+
+        if token is None or not profiling_authorized(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = time.strftime("%Y%m%d-%H%M%S") + "-" + os.urandom(3).hex()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        profiler = SamplingProfiler(interval=get_settings().PROFILE_SAMPLE_INTERVAL)
+        started = time.perf_counter()
+        try:
+            with profiler:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            try:
+                save_profile(profile_id, profiler, {
+                    "profile_id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+                })
+            except Exception:
+                logger.exception("Error saving profile %s", profile_id)
@@ -0,0 +1,74 @@
+"""
+Token-bucket ограничитель запросов и токенов в минуту для вызовов LLM
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket с пополнением в секунду"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Заблокироваться, пока в корзине не наберется amount токенов"""
+        # Запрос больше емкости не должен зависнуть навсегда
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.refill_per_second
+            time.sleep(wait)
+
+    def adjust(self, amount: float) -> None:
+        """Списать (amount > 0) или вернуть (amount < 0) токены после факта; баланс может уйти в минус"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens - amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated_at) * self.refill_per_second
+        )
+        self._updated_at = now
+
+
+class RateLimiter:
+    """
+    Лимит запросов в минуту (RPM) и токенов в минуту (TPM)
+
+    Перед вызовом резервируется оценка токенов, после вызова
+    резерв корректируется по фактическому usage из ответа.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: Optional[int] = None):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+            if tokens_per_minute else None
+        )
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        """Дождаться разрешения на один запрос с оценкой estimated_tokens"""
+        self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens > 0:
+            self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Скорректировать резерв по фактическому количеству токенов
+        (actual_tokens=0 - вызов не состоялся, резерв возвращается целиком)
+        """
+        if self.tokens is not None and estimated_tokens > 0:
+            self.tokens.adjust(actual_tokens - min(estimated_tokens, self.tokens.capacity))
@@ -0,0 +1,162 @@
+"""
+Production запуск: prefork uvicorn с моделью, загруженной до fork
+
+Родительский процесс открывает сокет, импортирует приложение (настройки,
+XGBoost модель), замораживает объекты для GC (gc.freeze) и форкает WORKERS
+процессов. Память бустера делится между воркерами copy-on-write. Каждый
+воркер делает прогревочное предсказание до приема запросов; упавший
+воркер перезапускается.
+
+    python -m app.core.server
+    python -m app.core.server --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Слушающий сокет, общий для всех воркеров"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """
+    Импорт приложения и загрузка моделей в родительском процессе
+
+    Returns:
+        ASGI приложение
+    """
+    from main import app
+    from app.models.registry import get_predictor
+
+    # Одна модель на процесс: ее же используют дашборд и эндпоинты списка студентов
+    get_predictor()
+    return app
+
+
+def run_worker(app, sock: socket.socket, keepalive: float) -> None:
+    import uvicorn
+    from app.db.database import get_engine
+    from app.models.registry import warm_up
+
+    # Соединения пула, открытые до fork, не переиспользуем (close=False: не трогаем чужие)
+    get_engine().dispose(close=False)
+
+    # Прогрев после fork: потоки OpenMP XGBoost создаются уже в процессе воркера
+    started = time.perf_counter()
+    warm_up()
+    logger.info("Воркер %d: прогрев %.0f мс", os.getpid(), (time.perf_counter() - started) * 1000)
+
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        timeout_keep_alive=keepalive,
+        log_level="info"
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, keepalive: float) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            run_worker(app, sock, keepalive)
+        except BaseException:
+            logger.exception("Воркер %d упал", os.getpid())
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int, keepalive: float, backlog: int) -> None:
+    """Запустить prefork сервер и перезапускать упавших воркеров до SIGTERM/SIGINT"""
+    started = time.perf_counter()
+    sock = create_socket(host, port, backlog)
+    app = preload()
+
+    # Объекты, созданные при импорте, больше не трогаются GC -> страницы остаются общими
+    gc.collect()
+    gc.freeze()
+    logger.info("Приложение загружено за %.1f с, воркеров: %d", time.perf_counter() - started, workers)
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[spawn_worker(app, sock, keepalive)] = time.time()
+    logger.info("Слушаем http://%s:%d (keep-alive %.0f с, backlog %d)", host, port, keepalive, backlog)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        spawned_at = children.pop(pid, None)
+        if spawned_at is None or stopping:
+            continue
+
+        logger.warning("Воркер %d завершился (код %d), перезапуск", pid, os.waitstatus_to_exitcode(status))
+        # Воркер, упавший сразу после старта, не перезапускаем в цикле без паузы
+        if time.time() - spawned_at < 1.0:
+            time.sleep(1.0)
+        children[spawn_worker(app, sock, keepalive)] = time.time()
+
+    sock.close()
+    logger.info("Сервер остановлен")
+
+
+def main():
+    settings = get_settings()
+    # Тот же формат, что у приложения (main.py): строки мастера и воркеров в одном логе
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Production сервер (prefork uvicorn)")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS,
+                        help="Количество воркеров (0 - по числу CPU)")
+    parser.add_argument("--keepalive", type=float, default=settings.KEEPALIVE_SECONDS)
+    parser.add_argument("--backlog", type=int, default=settings.BACKLOG)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers or os.cpu_count() or 1, args.keepalive, args.backlog)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Single-flight: объединение одновременных одинаковых запросов в один
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import CACHE_REQUESTS
+
+
+class SingleFlight:
+    """
+    Асинхронный single-flight с коротким кэшем результатов
+
+    Одновременные вызовы do() с одинаковым ключом ждут одно вычисление
+    вместо того, чтобы запускать свое. Успешный результат дополнительно
+    хранится ttl_seconds, ошибки не кэшируются. cache_if отсекает
+    результаты, которые тоже не стоит кэшировать (например, деградированные).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int = 1024,
+        name: Optional[str] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.cache_if = cache_if
+        # Имя для метрики cache_requests_total (None - не записывать)
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.coalesced = 0
+        self.computed = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Вернуть результат func() для ключа, переиспользуя кэш или текущее вычисление
+
+        Args:
+            key: Ключ (например, (student_id, версия данных))
+            func: Фабрика корутины, выполняющей вычисление
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if expires_at > time.monotonic():
+                self.hits += 1
+                self._record("hit")
+                return value
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.computed += 1
+            self._record("miss")
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_done(key, t))
+        else:
+            self.coalesced += 1
+            self._record("coalesced")
+
+        # shield: отмена одного клиента не отменяет вычисление для остальных
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return {
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "cache_hits": self.hits,
+            "in_flight": len(self._inflight),
+            "cached": len(self._results)
+        }
+
+    def _record(self, result: str) -> None:
+        if self.name is not None:
+            CACHE_REQUESTS.inc(self.name, result)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.cache_if is not None and not self.cache_if(task.result()):
+            return
+
+        self._results[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
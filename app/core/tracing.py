@@ -0,0 +1,348 @@
+"""
+Легковесная трассировка запросов: спаны через contextvars и экспорт в JSONL
+
+Корневой спан создает TracingMiddleware (с trace id из заголовка
+traceparent или X-Trace-Id), вложенные спаны - span("model.predict") и
+SQL-события engine. Завершенная трасса ставится в очередь, и фоновый поток
+пишет ее в ротируемый JSONL файл (TRACE_FILE), не занимая event loop.
+Для просмотра в chrome://tracing или Perfetto:
+    python -m app.core.tracing .cache/traces.jsonl > trace.json
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import TRACES_DROPPED
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+TRACE_ID_RE = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+
+
+class Trace:
+    """Спаны одного запроса (добавляются из разных потоков threadpool)"""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "duration", "attributes")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration = 0.0
+        self.attributes = attributes
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "ts": int(self.start * 1_000_000),
+            "dur": int(self.duration * 1_000_000),
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Спан вне трассы (запрос не попал в выборку): ничего не делает"""
+
+    __slots__ = ()
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Контекстный менеджер спана: делает его текущим на время блока"""
+
+    __slots__ = ("span", "perf_start", "token", "root")
+
+    def __init__(self, span: Span, root: bool = False):
+        self.span = span
+        self.root = root
+
+    def __enter__(self) -> Span:
+        self.perf_start = time.perf_counter()
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.span.duration = time.perf_counter() - self.perf_start
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        _current_span.reset(self.token)
+        self.span.trace.spans.append(self.span)
+        if self.root:
+            _export(self.span.trace)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, **attributes):
+    """
+    Вложенный спан внутри текущей трассы
+
+    Вне трассы возвращает no-op (стоимость - одно чтение contextvar).
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return _ActiveSpan(Span(parent.trace, name, parent.span_id, attributes))
+
+
+def record_span(name: str, perf_start: float, perf_end: float, **attributes) -> None:
+    """Записать уже завершенный спан (для событий с известным началом и концом)"""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(parent.trace, name, parent.span_id, attributes)
+    finished.duration = perf_end - perf_start
+    finished.start = time.time() - (time.perf_counter() - perf_start)
+    parent.trace.spans.append(finished)
+
+
+def start_trace(name: str, headers: Dict[str, str], **attributes):
+    """
+    Корневой спан запроса или no-op, если запрос не попал в выборку
+
+    traceparent (W3C): берется trace id и решение о выборке вызывающей стороны.
+    X-Trace-Id: id трассы; трассировка включается принудительно только при
+    TRACE_FORCE_BY_HEADER, иначе клиент мог бы обойти выборку.
+    Иначе - случайная выборка с вероятностью TRACE_SAMPLE_RATE.
+    """
+    trace_id, parent_id = None, None
+
+    traceparent = headers.get("traceparent", "").strip().lower()
+    match = TRACEPARENT_RE.match(traceparent)
+    if match:
+        if not int(match.group(3), 16) & 1:
+            return NOOP_SPAN
+        trace_id, parent_id = match.group(1), match.group(2)
+    else:
+        settings = get_settings()
+        requested = headers.get("x-trace-id", "").strip()
+        if TRACE_ID_RE.match(requested):
+            trace_id = requested
+        if not (trace_id and settings.TRACE_FORCE_BY_HEADER) and random.random() >= settings.TRACE_SAMPLE_RATE:
+            return NOOP_SPAN
+
+    trace = Trace(trace_id or os.urandom(16).hex())
+    return _ActiveSpan(Span(trace, name, parent_id, attributes), root=True)
+
+
+_exporter_lock = threading.Lock()
+_exporter: Optional[logging.Logger] = None
+
+
+def _get_exporter() -> logging.Logger:
+    """Логгер с RotatingFileHandler на TRACE_FILE (создается при первой трассе)"""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            settings = get_settings()
+            directory = os.path.dirname(settings.TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            handler = RotatingFileHandler(
+                settings.TRACE_FILE,
+                maxBytes=settings.TRACE_FILE_MAX_BYTES,
+                backupCount=settings.TRACE_FILE_BACKUP_COUNT,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+            logger = logging.getLogger("app.tracing.export")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _exporter = logger
+    return _exporter
+
+
+class _TraceWriter:
+    """Фоновый поток записи трасс: обработчик запроса только ставит трассу в очередь"""
+
+    def __init__(self, max_queue: int):
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            TRACES_DROPPED.inc()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Дописать очередь и остановить поток"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                lines = "\n".join(
+                    json.dumps(finished.to_dict(), ensure_ascii=False, default=str)
+                    for finished in trace.spans
+                )
+                _get_exporter().info(lines)
+            except Exception:
+                logger.exception("Не удалось записать трассу %s", trace.trace_id)
+
+
+_writer_lock = threading.Lock()
+_writer: Optional[_TraceWriter] = None
+
+
+def _export(trace: Trace) -> None:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _TraceWriter(get_settings().TRACE_QUEUE_SIZE)
+    _writer.put(trace)
+
+
+def _reset_writer() -> None:
+    # Поток записи не переживает fork: в дочернем процессе создается заново
+    global _writer
+    _writer = None
+
+
+@atexit.register
+def _close_writer() -> None:
+    if _writer is not None:
+        _writer.close()
+
+
+os.register_at_fork(after_in_child=_reset_writer)
+
+
+def to_chrome_trace(lines: Iterable[str]) -> Dict:
+    """Спаны из JSONL в формат Chrome Trace Event (chrome://tracing, Perfetto)"""
+    events = []
+    thread_ids: Dict[str, int] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        events.append({
+            "name": record["name"],
+            "ph": "X",
+            "ts": record["ts"],
+            "dur": record["dur"],
+            "pid": 1,
+            # Одна "дорожка" на трассу
+            "tid": thread_ids.setdefault(record["trace_id"], len(thread_ids) + 1),
+            "args": {"trace_id": record["trace_id"], **record["attributes"]}
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def instrument_engine(engine) -> None:
+    """Спан db.query на каждый SQL запрос внутри трассы"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_span.get() is not None:
+            conn.info["trace_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("trace_query_start", None)
+        if start is not None:
+            record_span("db.query", start, time.perf_counter(), statement=statement[:200])
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: корневой спан на запрос, X-Trace-Id в ответе
+    для запросов, попавших в выборку
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+            if name in (b"traceparent", b"x-trace-id")
+        }
+        root = start_trace("http.request", headers, method=scope["method"], path=scope["path"])
+        if root is NOOP_SPAN:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = root.span.trace.trace_id
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.span.attributes["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        with root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                root.span.name = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8") as trace_file:
+        json.dump(to_chrome_trace(trace_file), sys.stdout)
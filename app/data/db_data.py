@@ -1,10 +1,14 @@
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.db.models import Student as DBStudent
 from app.api.schemas import Student, StudentFeatures
+from app.core.metrics import timed
+from app.core.tracing import span
 
 
+@timed("db.get_students")
 def get_students(db: Session = None) -> List[Student]:
     """Получить всех студентов из БД"""
     should_close = False
@@ -39,6 +43,106 @@ def get_students(db: Session = None) -> List[Student]:
             db.close()
 
 
+# Колонки для колоночной выборки (порядок фич как в ChurnPredictor.feature_names)
+STUDENT_INFO_COLUMNS = ["id", "name", "email", "course", "phone_number"]
+FEATURE_COLUMNS = [
+    "attendance_rate",
+    "homework_completion",
+    "test_avg_score",
+    "communication_activity",
+    "days_enrolled",
+    "missed_classes_streak",
+]
+
+
+@timed("db.get_student_columns")
+def get_student_columns(db: Session = None) -> Dict[str, tuple]:
+    """
+    Получить всех студентов в колоночном виде без построения Pydantic моделей
+    
+    Returns:
+        {column_name: tuple значений} для STUDENT_INFO_COLUMNS + FEATURE_COLUMNS
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+    
+    try:
+        names = STUDENT_INFO_COLUMNS + FEATURE_COLUMNS
+        rows = db.query(*[getattr(DBStudent, name) for name in names]).all()
+        
+        columns = tuple(zip(*rows)) if rows else tuple(() for _ in names)
+        return dict(zip(names, columns))
+    finally:
+        if should_close:
+            db.close()
+
+
+def iter_student_column_chunks(chunk_size: int = 1000) -> Iterator[Dict[str, tuple]]:
+    """
+    Читать студентов порциями по chunk_size (keyset-пагинация по id)
+    
+    Память не растет с размером таблицы: в каждый момент в памяти одна порция.
+    
+    Yields:
+        {column_name: tuple значений} как в get_student_columns
+    """
+    names = STUDENT_INFO_COLUMNS + FEATURE_COLUMNS
+    query_columns = [getattr(DBStudent, name) for name in names]
+    last_id = None
+    
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(*query_columns)
+            if last_id is not None:
+                query = query.filter(DBStudent.id > last_id)
+            rows = query.order_by(DBStudent.id).limit(chunk_size).all()
+            
+            if not rows:
+                break
+            
+            yield dict(zip(names, zip(*rows)))
+            last_id = rows[-1][0]
+            
+            if len(rows) < chunk_size:
+                break
+    finally:
+        db.close()
+
+
+def get_student_columns_range(
+    id_from: int,
+    id_to: Optional[int] = None,
+    db: Session = None
+) -> Dict[str, tuple]:
+    """
+    Студенты с id_from <= id <= id_to (id_to=None - до конца) в колоночном виде
+    
+    Returns:
+        {column_name: tuple значений} как в get_student_columns
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+    
+    try:
+        names = STUDENT_INFO_COLUMNS + FEATURE_COLUMNS
+        query = db.query(*[getattr(DBStudent, name) for name in names]).filter(DBStudent.id >= id_from)
+        if id_to is not None:
+            query = query.filter(DBStudent.id <= id_to)
+        rows = query.order_by(DBStudent.id).all()
+        
+        columns = tuple(zip(*rows)) if rows else tuple(() for _ in names)
+        return dict(zip(names, columns))
+    finally:
+        if should_close:
+            db.close()
+
+
+@timed("db.get_student_by_id")
 def get_student_by_id(student_id: int) -> Student:
     """
     Get student by ID from database
@@ -54,26 +158,77 @@ def get_student_by_id(student_id: int) -> Student:
     """
     db = SessionLocal()
     try:
+        with span("db.checkout"):
+            db.connection()
+        
         db_student = db.query(DBStudent).filter(DBStudent.id == student_id).first()
         
         if not db_student:
             raise ValueError(f"Студент с ID {student_id} не найден")
         
-        return Student(
-            id=db_student.id,
-            name=db_student.name,
-            email=db_student.email,
-            course=db_student.course,
-            student_course_name=db_student.course,
-            student_phone_number=db_student.phone_number,
-            features=StudentFeatures(
-                attendance_rate=db_student.attendance_rate,
-                homework_completion=db_student.homework_completion,
-                test_avg_score=db_student.test_avg_score,
-                communication_activity=db_student.communication_activity,
-                days_enrolled=db_student.days_enrolled,
-                missed_classes_streak=db_student.missed_classes_streak
+        with span("pydantic.build"):
+            return Student(
+                id=db_student.id,
+                name=db_student.name,
+                email=db_student.email,
+                course=db_student.course,
+                student_course_name=db_student.course,
+                student_phone_number=db_student.phone_number,
+                features=StudentFeatures(
+                    attendance_rate=db_student.attendance_rate,
+                    homework_completion=db_student.homework_completion,
+                    test_avg_score=db_student.test_avg_score,
+                    communication_activity=db_student.communication_activity,
+                    days_enrolled=db_student.days_enrolled,
+                    missed_classes_streak=db_student.missed_classes_streak
+                )
             )
-        )
     finally:
         db.close()
+
+
+@timed("db.get_student_version")
+def get_student_version(student_id: int):
+    """
+    Версия данных студента (updated_at) - дешевый запрос без загрузки фич
+    
+    Raises:
+        ValueError: If student not found
+    """
+    db = SessionLocal()
+    try:
+        with span("db.checkout"):
+            db.connection()
+        
+        row = db.query(DBStudent.updated_at).filter(DBStudent.id == student_id).first()
+        
+        if row is None:
+            raise ValueError(f"Студент с ID {student_id} не найден")
+        
+        return row[0]
+    finally:
+        db.close()
+
+
+@timed("db.get_roster_version")
+def get_roster_version(db: Session = None) -> Tuple[object, int]:
+    """
+    Версия всего списка студентов одним агрегатным запросом
+    
+    Returns:
+        (max(updated_at), количество студентов)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+    
+    try:
+        max_updated_at, count = db.query(
+            func.max(DBStudent.updated_at),
+            func.count(DBStudent.id)
+        ).one()
+        return max_updated_at, count
+    finally:
+        if should_close:
+            db.close()
@@ -0,0 +1,105 @@
+"""
+Хранилище заранее сгенерированных LLM объяснений
+"""
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.db.models import StudentExplanation
+
+
+def features_hash(features: Dict) -> str:
+    """Хэш 6 фич студента: меняется при любом изменении данных"""
+    payload = json.dumps(features, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_stored_explanation(
+    student_id: int,
+    risk_level: str,
+    feature_hash: str,
+    llm_model: str,
+    prompt_version: str
+) -> Optional[Tuple[str, Dict]]:
+    """
+    Получить сохраненные объяснение и рекомендацию, если они актуальны
+
+    Returns:
+        (explanation, recommendation) или None, если записи нет
+        либо риск, фичи, модель или версия промпта изменились
+    """
+    db = SessionLocal()
+    try:
+        stored = db.get(StudentExplanation, student_id)
+        if (
+            stored is None
+            or stored.risk_level != risk_level
+            or stored.features_hash != feature_hash
+            or stored.llm_model != llm_model
+            or stored.prompt_version != prompt_version
+        ):
+            return None
+
+        return stored.explanation, stored.recommendation
+    finally:
+        db.close()
+
+
+def get_explanation_index(db: Session = None) -> Dict[int, Tuple[str, str, str, str]]:
+    """
+    Получить ключи актуальности всех сохраненных объяснений
+
+    Returns:
+        {student_id: (risk_level, features_hash, llm_model, prompt_version)}
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        rows = db.query(
+            StudentExplanation.student_id,
+            StudentExplanation.risk_level,
+            StudentExplanation.features_hash,
+            StudentExplanation.llm_model,
+            StudentExplanation.prompt_version
+        ).all()
+
+        return {row[0]: tuple(row[1:]) for row in rows}
+    finally:
+        if should_close:
+            db.close()
+
+
+def save_explanation(
+    student_id: int,
+    risk_level: str,
+    feature_hash: str,
+    explanation: str,
+    recommendation: Dict,
+    llm_model: str,
+    prompt_version: str
+) -> None:
+    """Сохранить (или обновить) объяснение и рекомендацию студента"""
+    db = SessionLocal()
+    try:
+        stored = db.get(StudentExplanation, student_id)
+        if stored is None:
+            stored = StudentExplanation(student_id=student_id)
+            db.add(stored)
+
+        stored.risk_level = risk_level
+        stored.features_hash = feature_hash
+        stored.explanation = explanation
+        stored.recommendation = recommendation
+        stored.llm_model = llm_model
+        stored.prompt_version = prompt_version
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
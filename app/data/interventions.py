@@ -0,0 +1,293 @@
+"""
+Действия по удержанию студентов и их итоги
+
+Каждое событие (рекомендация, выполнение, итог) в той же транзакции
+увеличивает счетчики action_stats и action_weekly_stats, поэтому дашборд
+читает O(количество действий) строк, а не агрегирует журнал.
+"""
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import ActionStats, ActionWeeklyStats, Intervention, Student
+
+OUTCOMES = ("retained", "churned")
+COUNTER_COLUMNS = ("recommended", "taken", "successful", "failed")
+
+
+class InterventionStateError(Exception):
+    """Событие не подходит к текущему состоянию действия (например, итог уже записан)"""
+
+
+def week_start(day: datetime.date) -> datetime.date:
+    """Понедельник недели, к которой относится дата (недели счетчиков - по UTC, как метки времени)"""
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def record_recommendation(
+    student_id: int,
+    action: str,
+    risk_level: Optional[str] = None,
+    db: Session = None
+) -> int:
+    """
+    Записать показанную ментору рекомендацию
+
+    Если по студенту уже есть открытая (не выполненная) рекомендация того же
+    действия, новая не создается и счетчики не меняются.
+
+    Returns:
+        ID записи действия
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        existing = (
+            db.query(Intervention.id)
+            .filter(
+                Intervention.student_id == student_id,
+                Intervention.action == action,
+                Intervention.status == "recommended",
+                Intervention.outcome.is_(None)
+            )
+            .first()
+        )
+        if existing is not None:
+            return existing[0]
+
+        now = _now()
+        intervention = Intervention(
+            student_id=student_id,
+            action=action,
+            risk_level=risk_level,
+            status="recommended",
+            recommended_at=now
+        )
+        db.add(intervention)
+        _increment(db, action, now, recommended=1)
+        db.commit()
+        return intervention.id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def mark_taken(
+    student_id: int,
+    action: str,
+    intervention_id: Optional[int] = None,
+    db: Session = None
+) -> Dict:
+    """
+    Отметить, что ментор выполнил действие
+
+    Args:
+        student_id: ID студента
+        action: Выполненное действие
+        intervention_id: ID рекомендации, которую выполнили (иначе создается новая запись)
+
+    Raises:
+        ValueError: Студент или рекомендация не найдены
+        InterventionStateError: Рекомендация уже выполнена или закрыта
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        now = _now()
+        if intervention_id is not None:
+            intervention = db.get(Intervention, intervention_id)
+            if intervention is None or intervention.student_id != student_id:
+                raise ValueError(f"Intervention with id {intervention_id} not found")
+            if intervention.status != "recommended" or intervention.outcome is not None:
+                raise InterventionStateError(f"Intervention {intervention_id} is already {intervention.status}")
+            # Ментор мог выполнить другое действие, чем рекомендовано
+            intervention.action = action
+        else:
+            if db.get(Student, student_id) is None:
+                raise ValueError(f"Student with id {student_id} not found")
+            intervention = Intervention(student_id=student_id, action=action)
+            db.add(intervention)
+
+        intervention.status = "taken"
+        intervention.taken_at = now
+        _increment(db, action, now, taken=1)
+        db.commit()
+        return _to_dict(intervention)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def record_outcome(intervention_id: int, outcome: str, db: Session = None) -> Dict:
+    """
+    Записать итог выполненного действия: retained (студент остался) или churned
+
+    Raises:
+        ValueError: Действие не найдено или неизвестный итог
+        InterventionStateError: Действие не выполнено или итог уже записан
+    """
+    if outcome not in OUTCOMES:
+        raise ValueError(f"outcome must be one of {', '.join(OUTCOMES)}")
+
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        intervention = db.get(Intervention, intervention_id)
+        if intervention is None:
+            raise ValueError(f"Intervention with id {intervention_id} not found")
+        if intervention.status != "taken":
+            raise InterventionStateError(f"Intervention {intervention_id} has not been taken")
+        if intervention.outcome is not None:
+            raise InterventionStateError(f"Intervention {intervention_id} already has outcome {intervention.outcome}")
+
+        now = _now()
+        intervention.outcome = outcome
+        intervention.outcome_at = now
+        if outcome == "retained":
+            _increment(db, intervention.action, now, successful=1)
+        else:
+            _increment(db, intervention.action, now, failed=1)
+        db.commit()
+        return _to_dict(intervention)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_student_interventions(student_id: int, db: Session = None) -> List[Dict]:
+    """Все действия по студенту, новые первыми"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        rows = (
+            db.query(Intervention)
+            .filter(Intervention.student_id == student_id)
+            .order_by(Intervention.id.desc())
+            .all()
+        )
+        return [_to_dict(row) for row in rows]
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_action_stats(db: Session = None) -> List[Dict]:
+    """Счетчики по всем действиям за все время"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        return [
+            {"action": row.action, **{column: getattr(row, column) for column in COUNTER_COLUMNS}}
+            for row in db.query(ActionStats).all()
+        ]
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_week_totals(week: Optional[datetime.date] = None, db: Session = None) -> Tuple[int, int]:
+    """
+    Сумма выполненных и успешных действий за неделю (по умолчанию - текущую по UTC)
+
+    Returns:
+        (taken, successful)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        week = week or _now().date()
+        taken, successful = (
+            db.query(func.sum(ActionWeeklyStats.taken), func.sum(ActionWeeklyStats.successful))
+            .filter(ActionWeeklyStats.week_start == week_start(week))
+            .one()
+        )
+        return int(taken or 0), int(successful or 0)
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_action_stats_version(db: Session = None) -> int:
+    """Общее число событий: растет при каждой записи, используется для инвалидации кэша"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        total = db.query(func.sum(
+            ActionStats.recommended + ActionStats.taken + ActionStats.successful + ActionStats.failed
+        )).scalar()
+        return int(total or 0)
+    finally:
+        if should_close:
+            db.close()
+
+
+def _increment(db: Session, action: str, at: datetime.datetime, **deltas: int) -> None:
+    """
+    Увеличить счетчики действия за все время и за неделю события at
+    (UTC дата, как у записанной метки времени; в текущей транзакции)
+    """
+    for model, key in (
+        (ActionStats, {"action": action}),
+        (ActionWeeklyStats, {"week_start": week_start(at.date()), "action": action}),
+    ):
+        values = {getattr(model, column): getattr(model, column) + delta for column, delta in deltas.items()}
+        if db.query(model).filter_by(**key).update(values, synchronize_session=False):
+            continue
+        try:
+            # Первая запись для действия; при гонке строку уже вставил другой запрос
+            with db.begin_nested():
+                db.add(model(**key, **{column: deltas.get(column, 0) for column in COUNTER_COLUMNS}))
+        except IntegrityError:
+            db.query(model).filter_by(**key).update(values, synchronize_session=False)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _to_dict(intervention: Intervention) -> Dict:
+    return {
+        "id": intervention.id,
+        "student_id": intervention.student_id,
+        "action": intervention.action,
+        "risk_level": intervention.risk_level,
+        "status": intervention.status,
+        "outcome": intervention.outcome,
+        "recommended_at": intervention.recommended_at,
+        "taken_at": intervention.taken_at,
+        "outcome_at": intervention.outcome_at
+    }
@@ -0,0 +1,299 @@
+"""
+Фоновые задачи (jobs): состояние, прогресс и результат в таблице jobs
+
+Задачу выполняет процесс API, который ее принял (app/jobs/runner.py), но
+читать статус и отменять ее можно через любой процесс: все переходы -
+атомарные UPDATE с условием на текущий статус.
+
+Процесс-владелец периодически продлевает heartbeat своих незавершенных задач
+(heartbeat_jobs). Задачи, чей heartbeat устарел, любой процесс помечает failed
+(fail_orphaned_jobs): так восстанавливаются задачи упавших процессов на любом
+узле, даже если новый процесс получил тот же hostname и pid (PID 1 в контейнере).
+"""
+import datetime
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.data.scores import db_now
+from app.db.database import SessionLocal
+from app.db.models import Job
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobStateError(Exception):
+    """Операция не подходит к текущему статусу задачи (например, отмена завершенной)"""
+
+
+# Уникален для каждого запуска процесса (и для каждого fork)
+_boot_id = uuid.uuid4().hex[:8]
+
+
+def _new_boot_id() -> None:
+    global _boot_id
+    _boot_id = uuid.uuid4().hex[:8]
+
+
+os.register_at_fork(after_in_child=_new_boot_id)
+
+
+def current_owner() -> str:
+    """Идентификатор процесса-владельца задач: hostname:pid:boot"""
+    return f"{socket.gethostname()}:{os.getpid()}:{_boot_id}"
+
+
+def create_job(kind: str, params: Dict, db: Session = None) -> Dict:
+    """Записать новую задачу в статусе queued, владелец - текущий процесс"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        job = Job(
+            kind=kind,
+            status="queued",
+            params=params,
+            progress_done=0,
+            cancel_requested=False,
+            owner=current_owner(),
+            heartbeat_at=func.now(),
+            created_at=_now()
+        )
+        db.add(job)
+        db.commit()
+        return _to_dict(job)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_job(job_id: int, db: Session = None) -> Dict:
+    """
+    Raises:
+        ValueError: Задача не найдена
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            raise ValueError(f"Job with id {job_id} not found")
+        return _to_dict(job)
+    finally:
+        if should_close:
+            db.close()
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50, db: Session = None) -> List[Dict]:
+    """Последние задачи (новые первыми), опционально с фильтром по статусу"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        query = db.query(Job)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        return [_to_dict(job) for job in query.order_by(Job.id.desc()).limit(limit).all()]
+    finally:
+        if should_close:
+            db.close()
+
+
+def start_job(job_id: int, db: Session = None) -> bool:
+    """
+    Перевести задачу queued -> running
+
+    Returns:
+        False, если задачу уже отменили (выполнять не нужно)
+    """
+    return _transition(
+        job_id, ("queued",), {"status": "running", "started_at": _now(), "heartbeat_at": func.now()}, db
+    )
+
+
+def update_job_progress(job_id: int, done: int, total: Optional[int] = None, db: Session = None) -> bool:
+    """
+    Записать прогресс выполняемой задачи
+
+    Returns:
+        Запрошена ли отмена задачи
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        db.query(Job).filter(Job.id == job_id).update(
+            {"progress_done": done, "progress_total": total},
+            synchronize_session=False
+        )
+        cancel_requested = db.query(Job.cancel_requested).filter(Job.id == job_id).scalar()
+        db.commit()
+        return bool(cancel_requested)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def finish_job(
+    job_id: int,
+    status: str,
+    result: Optional[Dict] = None,
+    error: Optional[str] = None,
+    db: Session = None
+) -> None:
+    """Завершить незавершенную задачу: succeeded, failed или cancelled"""
+    if status not in FINISHED_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(FINISHED_STATUSES)}")
+
+    _transition(
+        job_id, ACTIVE_STATUSES,
+        {"status": status, "result": result, "error": error, "finished_at": _now()},
+        db
+    )
+
+
+def request_job_cancel(job_id: int, db: Session = None) -> Dict:
+    """
+    Отменить задачу: ожидающая отменяется сразу, у выполняемой выставляется
+    cancel_requested (она остановится на ближайшей записи прогресса)
+
+    Raises:
+        ValueError: Задача не найдена
+        JobStateError: Задача уже завершена
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        if not _transition(job_id, ("queued",), {"status": "cancelled", "finished_at": _now()}, db):
+            if not _transition(job_id, ("running",), {"cancel_requested": True}, db):
+                job = get_job(job_id, db)
+                raise JobStateError(f"Job {job_id} is already {job['status']}")
+        return get_job(job_id, db)
+    finally:
+        if should_close:
+            db.close()
+
+
+def heartbeat_jobs(db: Session = None) -> int:
+    """
+    Продлить heartbeat незавершенных задач текущего процесса
+
+    Returns:
+        Сколько задач обновлено
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        updated = db.query(Job).filter(
+            Job.owner == current_owner(), Job.status.in_(ACTIVE_STATUSES)
+        ).update({"heartbeat_at": func.now()}, synchronize_session=False)
+        db.commit()
+        return updated
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def fail_orphaned_jobs(timeout_seconds: float, db: Session = None) -> int:
+    """
+    Пометить failed незавершенные задачи, чей владелец не продлевал heartbeat
+    дольше timeout_seconds (процесс API упал или был перезапущен посреди задачи)
+
+    Время - по часам БД, как у аренды порций пересчета.
+
+    Returns:
+        Сколько задач помечено
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        cutoff = db_now(db) - datetime.timedelta(seconds=timeout_seconds)
+        orphaned = db.query(Job).filter(
+            Job.status.in_(ACTIVE_STATUSES),
+            Job.owner != current_owner(),
+            or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff)
+        ).update(
+            {"status": "failed", "error": "Процесс API завершился до окончания задачи", "finished_at": _now()},
+            synchronize_session=False
+        )
+        db.commit()
+        return orphaned
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def _transition(job_id: int, from_statuses: tuple, values: Dict, db: Session = None) -> bool:
+    """Атомарно обновить задачу, если она в одном из from_statuses"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        updated = db.query(Job).filter(
+            Job.id == job_id, Job.status.in_(from_statuses)
+        ).update(values, synchronize_session=False)
+        db.commit()
+        return updated == 1
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _to_dict(job: Job) -> Dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "progress": {"done": job.progress_done, "total": job.progress_total},
+        "result": job.result,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
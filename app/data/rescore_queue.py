@@ -0,0 +1,307 @@
+"""
+Очередь порций распределенного пересчета оценок (rescore_runs, rescore_chunks)
+
+Запуск делит пространство id студентов на диапазоны. Любое число воркеров
+(процессов, узлов) захватывает порции через SELECT ... FOR UPDATE SKIP LOCKED
+и арендует их на lease_seconds: одну порцию одновременно считает один воркер,
+а порция упавшего воркера возвращается в очередь, когда истекает аренда.
+Время аренды - по часам БД, чтобы расхождение часов узлов не мешало.
+"""
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.data.scores import db_now
+from app.db.database import SessionLocal
+from app.db.models import RescoreChunk, RescoreRun, Student
+
+# Попыток захвата, если порцию между SELECT и UPDATE забрал другой воркер
+# (на PostgreSQL не бывает благодаря SKIP LOCKED, на SQLite - возможно)
+CLAIM_ATTEMPTS = 5
+
+
+def create_rescore_run(model_version: str, chunk_size: int, db: Session = None) -> Dict:
+    """
+    Создать запуск и его порции по chunk_size студентов
+
+    Последняя порция открыта сверху (id_to=NULL) и захватывает студентов,
+    добавленных после создания запуска.
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        run = RescoreRun(
+            model_version=model_version,
+            # Время до чтения фич: изменения во время пересчета сделают оценку неактуальной
+            scored_at=db_now(db),
+            chunk_size=chunk_size,
+            status="running",
+            created_at=_now()
+        )
+        db.add(run)
+        db.flush()
+
+        starts = _chunk_starts(db, chunk_size)
+        db.bulk_insert_mappings(RescoreChunk, [
+            {
+                "run_id": run.id,
+                "id_from": start,
+                "id_to": starts[index + 1] - 1 if index + 1 < len(starts) else None,
+                "status": "pending",
+                "attempts": 0
+            }
+            for index, start in enumerate(starts)
+        ])
+        db.commit()
+        return get_rescore_run(run.id, db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_rescore_run(run_id: int, db: Session = None) -> Dict:
+    """
+    Запуск с количеством порций по статусам и числом оцененных студентов
+
+    Raises:
+        ValueError: Запуск не найден
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        run = db.get(RescoreRun, run_id)
+        if run is None:
+            raise ValueError(f"Rescore run with id {run_id} not found")
+
+        chunks = {"pending": 0, "leased": 0, "done": 0}
+        scored = 0
+        for status, count, status_scored in (
+            db.query(RescoreChunk.status, func.count(RescoreChunk.id), func.sum(RescoreChunk.scored))
+            .filter(RescoreChunk.run_id == run_id)
+            .group_by(RescoreChunk.status)
+            .all()
+        ):
+            chunks[status] = count
+            scored += status_scored or 0
+
+        return {
+            "id": run.id,
+            "model_version": run.model_version,
+            "scored_at": run.scored_at,
+            "chunk_size": run.chunk_size,
+            "status": run.status,
+            "chunks": chunks,
+            "scored": scored,
+            "created_at": run.created_at,
+            "finished_at": run.finished_at
+        }
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_active_rescore_run(db: Session = None) -> Optional[Dict]:
+    """Последний незавершенный запуск или None"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        run_id = (
+            db.query(RescoreRun.id)
+            .filter(RescoreRun.status == "running")
+            .order_by(RescoreRun.id.desc())
+            .limit(1)
+            .scalar()
+        )
+        return get_rescore_run(run_id, db) if run_id is not None else None
+    finally:
+        if should_close:
+            db.close()
+
+
+def claim_rescore_chunk(run_id: int, owner: str, lease_seconds: float, db: Session = None) -> Optional[Dict]:
+    """
+    Захватить свободную порцию запуска: ожидающую или с истекшей арендой
+
+    Returns:
+        {"id", "id_from", "id_to", "attempts"} или None, если свободных порций нет
+        (все посчитаны или арендованы другими воркерами, либо запуск остановлен)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        for _ in range(CLAIM_ATTEMPTS):
+            now = db_now(db)
+            candidate = (
+                db.query(RescoreChunk.id, RescoreChunk.attempts)
+                .filter(
+                    RescoreChunk.run_id == run_id,
+                    RescoreChunk.run_id.in_(
+                        db.query(RescoreRun.id).filter(RescoreRun.status == "running")
+                    ),
+                    or_(
+                        RescoreChunk.status == "pending",
+                        and_(RescoreChunk.status == "leased", RescoreChunk.lease_expires_at < now)
+                    )
+                )
+                .order_by(RescoreChunk.id)
+                .limit(1)
+                .with_for_update(skip_locked=True, of=RescoreChunk)
+                .first()
+            )
+            if candidate is None:
+                db.commit()
+                return None
+
+            # attempts как версия строки: захват не пройдет, если порцию уже забрали
+            claimed = db.query(RescoreChunk).filter(
+                RescoreChunk.id == candidate.id,
+                RescoreChunk.attempts == candidate.attempts
+            ).update(
+                {
+                    "status": "leased",
+                    "lease_owner": owner,
+                    "lease_expires_at": now + datetime.timedelta(seconds=lease_seconds),
+                    "attempts": candidate.attempts + 1
+                },
+                synchronize_session=False
+            )
+            db.commit()
+            if claimed:
+                chunk = db.get(RescoreChunk, candidate.id)
+                return {
+                    "id": chunk.id,
+                    "id_from": chunk.id_from,
+                    "id_to": chunk.id_to,
+                    "attempts": chunk.attempts
+                }
+        return None
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def complete_rescore_chunk(chunk_id: int, owner: str, scored: int, db: Session = None) -> bool:
+    """
+    Отметить порцию посчитанной
+
+    Returns:
+        False, если аренда истекла и порцию уже забрал другой воркер
+        (оценки записаны идемпотентно, порцию завершит он)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        updated = db.query(RescoreChunk).filter(
+            RescoreChunk.id == chunk_id,
+            RescoreChunk.status == "leased",
+            RescoreChunk.lease_owner == owner
+        ).update(
+            {"status": "done", "scored": scored, "finished_at": _now()},
+            synchronize_session=False
+        )
+        db.commit()
+        return updated == 1
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def finish_rescore_run(run_id: int, db: Session = None) -> bool:
+    """
+    Завершить запуск, если все порции посчитаны
+
+    Returns:
+        Завершен ли запуск (этим или другим воркером)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        remaining = (
+            db.query(func.count(RescoreChunk.id))
+            .filter(RescoreChunk.run_id == run_id, RescoreChunk.status != "done")
+            .scalar()
+        )
+        if remaining:
+            return False
+
+        db.query(RescoreRun).filter(
+            RescoreRun.id == run_id, RescoreRun.status == "running"
+        ).update({"status": "done", "finished_at": _now()}, synchronize_session=False)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def cancel_rescore_run(run_id: int, db: Session = None) -> None:
+    """Остановить запуск: воркеры больше не захватывают его порции"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        db.query(RescoreRun).filter(
+            RescoreRun.id == run_id, RescoreRun.status == "running"
+        ).update({"status": "cancelled", "finished_at": _now()}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def _chunk_starts(db: Session, chunk_size: int) -> List[int]:
+    """Первые id порций: каждый chunk_size-й id по индексу первичного ключа"""
+    starts = []
+    start = db.query(func.min(Student.id)).scalar()
+    while start is not None:
+        starts.append(start)
+        start = (
+            db.query(Student.id)
+            .filter(Student.id >= start)
+            .order_by(Student.id)
+            .offset(chunk_size)
+            .limit(1)
+            .scalar()
+        )
+    return starts
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
@@ -0,0 +1,89 @@
+"""
+Потоковая выгрузка оцененного списка студентов (NDJSON / CSV, опционально gzip)
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from app.data.db_data import iter_student_column_chunks
+from app.models.ml_model import ChurnPredictor
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+EXPORT_FIELDS = [
+    "student_id",
+    "student_name",
+    "student_course_name",
+    "student_phone_number",
+    "risk_level",
+    "confidence",
+    "churn_probability",
+]
+
+
+def iter_scored_chunks(predictor: ChurnPredictor, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """Скоринг студентов порциями: один пакетный вызов модели на порцию"""
+    for columns in iter_student_column_chunks(chunk_size):
+        probabilities, risk_levels, confidences = predictor.predict_batch(
+            predictor.matrix_from_columns(columns)
+        )
+        yield [
+            dict(zip(EXPORT_FIELDS, row))
+            for row in zip(
+                columns["id"],
+                columns["name"],
+                columns["course"],
+                columns["phone_number"],
+                risk_levels.tolist(),
+                np.round(confidences, 2).tolist(),
+                np.round(probabilities, 4).tolist()
+            )
+        ]
+
+
+def iter_export(
+    predictor: ChurnPredictor,
+    export_format: str = "ndjson",
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Выгрузка в NDJSON или CSV: одна порция студентов = один блок байт
+
+    Args:
+        predictor: ML модель
+        export_format: "ndjson" или "csv"
+        chunk_size: Размер порции чтения и скоринга
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        yield buffer.getvalue().encode("utf-8")
+
+        for rows in iter_scored_chunks(predictor, chunk_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        for rows in iter_scored_chunks(predictor, chunk_size):
+            yield "".join(
+                json.dumps(row, ensure_ascii=False) + "\n" for row in rows
+            ).encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Сжать поток в gzip, сбрасывая буфер после каждой порции (строки приходят сразу)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
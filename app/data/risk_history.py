@@ -0,0 +1,214 @@
+"""
+История риска: журнал изменений по студентам и дневные агрегаты по уровням и курсам
+"""
+import datetime
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.models import RiskDailyRollup, RiskSnapshot
+
+TREND_BUCKETS = ("day", "week", "month")
+
+
+def get_risk_state(
+    before: datetime.date,
+    db: Session = None
+) -> Dict[int, Tuple[Optional[str], Optional[str], Optional[float]]]:
+    """
+    Последнее записанное состояние каждого студента до даты (не включая ее)
+
+    Returns:
+        {student_id: (course, risk_level, churn_probability)};
+        risk_level None означает, что студент был удален
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        latest = (
+            db.query(
+                RiskSnapshot.student_id,
+                func.max(RiskSnapshot.snapshot_date).label("snapshot_date")
+            )
+            .filter(RiskSnapshot.snapshot_date < before)
+            .group_by(RiskSnapshot.student_id)
+            .subquery()
+        )
+        rows = (
+            db.query(
+                RiskSnapshot.student_id,
+                RiskSnapshot.course,
+                RiskSnapshot.risk_level,
+                RiskSnapshot.churn_probability
+            )
+            .join(latest, and_(
+                RiskSnapshot.student_id == latest.c.student_id,
+                RiskSnapshot.snapshot_date == latest.c.snapshot_date
+            ))
+            .all()
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+    finally:
+        if should_close:
+            db.close()
+
+
+def save_risk_snapshot(
+    snapshot_date: datetime.date,
+    changes: List[Dict],
+    rollups: List[Dict],
+    db: Session = None
+) -> None:
+    """
+    Записать изменения и дневные агрегаты за дату (повторный запуск за ту же дату
+    заменяет ранее записанные строки)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        db.query(RiskSnapshot).filter(RiskSnapshot.snapshot_date == snapshot_date).delete()
+        db.query(RiskDailyRollup).filter(RiskDailyRollup.snapshot_date == snapshot_date).delete()
+        db.bulk_insert_mappings(RiskSnapshot, [{**row, "snapshot_date": snapshot_date} for row in changes])
+        db.bulk_insert_mappings(RiskDailyRollup, [{**row, "snapshot_date": snapshot_date} for row in rollups])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_latest_rollup_date(db: Session = None) -> Optional[datetime.date]:
+    """Дата последнего дневного снимка (None, если снимков еще нет)"""
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        return db.query(func.max(RiskDailyRollup.snapshot_date)).scalar()
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_daily_risk_counts(
+    start: datetime.date,
+    end: datetime.date,
+    course: Optional[str] = None,
+    db: Session = None
+) -> Dict[datetime.date, Dict[str, int]]:
+    """
+    Количество студентов по уровням риска на каждый день снимка в окне [start, end]
+
+    Returns:
+        {snapshot_date: {"Low": n, "Medium": n, "High": n}}
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        query = (
+            db.query(
+                RiskDailyRollup.snapshot_date,
+                RiskDailyRollup.risk_level,
+                func.sum(RiskDailyRollup.students)
+            )
+            .filter(RiskDailyRollup.snapshot_date >= start, RiskDailyRollup.snapshot_date <= end)
+        )
+        if course is not None:
+            query = query.filter(RiskDailyRollup.course == course)
+
+        counts: Dict[datetime.date, Dict[str, int]] = defaultdict(
+            lambda: {"Low": 0, "Medium": 0, "High": 0}
+        )
+        for snapshot_date, risk_level, students in query.group_by(
+            RiskDailyRollup.snapshot_date, RiskDailyRollup.risk_level
+        ):
+            counts[snapshot_date][risk_level] = int(students)
+        return dict(counts)
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_risk_trend(
+    start: datetime.date,
+    end: datetime.date,
+    bucket: str = "week",
+    course: Optional[str] = None,
+    db: Session = None
+) -> List[Dict]:
+    """
+    Тренд риска из дневных агрегатов: для каждого дня/недели/месяца берется
+    последний снимок внутри периода. Периоды без снимков пропускаются.
+
+    Args:
+        start, end: Окно (включительно)
+        bucket: day | week | month
+        course: Только один курс (по умолчанию все)
+
+    Returns:
+        [{"period": "2026-W42", "date": "2026-10-19", "low": n, "medium": n, "high": n}]
+    """
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+
+    daily = get_daily_risk_counts(start, end, course=course, db=db)
+
+    latest_in_period: Dict[str, datetime.date] = {}
+    for snapshot_date in sorted(daily):
+        latest_in_period[_period_label(snapshot_date, bucket)] = snapshot_date
+
+    trend = []
+    for period, snapshot_date in latest_in_period.items():
+        counts = daily[snapshot_date]
+        trend.append({
+            "period": period,
+            "date": snapshot_date.isoformat(),
+            "low": counts["Low"],
+            "medium": counts["Medium"],
+            "high": counts["High"]
+        })
+    return trend
+
+
+def get_risk_change(
+    days: int = 7,
+    risk_level: str = "High",
+    db: Session = None
+) -> int:
+    """
+    Изменение числа студентов уровня risk_level между последним снимком
+    и последним снимком не позже чем за days дней до него (0, если истории нет)
+    """
+    latest = get_latest_rollup_date(db)
+    if latest is None:
+        return 0
+
+    daily = get_daily_risk_counts(latest - datetime.timedelta(days=days * 2), latest, db=db)
+    previous = [d for d in daily if d <= latest - datetime.timedelta(days=days)]
+    if not previous:
+        return 0
+    return daily[latest][risk_level] - daily[max(previous)][risk_level]
+
+
+def _period_label(snapshot_date: datetime.date, bucket: str) -> str:
+    if bucket == "day":
+        return snapshot_date.isoformat()
+    if bucket == "week":
+        year, week, _ = snapshot_date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return snapshot_date.strftime("%Y-%m")
@@ -0,0 +1,149 @@
+"""
+Сохраненные оценки риска студентов (student_scores)
+"""
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.data.db_data import get_roster_version
+from app.db.database import SessionLocal
+from app.db.models import Student, StudentScore
+
+
+def db_now(db: Session) -> datetime.datetime:
+    """Текущее время по часам БД (в тех же единицах, что students.updated_at)"""
+    return db.query(func.now()).scalar()
+
+
+def upsert_student_scores(
+    rows: List[Dict],
+    model_version: str,
+    scored_at: datetime.datetime,
+    db: Session = None
+) -> None:
+    """
+    Идемпотентно записать оценки (INSERT ... ON CONFLICT DO UPDATE)
+
+    Повторная запись той же порции (воркер, чья аренда истекла) дает тот же
+    результат и не конфликтует с параллельной записью. Оценка с более поздним
+    scored_at не перезаписывается более старой.
+
+    Args:
+        rows: [{"student_id", "course", "churn_probability", "risk_level", "confidence"}]
+        model_version: Версия модели, которой посчитаны оценки
+        scored_at: Время БД до чтения фич (см. db_now)
+    """
+    if not rows:
+        return
+
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"upsert is not supported for {dialect}")
+
+        statement = insert(StudentScore)
+        statement = statement.on_conflict_do_update(
+            index_elements=[StudentScore.student_id],
+            set_={
+                name: statement.excluded[name]
+                for name in ("course", "churn_probability", "risk_level", "confidence", "model_version", "scored_at")
+            },
+            where=StudentScore.scored_at <= statement.excluded.scored_at
+        )
+        # executemany: запрос компилируется один раз, драйвер группирует строки сам
+        db.connection().execute(statement, [
+            {**row, "model_version": model_version, "scored_at": scored_at}
+            for row in rows
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if should_close:
+            db.close()
+
+
+def scores_are_fresh(model_version: str, db: Session = None) -> bool:
+    """
+    Есть ли у каждого студента оценка текущей модели, посчитанная после
+    последнего изменения его данных
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        max_updated_at, students = get_roster_version(db)
+        scored, oldest_scored_at = (
+            db.query(func.count(StudentScore.student_id), func.min(StudentScore.scored_at))
+            .filter(StudentScore.model_version == model_version)
+            .one()
+        )
+        if students == 0 or scored != students:
+            return False
+        return max_updated_at is None or oldest_scored_at > max_updated_at
+    finally:
+        if should_close:
+            db.close()
+
+
+def get_top_scores(k: int, course: Optional[str] = None, db: Session = None) -> List[Dict]:
+    """
+    K студентов с наибольшей вероятностью оттока по сохраненным оценкам
+    (ORDER BY churn_probability DESC LIMIT k по индексу)
+    """
+    should_close = False
+    if db is None:
+        db = SessionLocal()
+        should_close = True
+
+    try:
+        query = (
+            db.query(
+                StudentScore.student_id,
+                Student.name,
+                StudentScore.course,
+                Student.phone_number,
+                StudentScore.risk_level,
+                StudentScore.confidence,
+                StudentScore.churn_probability
+            )
+            .join(Student, Student.id == StudentScore.student_id)
+        )
+        if course is not None:
+            query = query.filter(StudentScore.course == course)
+
+        rows = (
+            query
+            .order_by(StudentScore.churn_probability.desc(), StudentScore.student_id)
+            .limit(k)
+            .all()
+        )
+        return [
+            {
+                "student_id": student_id,
+                "student_name": name,
+                "student_course_name": student_course,
+                "student_phone_number": phone_number,
+                "risk_level": risk_level,
+                "confidence": round(confidence, 2),
+                "churn_probability": round(probability, 4)
+            }
+            for student_id, name, student_course, phone_number, risk_level, confidence, probability in rows
+        ]
+    finally:
+        if should_close:
+            db.close()
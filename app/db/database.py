@@ -1,23 +1,41 @@
+import threading
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import get_settings
+from app.core.tracing import instrument_engine
 
-settings = get_settings()
-
-# Database URL
-DATABASE_URL = settings.DATABASE_URL
+# Engine создается при первой сессии, а не при импорте:
+# импорт приложения не загружает драйвер БД и не требует ее доступности
+_engine = None
+_engine_lock = threading.Lock()
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=False)
-
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session factory (engine подставляется в SessionLocal)
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
 
 # Base class for models
 Base = declarative_base()
 
 
+def get_engine() -> Engine:
+    """Общий engine процесса (создается при первом обращении)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(get_settings().DATABASE_URL, echo=False)
+                instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """Новая сессия БД"""
+    return _session_factory(bind=get_engine())
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,7 +1,7 @@
 """
 Database ORM models
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Boolean, Integer, String, Float, Date, DateTime, Text, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -25,3 +25,194 @@ class Student(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+class StudentExplanation(Base):
+    """Заранее сгенерированные LLM объяснение и рекомендация для студента"""
+    __tablename__ = "student_explanations"
+    
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    risk_level = Column(String(10), nullable=False)
+    # Хэш 6 фич на момент генерации: по нему понимаем, что данные изменились
+    features_hash = Column(String(64), nullable=False)
+    explanation = Column(Text, nullable=False)
+    recommendation = Column(JSON, nullable=False)
+    llm_model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    
+    generated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+class RiskSnapshot(Base):
+    """
+    Журнал изменений риска: строка пишется только когда у студента
+    изменился уровень риска или заметно изменилась вероятность.
+    Состояние на дату = последняя строка студента с snapshot_date <= даты.
+    """
+    __tablename__ = "risk_snapshots"
+    __table_args__ = (
+        Index("ix_risk_snapshots_student_date", "student_id", "snapshot_date"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    # Без внешнего ключа: история сохраняется после удаления студента
+    student_id = Column(Integer, nullable=False)
+    snapshot_date = Column(Date, nullable=False, index=True)
+    course = Column(String(255), nullable=True)
+    # NULL = студент удален из базы с этой даты
+    risk_level = Column(String(10), nullable=True)
+    churn_probability = Column(Float, nullable=True)
+
+
+class RiskDailyRollup(Base):
+    """Количество студентов по уровню риска и курсу на каждый день снимка"""
+    __tablename__ = "risk_daily_rollups"
+    
+    snapshot_date = Column(Date, primary_key=True)
+    course = Column(String(255), primary_key=True)
+    risk_level = Column(String(10), primary_key=True)
+    students = Column(Integer, nullable=False)
+
+
+class Intervention(Base):
+    """
+    Рекомендованное или выполненное действие по студенту и его итог.
+    Рекомендация записывается, когда ментор видит анализ; ментор отмечает
+    действие выполненным (taken_at), а позже - итог (retained/churned).
+    """
+    __tablename__ = "interventions"
+    __table_args__ = (
+        Index("ix_interventions_student_action", "student_id", "action"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    action = Column(String(100), nullable=False)
+    risk_level = Column(String(10), nullable=True)
+    # recommended | taken
+    status = Column(String(20), nullable=False)
+    # retained | churned
+    outcome = Column(String(20), nullable=True)
+    
+    recommended_at = Column(DateTime(timezone=True), nullable=True)
+    taken_at = Column(DateTime(timezone=True), nullable=True)
+    outcome_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ActionStats(Base):
+    """Счетчики по действию за все время (обновляются при каждом событии)"""
+    __tablename__ = "action_stats"
+    
+    action = Column(String(100), primary_key=True)
+    recommended = Column(Integer, nullable=False, default=0)
+    taken = Column(Integer, nullable=False, default=0)
+    successful = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+
+class ActionWeeklyStats(Base):
+    """Счетчики по действию за неделю (week_start - понедельник, недели по UTC)"""
+    __tablename__ = "action_weekly_stats"
+    
+    week_start = Column(Date, primary_key=True)
+    action = Column(String(100), primary_key=True)
+    recommended = Column(Integer, nullable=False, default=0)
+    taken = Column(Integer, nullable=False, default=0)
+    successful = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+
+class StudentScore(Base):
+    """
+    Сохраненная оценка риска студента (rescore_students.py).
+    course денормализован, чтобы топ-K по курсу шел по индексу без JOIN.
+    """
+    __tablename__ = "student_scores"
+    __table_args__ = (
+        Index("ix_student_scores_probability", "churn_probability"),
+        Index("ix_student_scores_course_probability", "course", "churn_probability"),
+    )
+    
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    course = Column(String(255), nullable=False)
+    churn_probability = Column(Float, nullable=False)
+    risk_level = Column(String(10), nullable=False)
+    confidence = Column(Float, nullable=False)
+    model_version = Column(String(20), nullable=False)
+    # Время БД до чтения фич: оценка актуальна, если scored_at >= students.updated_at
+    scored_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class Job(Base):
+    """
+    Фоновая задача (POST /api/jobs): генерация объяснений, пересчет оценок,
+    пересборка фич. Статус, прогресс и результат видны любому процессу API.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    # pregenerate | rescore | rebuild_features
+    kind = Column(String(50), nullable=False)
+    # queued | running | succeeded | failed | cancelled
+    status = Column(String(20), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # hostname:pid:boot процесса API, принявшего задачу
+    owner = Column(String(255), nullable=False)
+    # Процесс-владелец продлевает heartbeat, пока жив; задачи с устаревшим
+    # heartbeat (процесс упал или перезапущен) помечаются failed
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class RescoreRun(Base):
+    """
+    Распределенный пересчет student_scores: все порции считаются одной
+    версией модели с одним scored_at (время БД до чтения фич)
+    """
+    __tablename__ = "rescore_runs"
+    
+    id = Column(Integer, primary_key=True)
+    model_version = Column(String(20), nullable=False)
+    scored_at = Column(DateTime(timezone=True), nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    # running | done | cancelled
+    status = Column(String(20), nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class RescoreChunk(Base):
+    """
+    Порция пересчета: диапазон id студентов [id_from, id_to].
+    Воркер захватывает порцию (FOR UPDATE SKIP LOCKED) на lease_expires_at;
+    порцию упавшего воркера после истечения аренды забирает другой.
+    """
+    __tablename__ = "rescore_chunks"
+    __table_args__ = (
+        Index("ix_rescore_chunks_run_status", "run_id", "status"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("rescore_runs.id", ondelete="CASCADE"), nullable=False)
+    id_from = Column(Integer, nullable=False)
+    # NULL - до конца таблицы (студенты, добавленные после создания запуска)
+    id_to = Column(Integer, nullable=True)
+    # pending | leased | done
+    status = Column(String(20), nullable=False)
+    lease_owner = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    scored = Column(Integer, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,122 @@
+"""
+Пакетная (ночная) генерация LLM объяснений для студентов группы риска
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+
+from app.core.config import get_settings
+from app.core.rate_limit import RateLimiter
+from app.data.db_data import get_students
+from app.data.explanations import features_hash, get_explanation_index, save_explanation
+from app.models.llm_service import LLMExplainer, PROMPT_VERSION
+from app.models.ml_model import ChurnPredictor
+
+
+def pregenerate_explanations(
+    risk_levels: Optional[Iterable[str]] = None,
+    force: bool = False,
+    predictor: Optional[ChurnPredictor] = None,
+    llm: Optional[LLMExplainer] = None,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict:
+    """
+    Сгенерировать и сохранить объяснения для студентов, у которых
+    изменился уровень риска или фичи с момента последней генерации
+
+    Args:
+        risk_levels: Какие уровни риска обрабатывать (по умолчанию PREGEN_RISK_LEVELS)
+        force: Перегенерировать даже актуальные записи
+        predictor: ML модель (по умолчанию загружается из MODEL_PATH)
+        llm: LLM клиент (по умолчанию с лимитами PREGEN_* из настроек)
+        progress: Колбэк progress(done, total)
+
+    Returns:
+        Сводка: сколько студентов проверено, сгенерировано, пропущено и с ошибками
+    """
+    settings = get_settings()
+    risk_levels = set(risk_levels or settings.PREGEN_RISK_LEVELS)
+    predictor = predictor or ChurnPredictor(model_path=settings.MODEL_PATH)
+    llm = llm or LLMExplainer(
+        rate_limiter=RateLimiter(
+            requests_per_minute=settings.PREGEN_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.PREGEN_TOKENS_PER_MINUTE
+        )
+    )
+
+    students = get_students()
+    stored = get_explanation_index()
+
+    # 1. Отбираем студентов, для которых нужна генерация
+    pending = []
+    for student in students:
+        features = student.features.model_dump()
+        risk_level, _, importance = predictor.predict(features)
+        if risk_level not in risk_levels:
+            continue
+
+        key = (risk_level, features_hash(features), llm.model, PROMPT_VERSION)
+        if not force and stored.get(student.id) == key:
+            continue
+
+        pending.append((student.id, features, risk_level, importance, key[1]))
+
+    summary = {
+        "checked": len(students),
+        "pending": len(pending),
+        "generated": 0,
+        "failed": 0,
+        "skipped": len(students) - len(pending)
+    }
+    if progress:
+        progress(0, len(pending))
+
+    # 2. Генерируем с ограниченным параллелизмом (лимиты RPM/TPM - в llm.rate_limiter)
+    def generate(item):
+        student_id, features, risk_level, importance, feature_hash = item
+        explanation = _with_retry(
+            lambda: llm.generate_explanation(features, risk_level, importance, strict=True),
+            settings.PREGEN_MAX_RETRIES,
+            settings.PREGEN_BACKOFF_SECONDS
+        )
+        recommendation = _with_retry(
+            lambda: llm.generate_recommendations(features, risk_level, strict=True),
+            settings.PREGEN_MAX_RETRIES,
+            settings.PREGEN_BACKOFF_SECONDS
+        )
+        save_explanation(
+            student_id, risk_level, feature_hash,
+            explanation, recommendation, llm.model, PROMPT_VERSION
+        )
+
+    with ThreadPoolExecutor(max_workers=settings.PREGEN_CONCURRENCY) as pool:
+        futures = {pool.submit(generate, item): item[0] for item in pending}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    future.result()
+                    summary["generated"] += 1
+                except Exception as e:
+                    summary["failed"] += 1
+                    print(f"⚠️  Студент {futures[future]}: {e}")
+                if progress:
+                    progress(done, len(pending))
+        except BaseException:
+            # Исключение из progress (отмена задачи): не ждем оставшиеся генерации
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return summary
+
+
+def _with_retry(func: Callable, max_retries: int, backoff_seconds: float):
+    """Повторить вызов с экспоненциальной задержкой и джиттером"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception:
+            if attempt == max_retries:
+                raise
+            delay = backoff_seconds * (2 ** attempt)
+            time.sleep(delay + random.uniform(0, delay / 2))
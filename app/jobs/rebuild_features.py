@@ -0,0 +1,52 @@
+"""
+Пересборка обучающего CSV с 6 фичами из SQL дампа Softclub (parse_softclub_sql.py)
+"""
+import os
+from typing import Callable, Dict, Optional
+
+DUMP_TABLES = ("Students", "ProgressBooks", "StudentGroups")
+
+
+def rebuild_features(
+    dump_path: str,
+    output_path: str,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict:
+    """
+    Разобрать таблицы дампа, посчитать фичи и записать CSV
+
+    Файл пишется во временный и переименовывается в конце, поэтому
+    обучение не увидит недописанный CSV.
+
+    Args:
+        dump_path: Путь к softclub.sql
+        output_path: Куда сохранить CSV
+        progress: Колбэк progress(done, total) по этапам (3 таблицы + фичи)
+
+    Returns:
+        Сводка: путь, количество студентов и ушедших
+    """
+    from parse_softclub_sql import calculate_features, parse_copy_data
+
+    total = len(DUMP_TABLES) + 1
+    tables = []
+    for done, table_name in enumerate(DUMP_TABLES):
+        if progress:
+            progress(done, total)
+        tables.append(parse_copy_data(dump_path, table_name))
+
+    if progress:
+        progress(len(DUMP_TABLES), total)
+    features_df = calculate_features(*tables)
+
+    tmp_path = f"{output_path}.tmp"
+    features_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    if progress:
+        progress(total, total)
+
+    return {
+        "output": output_path,
+        "students": len(features_df),
+        "churned": int((features_df["churned"] == 1).sum())
+    }
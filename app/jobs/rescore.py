@@ -0,0 +1,175 @@
+"""
+Пересчет сохраненных оценок риска (student_scores) для всех студентов
+
+Пересчет - запуск в rescore_runs, поделенный на порции по id студентов
+(app/data/rescore_queue.py). Порции считают воркеры: процесс, создавший
+запуск, его дочерние процессы и rescore_worker.py на любых узлах с доступом
+к БД. Оценки пишутся идемпотентным upsert, поэтому повторный счет порции
+после истечения аренды безопасен.
+"""
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.data.db_data import get_student_columns_range
+from app.data.jobs import current_owner
+from app.data.rescore_queue import (
+    cancel_rescore_run,
+    claim_rescore_chunk,
+    complete_rescore_chunk,
+    create_rescore_run,
+    finish_rescore_run,
+    get_rescore_run,
+)
+from app.data.scores import upsert_student_scores
+from app.models.ml_model import ChurnPredictor
+
+logger = logging.getLogger(__name__)
+
+
+def rescore_students(
+    predictor: Optional[ChurnPredictor] = None,
+    chunk_size: int = 1000,
+    workers: int = 1,
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict:
+    """
+    Оценить всех студентов порциями и сохранить оценки в student_scores
+
+    Args:
+        predictor: ML модель (по умолчанию загружается из MODEL_PATH)
+        chunk_size: Размер порции (студентов)
+        workers: Сколько локальных процессов считают порции (включая текущий);
+            к запуску также могут подключиться rescore_worker.py на других узлах
+        progress: Колбэк progress(scored) - оценено студентов во всем запуске
+
+    Returns:
+        Сводка: версия модели, ID запуска, количество порций и оцененных студентов
+    """
+    settings = get_settings()
+    predictor = predictor or ChurnPredictor(model_path=settings.MODEL_PATH)
+    run = create_rescore_run(predictor.model_version, chunk_size)
+
+    pool = None
+    helpers = []
+    try:
+        if workers > 1:
+            # spawn: модель и соединения БД не наследуются от родителя
+            pool = ProcessPoolExecutor(max_workers=workers - 1, mp_context=multiprocessing.get_context("spawn"))
+            helpers = [pool.submit(run_rescore_worker, run["id"]) for _ in range(workers - 1)]
+
+        run_rescore_worker(run["id"], predictor=predictor, progress=progress)
+
+        for helper in helpers:
+            try:
+                helper.result()
+            except Exception as e:
+                # Порции упавшего помощника досчитаны после истечения аренды
+                logger.warning("Воркер пересчета завершился ошибкой: %s", e)
+    except BaseException:
+        cancel_rescore_run(run["id"])
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    run = get_rescore_run(run["id"])
+    return {
+        "model_version": predictor.model_version,
+        "run_id": run["id"],
+        "chunks": run["chunks"]["done"],
+        "scored": run["scored"]
+    }
+
+
+def run_rescore_worker(
+    run_id: int,
+    predictor: Optional[ChurnPredictor] = None,
+    lease_seconds: Optional[float] = None,
+    poll_seconds: Optional[float] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict:
+    """
+    Захватывать и считать порции запуска, пока он не завершен
+
+    Когда свободных порций нет, но часть арендована другими воркерами, воркер
+    ждет: либо они закончат, либо истечет аренда упавшего, и порцию заберет он.
+
+    Args:
+        run_id: ID запуска
+        predictor: ML модель (по умолчанию загружается из MODEL_PATH)
+        lease_seconds: Аренда порции (по умолчанию RESCORE_LEASE_SECONDS)
+        poll_seconds: Пауза при отсутствии свободных порций (RESCORE_POLL_SECONDS)
+        progress: Колбэк progress(scored) - оценено студентов во всем запуске
+
+    Returns:
+        Сводка этого воркера: сколько порций и студентов он посчитал
+
+    Raises:
+        ValueError: Модель воркера не совпадает с моделью запуска
+    """
+    settings = get_settings()
+    predictor = predictor or ChurnPredictor(model_path=settings.MODEL_PATH)
+    lease_seconds = lease_seconds or settings.RESCORE_LEASE_SECONDS
+    poll_seconds = poll_seconds or settings.RESCORE_POLL_SECONDS
+    owner = current_owner()
+
+    run = get_rescore_run(run_id)
+    if run["model_version"] != predictor.model_version:
+        raise ValueError(
+            f"Модель воркера {predictor.model_version} не совпадает с моделью запуска {run['model_version']}"
+        )
+
+    summary = {"run_id": run_id, "chunks": 0, "scored": 0}
+    while True:
+        chunk = claim_rescore_chunk(run_id, owner, lease_seconds)
+        if chunk is None:
+            if finish_rescore_run(run_id) or get_rescore_run(run_id)["status"] != "running":
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        scored = _score_chunk(predictor, chunk, run["scored_at"])
+        if not complete_rescore_chunk(chunk["id"], owner, scored):
+            logger.warning("Аренда порции %s истекла до завершения", chunk["id"])
+        summary["chunks"] += 1
+        summary["scored"] += scored
+        if progress:
+            progress(get_rescore_run(run_id)["scored"])
+
+    return summary
+
+
+def _score_chunk(predictor: ChurnPredictor, chunk: Dict, scored_at) -> int:
+    """Оценить студентов порции одним пакетным вызовом модели и записать оценки"""
+    columns = get_student_columns_range(chunk["id_from"], chunk["id_to"])
+    if not columns["id"]:
+        return 0
+
+    probabilities, risk_levels, confidences = predictor.predict_batch(
+        predictor.matrix_from_columns(columns)
+    )
+    upsert_student_scores(
+        [
+            {
+                "student_id": student_id,
+                "course": course,
+                "churn_probability": probability,
+                "risk_level": risk_level,
+                "confidence": confidence
+            }
+            for student_id, course, probability, risk_level, confidence in zip(
+                columns["id"],
+                columns["course"],
+                probabilities.tolist(),
+                risk_levels.tolist(),
+                confidences.tolist()
+            )
+        ],
+        predictor.model_version,
+        scored_at
+    )
+    return len(columns["id"])
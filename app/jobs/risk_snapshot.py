@@ -0,0 +1,92 @@
+"""
+Ежедневный снимок риска: изменения по студентам и агрегаты по уровням и курсам
+"""
+import datetime
+from collections import Counter
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+from app.data.db_data import get_student_columns
+from app.data.risk_history import get_risk_state, save_risk_snapshot
+from app.db.database import SessionLocal
+from app.models.ml_model import ChurnPredictor
+
+
+def take_risk_snapshot(
+    snapshot_date: Optional[datetime.date] = None,
+    predictor: Optional[ChurnPredictor] = None,
+    min_delta: Optional[float] = None
+) -> Dict:
+    """
+    Оценить всех студентов и записать снимок за дату
+
+    В журнал risk_snapshots попадают только студенты, у которых с прошлого
+    снимка изменился уровень риска или курс, вероятность сдвинулась больше
+    чем на min_delta, а также новые и удаленные студенты. Дневные агрегаты
+    (risk_daily_rollups) пишутся полностью.
+
+    Args:
+        snapshot_date: Дата снимка (по умолчанию сегодня)
+        predictor: ML модель (по умолчанию загружается из MODEL_PATH)
+        min_delta: Порог изменения вероятности (по умолчанию RISK_SNAPSHOT_MIN_DELTA)
+
+    Returns:
+        Сводка: дата, количество студентов, изменившихся и удаленных
+    """
+    settings = get_settings()
+    snapshot_date = snapshot_date or datetime.date.today()
+    min_delta = settings.RISK_SNAPSHOT_MIN_DELTA if min_delta is None else min_delta
+    predictor = predictor or ChurnPredictor(model_path=settings.MODEL_PATH)
+
+    db = SessionLocal()
+    try:
+        columns = get_student_columns(db)
+        probabilities, risk_levels, _ = predictor.predict_batch(
+            predictor.matrix_from_columns(columns)
+        )
+        previous = get_risk_state(snapshot_date, db)
+
+        changes = []
+        for student_id, course, probability, risk_level in zip(
+            columns["id"], columns["course"], probabilities.tolist(), risk_levels.tolist()
+        ):
+            probability = round(probability, 4)
+            before = previous.pop(student_id, None)
+            if (
+                before is not None
+                and before[0] == course
+                and before[1] == risk_level
+                and abs(before[2] - probability) <= min_delta
+            ):
+                continue
+            changes.append({
+                "student_id": student_id,
+                "course": course,
+                "risk_level": risk_level,
+                "churn_probability": probability
+            })
+
+        # Оставшиеся в previous студенты исчезли из базы
+        removed = [
+            {"student_id": student_id, "course": state[0], "risk_level": None, "churn_probability": None}
+            for student_id, state in previous.items()
+            if state[1] is not None
+        ]
+
+        rollups = [
+            {"course": course, "risk_level": risk_level, "students": count}
+            for (course, risk_level), count in Counter(
+                zip(columns["course"], risk_levels.tolist())
+            ).items()
+        ]
+
+        save_risk_snapshot(snapshot_date, changes + removed, rollups, db)
+    finally:
+        db.close()
+
+    return {
+        "date": snapshot_date.isoformat(),
+        "students": len(columns["id"]),
+        "changed": len(changes),
+        "removed": len(removed)
+    }
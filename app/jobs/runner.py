@@ -0,0 +1,200 @@
+"""
+Выполнение фоновых задач (POST /api/jobs)
+
+Задача выполняется в процессе API, который ее принял: pregenerate (ждет
+Groq) - в пуле потоков, CPU-задачи rescore и rebuild_features - в пуле
+дочерних процессов, чтобы не занимать GIL обработчиков запросов. Прогресс,
+результат и отмена идут через таблицу jobs (app/data/jobs.py), поэтому
+одинаково работают из потока и из дочернего процесса.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.data.jobs import fail_orphaned_jobs, finish_job, heartbeat_jobs, start_job, update_job_progress
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Отмена задачи через DELETE /api/jobs/{id}"""
+
+
+class JobProgress:
+    """
+    Колбэк прогресса задачи: пишет в jobs не чаще interval секунд
+    (и всегда на последнем шаге) и прерывает задачу, если запрошена отмена
+    """
+
+    def __init__(self, job_id: int, interval: float):
+        self.job_id = job_id
+        self.interval = interval
+        self._last_write = 0.0
+
+    def __call__(self, done: int, total: Optional[int] = None) -> None:
+        now = time.monotonic()
+        if done != total and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        if update_job_progress(self.job_id, done, total):
+            raise JobCancelled()
+
+
+def _run_pregenerate(params: Dict, progress: JobProgress) -> Dict:
+    from app.jobs.pregenerate import pregenerate_explanations
+    from app.models.registry import get_predictor
+
+    return pregenerate_explanations(
+        risk_levels=params.get("risk_levels"),
+        force=params.get("force", False),
+        predictor=get_predictor(),
+        progress=progress
+    )
+
+
+def _run_rescore(params: Dict, progress: JobProgress) -> Dict:
+    from app.data.db_data import get_roster_version
+    from app.jobs.rescore import rescore_students
+
+    # Модель загружается заново из MODEL_PATH: задача после замены модели считает новой
+    _, total = get_roster_version()
+    return rescore_students(
+        chunk_size=params.get("chunk_size", 1000),
+        workers=params.get("workers", 1),
+        progress=lambda scored: progress(scored, total)
+    )
+
+
+def _run_rebuild_features(params: Dict, progress: JobProgress) -> Dict:
+    from app.jobs.rebuild_features import rebuild_features
+
+    settings = get_settings()
+    return rebuild_features(settings.FEATURES_DUMP_PATH, settings.FEATURES_OUTPUT_PATH, progress)
+
+
+# kind -> (функция задачи, выполнять в дочернем процессе)
+JOB_KINDS: Dict[str, tuple] = {
+    "pregenerate": (_run_pregenerate, False),
+    "rescore": (_run_rescore, True),
+    "rebuild_features": (_run_rebuild_features, True),
+}
+
+
+def run_job(job_id: int, kind: str, params: Dict) -> None:
+    """Выполнить задачу и записать итог в jobs (в потоке или дочернем процессе)"""
+    if not start_job(job_id):
+        # Отменена, пока ждала в очереди
+        return
+
+    func: Callable = JOB_KINDS[kind][0]
+    progress = JobProgress(job_id, get_settings().JOBS_PROGRESS_INTERVAL_SECONDS)
+    started = time.perf_counter()
+    try:
+        result = func(params, progress)
+    except JobCancelled:
+        finish_job(job_id, "cancelled")
+        logger.info("Задача %s (%s) отменена", job_id, kind)
+    except Exception as e:
+        logger.exception("Задача %s (%s) завершилась ошибкой", job_id, kind)
+        finish_job(job_id, "failed", error=str(e) or type(e).__name__)
+    else:
+        finish_job(job_id, "succeeded", result=result)
+        logger.info("Задача %s (%s) выполнена за %.1f с", job_id, kind, time.perf_counter() - started)
+
+
+class JobRunner:
+    """Пулы потоков и процессов для задач одного процесса API"""
+
+    def __init__(self, thread_workers: int, process_workers: int):
+        self.process_workers = process_workers
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="job")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Dict) -> None:
+        """Поставить задачу (словарь из create_job) в подходящий пул"""
+        in_process = JOB_KINDS[job["kind"]][1] and self.process_workers > 0
+        executor = self._process_pool() if in_process else self._threads
+        future = executor.submit(run_job, job["id"], job["kind"], job["params"])
+        future.add_done_callback(lambda f, job_id=job["id"]: self._on_done(job_id, f))
+
+    def shutdown(self) -> None:
+        """Остановить пулы, не дожидаясь задач (незавершенные станут failed при следующем старте)"""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if self._processes is not None:
+                self._processes.shutdown(wait=False, cancel_futures=True)
+                self._processes = None
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                # spawn: fork процесса с потоками uvicorn/anyio небезопасен
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+
+    def _on_done(self, job_id: int, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            return
+        # Упал сам пул (например, дочерний процесс убит OOM killer): run_job не записал итог
+        logger.error("Задача %s: %r", job_id, error)
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._processes = None
+        try:
+            finish_job(job_id, "failed", error=str(error) or type(error).__name__)
+        except Exception:
+            logger.exception("Не удалось записать итог задачи %s", job_id)
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Пулы задач процесса (создаются при первой задаче)"""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                settings = get_settings()
+                _runner = JobRunner(settings.JOBS_THREAD_WORKERS, settings.JOBS_PROCESS_WORKERS)
+    return _runner
+
+
+def shutdown_job_runner() -> None:
+    global _runner
+    with _runner_lock:
+        if _runner is not None:
+            _runner.shutdown()
+            _runner = None
+
+
+async def run_job_heartbeat(interval: float, timeout: float) -> None:
+    """
+    Фоновый цикл процесса API: продлевать heartbeat своих задач и помечать
+    failed задачи процессов, которые перестали его продлевать
+    """
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        try:
+            await run_in_threadpool(heartbeat_jobs)
+            orphaned = await run_in_threadpool(fail_orphaned_jobs, timeout)
+            if orphaned:
+                logger.warning("Задач от остановленных процессов: %d (помечены failed)", orphaned)
+        except Exception:
+            logger.exception("Не удалось обновить heartbeat задач")
+        await asyncio.sleep(interval)
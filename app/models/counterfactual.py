@@ -0,0 +1,206 @@
+"""
+What-if анализ: минимальные изменения фич, снижающие уровень риска студента
+"""
+import itertools
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models.ml_model import (
+    ChurnPredictor,
+    HIGH_RISK_THRESHOLD,
+    MEDIUM_RISK_THRESHOLD,
+)
+
+# Грубая сетка изменений, на которые реально может повлиять ментор
+# (days_enrolled не меняется). Для missed_classes_streak None = "сбросить серию до 0".
+STEP_GRID = {
+    'attendance_rate': [0, 10, 20, 30, 40],
+    'homework_completion': [0, 10, 20, 30, 40],
+    'test_avg_score': [0, 10, 20, 30],
+    'communication_activity': [0, 2, 5, 10],
+    'missed_classes_streak': [0, -2, -5, None],
+}
+
+# Уточнение: для REFINE_TOP самых дешевых найденных сценариев пробуем
+# уменьшить каждое изменение до этих долей
+REFINE_TOP = 10
+REFINE_FRACTIONS = (0.5, 0.75, 1.0)
+
+# "Цена" единицы изменения: сколько усилий стоит +1 пункт / +1 контакт / -1 пропуск
+COST_PER_UNIT = {
+    'attendance_rate': 0.10,
+    'homework_completion': 0.10,
+    'test_avg_score': 0.12,
+    'communication_activity': 0.15,
+    'missed_classes_streak': 0.20,
+}
+
+# Верхние границы и целочисленные фичи (как в StudentFeatures)
+UPPER_BOUNDS = {
+    'attendance_rate': 100.0,
+    'homework_completion': 100.0,
+    'test_avg_score': 100.0,
+}
+INTEGER_FEATURES = {'communication_activity', 'days_enrolled', 'missed_classes_streak'}
+
+# Порог вероятности, ниже которого студент попадает в целевой уровень
+TARGET_THRESHOLDS = {
+    'Medium': HIGH_RISK_THRESHOLD,
+    'Low': MEDIUM_RISK_THRESHOLD,
+}
+
+RISK_ORDER = ['Low', 'Medium', 'High']
+
+
+class CounterfactualSearch:
+    """
+    Направленный поиск изменений фич: грубая сетка одним пакетным вызовом
+    модели, затем уточнение вокруг самых дешевых найденных сценариев
+    """
+
+    def __init__(self, predictor: ChurnPredictor):
+        self.predictor = predictor
+        self.feature_names = predictor.feature_names
+        self._deltas = self._build_delta_grid()
+
+    def search(
+        self,
+        features: Dict,
+        target_risk_level: Optional[str] = None,
+        limit: int = 5
+    ) -> Dict:
+        """
+        Найти самые дешевые изменения, переводящие студента в целевой уровень риска
+
+        Args:
+            features: Текущие фичи студента
+            target_risk_level: Целевой уровень (по умолчанию на один ниже текущего)
+            limit: Сколько сценариев вернуть
+
+        Returns:
+            Словарь с текущим риском, целевым уровнем и списком сценариев
+        """
+        x = np.array([features[name] for name in self.feature_names], dtype=np.float64)
+        current_probability, current_level, _ = self.predictor.predict_batch(x)
+        current_probability = float(current_probability[0])
+        current_level = current_level[0]
+
+        if target_risk_level is None:
+            index = RISK_ORDER.index(current_level)
+            target_risk_level = RISK_ORDER[index - 1] if index > 0 else None
+
+        result = {
+            "current_risk_level": current_level,
+            "current_probability": round(current_probability, 4),
+            "target_risk_level": target_risk_level,
+            "candidates_evaluated": 0,
+            "scenarios": []
+        }
+        if target_risk_level is None or RISK_ORDER.index(target_risk_level) >= RISK_ORDER.index(current_level):
+            return result
+
+        threshold = TARGET_THRESHOLDS[target_risk_level]
+
+        # 1. Грубая сетка
+        candidates = self._clip(np.where(
+            np.isnan(self._deltas), 0.0, x + np.nan_to_num(self._deltas)
+        ))
+        probabilities, risk_levels, _ = self.predictor.predict_batch(candidates)
+        crossing = probabilities < threshold
+        evaluated = len(candidates)
+
+        # 2. Уточнение: пробуем меньшие изменения для самых дешевых сценариев
+        if crossing.any():
+            coarse_costs = np.abs(candidates[crossing] - x) @ self._cost_vector()
+            best = candidates[crossing][np.argsort(coarse_costs)[:REFINE_TOP]]
+            refined = self._refine(x, best)
+            refined_probabilities, refined_levels, _ = self.predictor.predict_batch(refined)
+            evaluated += len(refined)
+
+            candidates = np.vstack([candidates[crossing], refined])
+            probabilities = np.concatenate([probabilities[crossing], refined_probabilities])
+            risk_levels = np.concatenate([risk_levels[crossing], refined_levels])
+            crossing = probabilities < threshold
+
+        result["candidates_evaluated"] = evaluated
+        if not crossing.any():
+            return result
+
+        candidates = candidates[crossing]
+        probabilities = probabilities[crossing]
+        risk_levels = risk_levels[crossing]
+        abs_changes = np.abs(candidates - x)
+        costs = abs_changes @ self._cost_vector()
+        order = np.lexsort((probabilities, costs))
+
+        result["scenarios"] = [
+            self._scenario(x, candidates[i], probabilities[i], risk_levels[i], costs[i])
+            for i in self._minimal(abs_changes, order, limit)
+        ]
+        return result
+
+    def _build_delta_grid(self) -> np.ndarray:
+        """Все комбинации шагов из STEP_GRID как матрица дельт (n, 6)"""
+        steps = [STEP_GRID.get(name, [0]) for name in self.feature_names]
+        return np.array(
+            [[np.nan if step is None else step for step in combo]
+             for combo in itertools.product(*steps)],
+            dtype=np.float64
+        )
+
+    def _refine(self, x: np.ndarray, best: np.ndarray) -> np.ndarray:
+        """Варианты лучших сценариев, где каждое изменение уменьшено до REFINE_FRACTIONS"""
+        fractions = np.array(REFINE_FRACTIONS)
+        refined = []
+        for candidate in best:
+            delta = candidate - x
+            options = [
+                delta[i] * fractions if delta[i] != 0 else np.zeros(1)
+                for i in range(len(delta))
+            ]
+            refined.append(x + np.array(list(itertools.product(*options))))
+        return np.unique(self._clip(np.vstack(refined)), axis=0)
+
+    def _clip(self, candidates: np.ndarray) -> np.ndarray:
+        """Обрезать кандидатов по границам фич и округлить целочисленные фичи"""
+        candidates = np.maximum(candidates, 0.0)
+        for i, name in enumerate(self.feature_names):
+            if name in UPPER_BOUNDS:
+                candidates[:, i] = np.minimum(candidates[:, i], UPPER_BOUNDS[name])
+            if name in INTEGER_FEATURES:
+                candidates[:, i] = np.round(candidates[:, i])
+        return candidates
+
+    def _cost_vector(self) -> np.ndarray:
+        return np.array([COST_PER_UNIT.get(name, 0.0) for name in self.feature_names])
+
+    @staticmethod
+    def _minimal(abs_changes: np.ndarray, order: np.ndarray, limit: int) -> List[int]:
+        """Отобрать дешевые сценарии, отбрасывая те, что лишь добавляют изменений к уже выбранным"""
+        chosen: List[int] = []
+        for i in order:
+            if any(np.all(abs_changes[i] >= abs_changes[j]) for j in chosen):
+                continue
+            chosen.append(int(i))
+            if len(chosen) >= limit:
+                break
+        return chosen
+
+    def _scenario(self, x, candidate, probability, risk_level, cost) -> Dict:
+        changes = [
+            {
+                "feature": name,
+                "from_value": float(x[i]),
+                "to_value": float(candidate[i]),
+                "delta": round(float(candidate[i] - x[i]), 2)
+            }
+            for i, name in enumerate(self.feature_names)
+            if candidate[i] != x[i]
+        ]
+        return {
+            "changes": changes,
+            "churn_probability": round(float(probability), 4),
+            "risk_level": risk_level,
+            "cost": round(float(cost), 2)
+        }
@@ -0,0 +1,188 @@
+"""
+Персистентный кэш ответов LLM (SQLite) с TTL и вытеснением по размеру
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+
+
+class LLMResponseCache:
+    """
+    Дисковый кэш ответов LLMExplainer.
+
+    Ключ строится из версии промпта, имени модели, уровня риска и шести фич,
+    округленных до настраиваемых корзин. Поэтому повторные просмотры одного
+    студента и почти одинаковые студенты не тратят вызовы API.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: int,
+        max_entries: int,
+        buckets: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            path: Путь к файлу SQLite (":memory:" для кэша в памяти)
+            ttl_seconds: Время жизни записи в секундах
+            max_entries: Максимальное количество записей (старые вытесняются)
+            buckets: Шаг округления для каждой фичи
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.buckets = buckets or {}
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)"
+        )
+
+    def make_key(
+        self,
+        kind: str,
+        prompt_version: str,
+        model: str,
+        risk_level: str,
+        features: Dict
+    ) -> str:
+        """Построить ключ кэша из версии промпта, модели, риска и округленных фич"""
+        bucketed = {
+            name: self._bucket(name, value)
+            for name, value in sorted(features.items())
+        }
+        payload = json.dumps(
+            [kind, prompt_version, model, risk_level, bucketed],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Вернуть значение из кэша или None (просроченные записи удаляются)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, tokens, created_at FROM llm_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, tokens, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                (now, key)
+            )
+            self.hits += 1
+            self.saved_tokens += tokens
+
+        return json.loads(value)
+
+    def set(self, key: str, kind: str, value: Any, tokens: int = 0) -> None:
+        """Сохранить ответ LLM и вытеснить самые старые записи при переполнении"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, kind, value, tokens, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value, ensure_ascii=False), tokens, now, now)
+            )
+            self._evict()
+
+    def clear(self) -> None:
+        """Очистить кэш и сбросить статистику"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self.hits = 0
+            self.misses = 0
+            self.saved_tokens = 0
+
+    def stats(self) -> Dict:
+        """Статистика кэша: hit rate и сэкономленные токены"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups > 0 else 0.0,
+                "saved_tokens": self.saved_tokens
+            }
+
+    def _bucket(self, name: str, value: Any) -> Any:
+        """Округлить значение фичи до шага корзины"""
+        step = self.buckets.get(name)
+        if not step or not isinstance(value, (int, float)):
+            return value
+        return round(round(value / step) * step, 6)
+
+    def _evict(self) -> None:
+        """Удалить просроченные записи и самые давно использованные сверх лимита"""
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Общий экземпляр кэша (None если кэш отключен в настройках)"""
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache(
+        path=settings.LLM_CACHE_PATH,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        buckets=settings.LLM_CACHE_BUCKETS
+    )
@@ -1,21 +1,42 @@
 """
 LLM сервис для генерации объяснений и рекомендаций
 """
-from groq import Groq
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Tuple
 import json
+import time
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS, LLM_CALLS, LLM_TOKENS, STAGE_DURATION, stage
+from app.core.tracing import record_span, span
+from app.core.rate_limit import RateLimiter
+from app.models.llm_cache import LLMResponseCache, get_llm_cache
+from app.models.local_explainer import LocalExplainer
+
+# Версия шаблонов промптов: увеличить при изменении текста промптов,
+# чтобы старые ответы в кэше перестали использоваться
+PROMPT_VERSION = "v1"
+
+
+class LLMUnavailableError(RuntimeError):
+    """LLM временно недоступен (circuit breaker разомкнут)"""
 
 
 class LLMExplainer:
     """Сервис для генерации AI-объяснений и рекомендаций"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         """
         Инициализация LLM клиента (Groq)
         
         Args:
             api_key: Groq API ключ (если None, берется из настроек)
+            cache: Кэш ответов (если None, используется общий из настроек)
+            rate_limiter: Ограничитель RPM/TPM (для пакетной генерации)
         """
         settings = get_settings()
         self.api_key = api_key or settings.GROQ_API_KEY
@@ -27,13 +48,30 @@ class LLMExplainer:
                 "Создайте .env файл и добавьте GROQ_API_KEY=your-key"
             )
         
-        self.client = Groq(api_key=self.api_key)
+        # groq (и httpx) импортируются при создании клиента, а не при импорте приложения
+        from groq import Groq
+        
+        # Короткий таймаут без скрытых ретраев: при сбое сразу уходим в fallback
+        self.client = Groq(
+            api_key=self.api_key,
+            base_url=settings.GROQ_BASE_URL or None,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES
+        )
+        self.cache = cache if cache is not None else get_llm_cache()
+        self.rate_limiter = rate_limiter
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS
+        )
+        self.fallback = LocalExplainer()
     
     def generate_explanation(
         self, 
         student_data: Dict, 
         risk_level: str,
-        feature_importance: Dict[str, float]
+        feature_importance: Dict[str, float],
+        strict: bool = False
     ) -> str:
         """
         Генерирует объяснение причин риска на русском языке
@@ -42,22 +80,130 @@ class LLMExplainer:
             student_data: Данные студента (фичи)
             risk_level: Уровень риска (Low/Medium/High)
             feature_importance: Важность каждой фичи
+            strict: Пробрасывать ошибки LLM вместо локального fallback
             
         Returns:
             Текстовое объяснение на русском
         """
+        cache_key = self._cache_key("explanation", student_data, risk_level)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = self._build_explanation_prompt(student_data, risk_level, feature_importance)
+
+        try:
+            content, tokens = self._complete("explanation", prompt, temperature=0.3, max_tokens=200)
+        except Exception:
+            if strict:
+                raise
+            LLM_CALLS.inc("explanation", "fallback")
+            return self.fallback.generate_explanation(student_data, risk_level, feature_importance)
+        
+        explanation = content.strip()
+        self._cache_set(cache_key, "explanation", explanation, tokens)
+        return explanation
+    
+    def stream_explanation(
+        self,
+        student_data: Dict,
+        risk_level: str,
+        feature_importance: Dict[str, float]
+    ) -> Iterator[str]:
+        """
+        Потоковая версия generate_explanation: отдает текст по мере генерации
+        
+        Args:
+            student_data: Данные студента (фичи)
+            risk_level: Уровень риска (Low/Medium/High)
+            feature_importance: Важность каждой фичи
+            
+        Yields:
+            Фрагменты текста объяснения (из кэша - одним фрагментом)
+        """
+        cache_key = self._cache_key("explanation", student_data, risk_level)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.breaker.allow():
+            LLM_CALLS.inc("explanation_stream", "breaker_open")
+            yield self.fallback.generate_explanation(student_data, risk_level, feature_importance)
+            return
+        
+        prompt = self._build_explanation_prompt(student_data, risk_level, feature_importance)
+        parts = []
+        tokens = 0
+        start = time.perf_counter()
+        stream = None
+        finished = False
+        
+        try:
+            try:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=200,
+                    stream=True
+                )
+                for chunk in stream:
+                    # Groq присылает usage в последнем чанке (x_groq.usage)
+                    usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                    if usage is not None:
+                        tokens = usage.total_tokens
+                    
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                finished = True
+                self.breaker.record_failure()
+                LLM_CALLS.inc("explanation_stream", "error")
+                if not parts:
+                    yield self.fallback.generate_explanation(student_data, risk_level, feature_importance)
+                return
+            finished = True
+        finally:
+            if not finished:
+                # Клиент отключился (GeneratorExit): ответ неполный, в кэш не пишем,
+                # но пробный вызов half-open нужно отпустить, иначе цепь не замкнется
+                self.breaker.release_probe()
+                LLM_CALLS.inc("explanation_stream", "cancelled")
+                if stream is not None:
+                    stream.close()
+        
+        self.breaker.record_success()
+        # Генератор возобновляется в разных потоках: спан пишем готовым, без contextvar
+        record_span("llm.explanation_stream", start, time.perf_counter(), model=self.model, tokens=tokens)
+        STAGE_DURATION.observe(time.perf_counter() - start, "llm.explanation_stream")
+        LLM_CALLS.inc("explanation_stream", "ok")
+        LLM_TOKENS.inc("explanation_stream", value=tokens)
+        self._cache_set(cache_key, "explanation", "".join(parts).strip(), tokens)
+    
+    def _build_explanation_prompt(
+        self,
+        student_data: Dict,
+        risk_level: str,
+        feature_importance: Dict[str, float]
+    ) -> str:
+        """Собрать промпт для объяснения причин риска"""
         # Формируем топ-3 самых важных факторов
         top_factors = sorted(
-            feature_importance.items(), 
-            key=lambda x: x[1], 
+            feature_importance.items(),
+            key=lambda x: x[1],
             reverse=True
         )[:3]
-        
+
         factors_text = "\n".join([
             f"- {self._translate_feature(name)}: важность {importance:.0%}"
             for name, importance in top_factors
         ])
-        
+
         prompt = f"""You are an AI Analyst for the Softclub Educational CRM system. 
 Your task is to explain to an administrator why a student is at risk of dropping out.
 
@@ -77,22 +223,13 @@ Key Risk Factors (by importance):
 
 Write a brief explanation (max 3 sentences) in English explaining why this student has this risk level.
 Use specific numbers from the data. Write in simple language for an administrator."""
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Ошибка генерации объяснения: {str(e)}"
+        return prompt
     
     def generate_recommendations(
         self, 
         student_data: Dict,
-        risk_level: str
+        risk_level: str,
+        strict: bool = False
     ) -> Dict:
         """
         Генерирует рекомендацию по удержанию студента
@@ -100,6 +237,7 @@ Use specific numbers from the data. Write in simple language for an administrato
         Args:
             student_data: Данные студента
             risk_level: Уровень риска
+            strict: Пробрасывать ошибки LLM вместо локального fallback
             
         Returns:
             Словарь с рекомендацией:
@@ -110,6 +248,11 @@ Use specific numbers from the data. Write in simple language for an administrato
                 "urgency": "high/medium/low"
             }
         """
+        cache_key = self._cache_key("recommendation", student_data, risk_level)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""You are an AI Retention Advisor for Softclub IT Academy.
 Suggest ONE most effective action to retain the student.
 
@@ -142,31 +285,97 @@ Return ONLY valid JSON in format:
 Urgency must be: "high", "medium" or "low"."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+            content, tokens = self._complete(
+                "recommendation",
+                prompt,
                 response_format={"type": "json_object"},
                 temperature=0.5,
                 max_tokens=300
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Валидация и дефолтные значения
-            return {
+            recommendation = {
                 "action": result.get("action", "Mentor Call"),
                 "reason": result.get("reason", "Personal contact required"),
                 "success_probability": min(max(result.get("success_probability", 0.5), 0), 1),
                 "urgency": result.get("urgency", "medium")
             }
-        except Exception as e:
-            # Fallback рекомендация
-            return {
-                "action": "Mentor Call",
-                "reason": f"Default recommendation (LLM error: {str(e)})",
-                "success_probability": 0.60,
-                "urgency": "high" if risk_level == "High" else "medium"
-            }
+        except Exception:
+            if strict:
+                raise
+            LLM_CALLS.inc("recommendation", "fallback")
+            # Fallback рекомендация по правилам
+            return self.fallback.generate_recommendations(student_data, risk_level)
+        
+        self._cache_set(cache_key, "recommendation", recommendation, tokens)
+        return recommendation
+    
+    def _complete(self, kind: str, prompt: str, **kwargs) -> Tuple[str, int]:
+        """
+        Один вызов chat completion
+        
+        Args:
+            kind: Тип запроса для метрик (explanation / recommendation)
+            prompt: Текст промпта
+        
+        Returns:
+            (текст ответа, количество потраченных токенов)
+        """
+        if not self.breaker.allow():
+            LLM_CALLS.inc(kind, "breaker_open")
+            raise LLMUnavailableError("LLM временно недоступен (circuit breaker open)")
+        
+        # Грубая оценка: ~4 символа на токен промпта + лимит ответа
+        estimated_tokens = len(prompt) // 4 + kwargs.get("max_tokens", 0)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimated_tokens)
+        
+        try:
+            with stage(f"llm.{kind}"), span(f"llm.{kind}", model=self.model) as llm_span:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs
+                )
+                usage = getattr(response, "usage", None)
+                tokens = usage.total_tokens if usage is not None else 0
+                llm_span.set(tokens=tokens)
+        except Exception:
+            self.breaker.record_failure()
+            LLM_CALLS.inc(kind, "error")
+            if self.rate_limiter is not None:
+                # Ответа нет - зарезервированные токены возвращаются в бюджет TPM
+                self.rate_limiter.settle(estimated_tokens, 0)
+            raise
+        self.breaker.record_success()
+        LLM_CALLS.inc(kind, "ok")
+        LLM_TOKENS.inc(kind, value=tokens)
+        
+        if self.rate_limiter is not None:
+            # Без usage в ответе оставляем резерв по оценке
+            self.rate_limiter.settle(estimated_tokens, tokens or estimated_tokens)
+        return response.choices[0].message.content, tokens
+    
+    def _cache_key(self, kind: str, student_data: Dict, risk_level: str) -> Optional[str]:
+        """Ключ кэша для ответа (None если кэш отключен)"""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(kind, PROMPT_VERSION, self.model, risk_level, student_data)
+    
+    def _cache_get(self, cache_key: Optional[str]):
+        """Достать ответ из кэша"""
+        if cache_key is None:
+            return None
+        value = self.cache.get(cache_key)
+        CACHE_REQUESTS.inc("llm", "miss" if value is None else "hit")
+        return value
+    
+    def _cache_set(self, cache_key: Optional[str], kind: str, value, tokens: int) -> None:
+        """Сохранить успешный ответ LLM в кэш (fallback-ответы не кэшируются)"""
+        if cache_key is not None:
+            self.cache.set(cache_key, kind, value, tokens)
     
     def _translate_feature(self, feature_name: str) -> str:
         """Переводит название фичи на русский"""
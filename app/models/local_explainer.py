@@ -0,0 +1,128 @@
+"""
+Детерминированный шаблонный объяснитель риска (без LLM)
+
+Используется для студентов с низким риском, при таймауте Groq и
+при разомкнутом circuit breaker. Работает за микросекунды.
+"""
+from typing import Dict
+
+
+class LocalExplainer:
+    """Объяснения и рекомендации по шаблонам на основе 6 фич и уровня риска"""
+
+    # Человекочитаемое описание значения фичи
+    FEATURE_TEMPLATES = {
+        'attendance_rate': "attendance is {value:.1f}%",
+        'homework_completion': "homework completion is {value:.1f}%",
+        'test_avg_score': "the average test score is {value:.1f}",
+        'communication_activity': "communication activity is {value} interactions",
+        'days_enrolled': "the student has been enrolled for {value} days",
+        'missed_classes_streak': "the student has missed {value} classes in a row",
+    }
+
+    RISK_SUMMARY = {
+        'High': "This student is at high risk of dropping out.",
+        'Medium': "This student shows some warning signs and is at medium risk of dropping out.",
+        'Low': "This student is at low risk of dropping out.",
+    }
+
+    SUCCESS_PROBABILITY = {'High': 0.55, 'Medium': 0.65, 'Low': 0.85}
+
+    def generate_explanation(
+        self,
+        student_data: Dict,
+        risk_level: str,
+        feature_importance: Dict[str, float]
+    ) -> str:
+        """
+        Объяснение причин риска по шаблону (тот же интерфейс, что у LLMExplainer)
+
+        Args:
+            student_data: Данные студента (фичи)
+            risk_level: Уровень риска (Low/Medium/High)
+            feature_importance: Важность каждой фичи
+
+        Returns:
+            Текстовое объяснение (2-3 предложения)
+        """
+        top_factors = sorted(
+            feature_importance.items(),
+            key=lambda x: x[1],
+            reverse=True
+        )[:3]
+
+        facts = [
+            self.FEATURE_TEMPLATES[name].format(value=student_data[name])
+            for name, _ in top_factors
+            if name in self.FEATURE_TEMPLATES and name in student_data
+        ]
+
+        summary = self.RISK_SUMMARY.get(risk_level, f"Risk level: {risk_level}.")
+        if not facts:
+            return summary
+
+        if risk_level == 'Low':
+            detail = "Key indicators look stable: " + self._join(facts) + "."
+        else:
+            detail = "The main factors are that " + self._join(facts) + "."
+
+        advice = self._advice(student_data, risk_level)
+        return " ".join(part for part in (summary, detail, advice) if part)
+
+    def generate_recommendations(self, student_data: Dict, risk_level: str) -> Dict:
+        """
+        Рекомендация по удержанию по правилам (тот же формат, что у LLMExplainer)
+
+        Returns:
+            {"action", "reason", "success_probability", "urgency"}
+        """
+        attendance = student_data['attendance_rate']
+        homework = student_data['homework_completion']
+        test_score = student_data['test_avg_score']
+        streak = student_data['missed_classes_streak']
+        communication = student_data['communication_activity']
+
+        if risk_level == 'Low':
+            action = "Do Nothing"
+            reason = "Student metrics are stable; no intervention is needed right now."
+        elif streak >= 5:
+            action = "Mentor Call"
+            reason = f"The student has missed {streak} classes in a row; a personal call can find out why."
+        elif attendance < 60:
+            action = "Mentor Meeting"
+            reason = f"Attendance is only {attendance:.1f}%; a meeting can agree on a plan to return to classes."
+        elif homework < 60 or test_score < 60:
+            action = "Additional Support"
+            reason = (
+                f"Homework completion ({homework:.1f}%) or test score ({test_score:.1f}) is low; "
+                "extra help with materials can close the gap."
+            )
+        elif communication < 3:
+            action = "WhatsApp Reminder"
+            reason = "The student rarely communicates; a reminder keeps them engaged."
+        elif risk_level == 'High':
+            action = "Mentor Call"
+            reason = "High risk without a single dominant factor; personal contact is required."
+        else:
+            action = "WhatsApp Reminder"
+            reason = "Moderate risk; a light-touch reminder is enough for now."
+
+        return {
+            "action": action,
+            "reason": reason,
+            "success_probability": self.SUCCESS_PROBABILITY.get(risk_level, 0.5),
+            "urgency": {'High': "high", 'Medium': "medium"}.get(risk_level, "low")
+        }
+
+    def _advice(self, student_data: Dict, risk_level: str) -> str:
+        if risk_level == 'Low':
+            return ""
+        if student_data['missed_classes_streak'] >= 5:
+            return "The current streak of missed classes needs attention first."
+        return "Early contact can help prevent the student from falling further behind."
+
+    @staticmethod
+    def _join(items) -> str:
+        if len(items) == 1:
+            return items[0]
+        return ", ".join(items[:-1]) + " and " + items[-1]
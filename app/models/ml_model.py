@@ -1,7 +1,55 @@
 import numpy as np
-import xgboost as xgb
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Sequence
+import hashlib
+import logging
 import os
+import threading
+
+from app.core.metrics import timed
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Пороги вероятности отчисления для уровней риска (High Recall, 0.40 threshold)
+MEDIUM_RISK_THRESHOLD = 0.40
+HIGH_RISK_THRESHOLD = 0.70
+
+
+# (путь, размер, mtime) -> sha256 содержимого: файл перечитывается только после замены
+_file_versions: Dict[Tuple[str, int, int], str] = {}
+_file_versions_lock = threading.Lock()
+
+
+def model_file_version(model_path: str) -> str:
+    """
+    Версия файла модели: sha256 содержимого, без загрузки booster
+    
+    Одинакова для побайтно одинаковых копий модели на разных путях и узлах
+    (ETag за балансировщиком, воркеры распределенного пересчета). Хэш
+    кэшируется по размеру и времени изменения, поэтому повторная проверка -
+    один stat. Используется в ETag и ключах кэшей.
+    """
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return "missing"
+    key = (os.path.abspath(model_path), stat.st_size, stat.st_mtime_ns)
+    version = _file_versions.get(key)
+    if version is None:
+        digest = hashlib.sha256()
+        try:
+            with open(model_path, "rb") as model_file:
+                for block in iter(lambda: model_file.read(1 << 20), b""):
+                    digest.update(block)
+        except OSError:
+            return "missing"
+        version = digest.hexdigest()[:12]
+        with _file_versions_lock:
+            # Старые версии того же пути больше не понадобятся
+            for stale in [cached for cached in _file_versions if cached[0] == key[0]]:
+                del _file_versions[stale]
+            _file_versions[key] = version
+    return version
 
 
 class ChurnPredictor:
@@ -15,6 +63,8 @@ class ChurnPredictor:
             model_path: Путь к сохраненной модели (по умолчанию models/trained/churn_model.json)
         """
         self.model = None
+        self.model_version = None
+        self._readable_importance = None
         self.feature_names = [
             'attendance_rate',
             'homework_completion',
@@ -28,16 +78,21 @@ class ChurnPredictor:
         if model_path is None:
             model_path = 'models/trained/churn_model.json'
         
-        # Загружаем модель
+        # Загружаем модель (xgboost импортируется здесь: импорт модуля дешевый)
         if os.path.exists(model_path):
+            import xgboost as xgb
             self.model = xgb.Booster()
             self.model.load_model(model_path)
-            print(f"✅ ML модель загружена: {model_path}")
+            self.model_version = model_file_version(model_path)
+            logger.info("ML модель загружена: %s", model_path)
         else:
-            print(f"⚠️  ВНИМАНИЕ: Модель не найдена по пути: {model_path}")
-            print(f"   Обучите модель командой: python train_improved_model.py")
+            logger.error(
+                "Модель не найдена по пути: %s (обучите модель: python train_model.py)",
+                model_path
+            )
             raise FileNotFoundError(f"ML модель не найдена: {model_path}")
     
+    @timed("model.predict")
     def predict(self, features: Dict) -> Tuple[str, float, Dict[str, float]]:
         """
         Предсказать риск оттока студента
@@ -58,18 +113,22 @@ class ChurnPredictor:
     
     def _predict_with_model(self, features: Dict) -> Tuple[str, float, Dict[str, float]]:
         """Предсказание с использованием обученной XGBoost модели"""
-        X = self._prepare_features(features)
-        dmatrix = xgb.DMatrix(X, feature_names=self.feature_names)
+        import xgboost as xgb
+        
+        with span("model.dmatrix"):
+            X = self._prepare_features(features)
+            dmatrix = xgb.DMatrix(X, feature_names=self.feature_names)
         
         # Получаем вероятность отчисления (binary classification)
-        churn_probability = float(self.model.predict(dmatrix)[0])
+        with span("model.predict"):
+            churn_probability = float(self.model.predict(dmatrix)[0])
         
         # Определяем уровень риска по порогам вероятности
         # Пороги обновлены для High Recall (0.40 threshold)
-        if churn_probability < 0.40:
+        if churn_probability < MEDIUM_RISK_THRESHOLD:
             risk_level = 'Low'
             risk_class = 0
-        elif churn_probability < 0.70:
+        elif churn_probability < HIGH_RISK_THRESHOLD:
             risk_level = 'Medium'
             risk_class = 1
         else:
@@ -80,41 +139,86 @@ class ChurnPredictor:
         confidence = abs(churn_probability - 0.5) * 2  # 0-1 scale
         
         # Feature importance
-        feature_importance = self._get_feature_importance(features)
+        with span("model.importance"):
+            feature_importance = self._get_feature_importance(features)
         
         return risk_level, float(confidence), feature_importance
     
+    @timed("model.predict_batch")
+    def predict_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Предсказать риск для многих студентов одним вызовом модели
+        
+        Args:
+            X: Матрица фич (n_students, 6) в порядке self.feature_names
+            
+        Returns:
+            (probabilities, risk_levels, confidences) - массивы длины n_students
+        """
+        if self.model is None:
+            raise ValueError("Модель не загружена! Убедитесь что файл модели существует.")
+        
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+        if len(X) == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, np.empty(0, dtype=object), empty
+        
+        # inplace_predict не строит DMatrix: заметно дешевле на малых и средних пачках
+        probabilities = np.asarray(self.model.inplace_predict(X), dtype=np.float64)
+        
+        risk_levels = np.where(
+            probabilities < MEDIUM_RISK_THRESHOLD, 'Low',
+            np.where(probabilities < HIGH_RISK_THRESHOLD, 'Medium', 'High')
+        ).astype(object)
+        confidences = np.abs(probabilities - 0.5) * 2
+        
+        return probabilities, risk_levels, confidences
+    
+    def matrix_from_columns(self, columns: Dict[str, Sequence]) -> np.ndarray:
+        """Собрать матрицу фич (n, 6) из колонок {feature_name: значения}"""
+        return np.column_stack([
+            np.asarray(columns[name], dtype=np.float64) for name in self.feature_names
+        ]).reshape(-1, len(self.feature_names))
+    
     def _prepare_features(self, features: Dict) -> np.ndarray:
         """Подготовить фичи для модели"""
         X = np.array([[features[name] for name in self.feature_names]])
         return X
     
+    @timed("model.feature_importance_batch")
+    def feature_importance_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Векторизованный _get_feature_importance для матрицы фич
+        
+        Args:
+            X: Матрица фич (n_students, 6) в порядке self.feature_names
+            
+        Returns:
+            Матрица вкладов (n_students, 6), строки нормализованы к сумме 1
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+        readable_importance = self._get_global_importance()
+        global_weights = np.array([
+            readable_importance.get(name, 1.0) for name in self.feature_names
+        ])
+        
+        # Те же правила, что в _get_feature_importance
+        risk_factors = np.full(X.shape, 0.5)
+        for i, name in enumerate(self.feature_names):
+            if name in ['attendance_rate', 'homework_completion', 'test_avg_score']:
+                risk_factors[:, i] = (100 - X[:, i]) / 100.0
+            elif name == 'missed_classes_streak':
+                risk_factors[:, i] = np.minimum(X[:, i] / 15.0, 1.0)
+        
+        weighted = global_weights * (0.5 + risk_factors)
+        totals = weighted.sum(axis=1, keepdims=True)
+        return np.divide(weighted, totals, out=weighted.copy(), where=totals > 0)
+    
     def _get_feature_importance(self, features: Dict) -> Dict[str, float]:
         """
         Получить индивидуальный вклад каждого признака для конкретного студента
         """
-        # Получаем глобальную важность признаков из модели
-        try:
-            global_importance = self.model.get_score(importance_type='weight')
-        except:
-            # Если модель не имеет get_score, используем feature_importances
-            global_importance = {}
-            for i, name in enumerate(self.feature_names):
-                global_importance[f'f{i}'] = 1.0 / len(self.feature_names)
-        
-        # Преобразуем технические имена (f0, f1) в человекочитаемые
-        readable_importance = {}
-        for key, value in global_importance.items():
-            if key.startswith('f'):
-                try:
-                    feature_index = int(key[1:])
-                    if feature_index < len(self.feature_names):
-                        feature_name = self.feature_names[feature_index]
-                        readable_importance[feature_name] = value
-                except (ValueError, IndexError):
-                    readable_importance[key] = value
-            else:
-                readable_importance[key] = value
+        readable_importance = self._get_global_importance()
         
         # Взвешиваем важность на основе ЗНАЧЕНИЙ признаков студента
         # Чем ниже значение (хуже показатель), тем больше вклад в риск
@@ -142,3 +246,34 @@ class ChurnPredictor:
             return {k: v/total for k, v in weighted_importance.items()}
         else:
             return weighted_importance
+    
+    def _get_global_importance(self) -> Dict[str, float]:
+        """Глобальная важность признаков модели (вычисляется один раз)"""
+        if self._readable_importance is not None:
+            return self._readable_importance
+        
+        # Получаем глобальную важность признаков из модели
+        try:
+            global_importance = self.model.get_score(importance_type='weight')
+        except:
+            # Если модель не имеет get_score, используем feature_importances
+            global_importance = {}
+            for i, name in enumerate(self.feature_names):
+                global_importance[f'f{i}'] = 1.0 / len(self.feature_names)
+        
+        # Преобразуем технические имена (f0, f1) в человекочитаемые
+        readable_importance = {}
+        for key, value in global_importance.items():
+            if key.startswith('f'):
+                try:
+                    feature_index = int(key[1:])
+                    if feature_index < len(self.feature_names):
+                        feature_name = self.feature_names[feature_index]
+                        readable_importance[feature_name] = value
+                except (ValueError, IndexError):
+                    readable_importance[key] = value
+            else:
+                readable_importance[key] = value
+        
+        self._readable_importance = readable_importance
+        return readable_importance
@@ -0,0 +1,113 @@
+"""
+Общий экземпляр ML модели процесса
+
+Модель не загружается при импорте приложения: lifespan загружает и прогревает
+ее в фоне, пока /api/health уже отвечает, а /api/ready возвращает 503 до
+окончания прогрева. Запрос, пришедший раньше, ждет загрузку в get_predictor().
+
+Замена файла MODEL_PATH подхватывается без перезапуска: get_predictor()
+сверяет версию файла (sha256 содержимого, перечитывается после изменения
+размера или mtime) и перезагружает модель, а запросы во время перезагрузки
+получают прежнюю или новую модель целиком. Файл модели нужно заменять
+атомарно (запись во временный файл + rename).
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.config import get_settings
+from app.models.ml_model import ChurnPredictor, model_file_version
+
+logger = logging.getLogger(__name__)
+
+# Прогревочная строка фич (типичный студент)
+WARM_UP_FEATURES = {
+    "attendance_rate": 70.0,
+    "homework_completion": 60.0,
+    "test_avg_score": 65.0,
+    "communication_activity": 5,
+    "days_enrolled": 120,
+    "missed_classes_streak": 2,
+}
+
+_lock = threading.Lock()
+_predictor: Optional[ChurnPredictor] = None
+# Версия файла, которую не удалось загрузить: не повторяем загрузку на каждом запросе
+_failed_version: Optional[str] = None
+_ready = threading.Event()
+_state: Dict = {"status": "loading", "load_seconds": None, "warm_up_seconds": None, "error": None}
+
+
+def get_predictor() -> ChurnPredictor:
+    """Модель из MODEL_PATH (загружается при первом обращении и после замены файла)"""
+    global _predictor, _failed_version
+    model_path = get_settings().MODEL_PATH
+    predictor = _predictor
+    if predictor is not None and model_file_version(model_path) in (predictor.model_version, _failed_version):
+        return predictor
+
+    with _lock:
+        version = model_file_version(model_path)
+        if _predictor is not None and version in (_predictor.model_version, _failed_version):
+            return _predictor
+
+        started = time.perf_counter()
+        try:
+            predictor = ChurnPredictor(model_path=model_path)
+            # Глобальная важность признаков считается один раз
+            predictor._get_global_importance()
+        except Exception as e:
+            if _predictor is None:
+                _state.update(status="failed", error=str(e))
+                raise
+            # Битый или недописанный файл: продолжаем отвечать прежней моделью
+            _failed_version = version
+            logger.exception("Не удалось перезагрузить модель %s, используется %s", model_path, _predictor.model_version)
+            return _predictor
+
+        _state["load_seconds"] = round(time.perf_counter() - started, 3)
+        if _predictor is not None:
+            _warm_up_predictor(predictor)
+            logger.info("Модель перезагружена: %s -> %s", _predictor.model_version, predictor.model_version)
+        _failed_version = None
+        _predictor = predictor
+    return _predictor
+
+
+def warm_up() -> None:
+    """
+    Прогревочные предсказания (одиночное, пакетное, важность признаков)
+    и переход в состояние ready
+    """
+    predictor = get_predictor()
+    started = time.perf_counter()
+    _warm_up_predictor(predictor)
+
+    _state.update(status="ready", warm_up_seconds=round(time.perf_counter() - started, 3), error=None)
+    _ready.set()
+    logger.info(
+        "Модель готова: загрузка %.2f с, прогрев %.3f с",
+        _state["load_seconds"], _state["warm_up_seconds"]
+    )
+
+
+def _warm_up_predictor(predictor: ChurnPredictor) -> None:
+    import numpy as np
+
+    predictor.predict(WARM_UP_FEATURES)
+    X = np.array([[WARM_UP_FEATURES[name] for name in predictor.feature_names]] * 8, dtype=np.float64)
+    predictor.predict_batch(X)
+    predictor.feature_importance_batch(X)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> Dict:
+    """Состояние модели для /api/ready: loading, ready или failed"""
+    return {
+        **_state,
+        "model_version": _predictor.model_version if _predictor is not None else None
+    }
@@ -0,0 +1,89 @@
+"""
+Бенчмарк пропускной способности пакетного скоринга
+
+Сравнивает построчный ChurnPredictor.predict с predict_batch +
+feature_importance_batch и замеряет POST /api/predict/batch целиком.
+
+Запуск из корня проекта:
+    python -m benchmarks.batch_predict
+    python -m benchmarks.batch_predict --sizes 1 100 1000 10000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import get_settings
+from app.models.ml_model import ChurnPredictor
+
+DATA_PATH = "data/softclub_training.csv"
+
+
+def sample_features(predictor: ChurnPredictor, n: int, seed: int = 42) -> np.ndarray:
+    """Случайная выборка n строк фич из обучающего CSV (с повторами)"""
+    df = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(df), size=n)
+    return df[predictor.feature_names].to_numpy(dtype=np.float64)[index]
+
+
+def measure(func, repeat: int) -> float:
+    """Медианное время вызова в секундах"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетного скоринга")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--loop-limit", type=int, default=2000,
+                        help="Максимум строк для построчного цикла (он медленный)")
+    parser.add_argument("--skip-http", action="store_true", help="Не замерять HTTP endpoint")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    predictor = ChurnPredictor(model_path=settings.MODEL_PATH)
+    X_all = sample_features(predictor, max(args.sizes))
+
+    print(f"\n{'rows':>8} {'loop rows/s':>14} {'batch rows/s':>14} {'http rows/s':>14}")
+    print("-" * 54)
+
+    client = None
+    if not args.skip_http:
+        from fastapi.testclient import TestClient
+        from main import app
+        client = TestClient(app)
+
+    for size in args.sizes:
+        X = X_all[:size]
+
+        loop_rate = float("nan")
+        if size <= args.loop_limit:
+            rows = [dict(zip(predictor.feature_names, row)) for row in X.tolist()]
+            seconds = measure(lambda: [predictor.predict(row) for row in rows], args.repeat)
+            loop_rate = size / seconds
+
+        def batch():
+            predictor.predict_batch(X)
+            predictor.feature_importance_batch(X)
+
+        batch_rate = size / measure(batch, args.repeat)
+
+        http_rate = float("nan")
+        if client is not None and size <= settings.BATCH_PREDICT_MAX_ROWS:
+            payload = {"rows": [dict(zip(predictor.feature_names, row)) for row in X.tolist()]}
+            seconds = measure(lambda: client.post("/api/predict/batch", json=payload), args.repeat)
+            http_rate = size / seconds
+
+        print(f"{size:>8} {loop_rate:>14,.0f} {batch_rate:>14,.0f} {http_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
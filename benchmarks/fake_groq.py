@@ -0,0 +1,176 @@
+"""
+Локальный Groq-совместимый сервер для нагрузочных тестов
+
+Отвечает на POST /openai/v1/chat/completions (обычный и stream=True ответ)
+с заданной задержкой, без сети и без расхода токенов. Приложение
+направляется на него через GROQ_BASE_URL.
+
+Запуск из корня проекта:
+    python -m benchmarks.fake_groq --port 8090 --latency-ms 800 --jitter-ms 200
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+EXPLANATION_TEXT = (
+    "Студент пропускает занятия и не сдает домашние задания, "
+    "поэтому риск ухода высокий. Рекомендуется связаться с ним в ближайшие дни."
+)
+RECOMMENDATION = {
+    "action": "Mentor Call",
+    "reason": "Низкая посещаемость и серия пропусков",
+    "success_probability": 0.7,
+    "urgency": "high"
+}
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        request = json.loads(body or b"{}")
+        server = self.server
+        server.count_request()
+
+        if server.error_rate and random.random() < server.error_rate:
+            time.sleep(server.sample_latency())
+            self._send_json(500, {"error": {"message": "Fake upstream error"}})
+            return
+
+        if request.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps(RECOMMENDATION, ensure_ascii=False)
+        else:
+            content = EXPLANATION_TEXT
+
+        usage = {"prompt_tokens": 250, "completion_tokens": 80, "total_tokens": 330}
+        if request.get("stream"):
+            self._send_stream(request, content, usage, server.sample_latency())
+        else:
+            time.sleep(server.sample_latency())
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, request: dict, content: str, usage: dict, latency: float) -> None:
+        """SSE чанки: задержка делится между словами, usage - в последнем чанке (x_groq)"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        words = content.split(" ")
+        base = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "fake")
+        }
+        for i, word in enumerate(words):
+            time.sleep(latency / len(words))
+            text = word if i == 0 else " " + word
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        last = {
+            **base,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"id": "req-fake", "usage": usage}
+        }
+        self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float, jitter: float = 0.0, error_rate: float = 0.0):
+        super().__init__(address, FakeGroqHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        return max(0.0, random.uniform(self.latency - self.jitter, self.latency + self.jitter))
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_groq(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    error_rate: float = 0.0
+) -> FakeGroqServer:
+    """Запустить сервер в фоновом потоке (port=0 - свободный порт)"""
+    server = FakeGroqServer((host, port), latency, jitter, error_rate)
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный Groq-совместимый сервер")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Средняя задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Разброс задержки (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500")
+    args = parser.parse_args()
+
+    server = FakeGroqServer(
+        (args.host, args.port),
+        args.latency_ms / 1000,
+        args.jitter_ms / 1000,
+        args.error_rate
+    )
+    print(f"🤖 Fake Groq: {server.base_url} (latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms)")
+    print(f"   GROQ_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
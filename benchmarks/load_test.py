@@ -0,0 +1,375 @@
+"""
+Нагрузочный тест API end-to-end: SQLite с синтетическими студентами,
+локальный fake Groq и uvicorn в отдельном процессе
+
+Каждый сценарий (risks, dashboard, analysis) гоняется с фиксированной
+конкуренцией заданное время. Результат - req/s, p50/p95/p99 и память
+сервера - сохраняется в JSON для сравнения с прошлым прогоном.
+
+Перед сценарием analysis проверяется трассировка: трасса одного запроса
+/analysis должна содержать спаны вызовов LLM (иначе код выхода 1).
+
+Запуск из корня проекта:
+    python -m benchmarks.load_test --students 10000 --concurrency 16 --duration 20
+    python -m benchmarks.load_test --output benchmarks/results/new.json \\
+        --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_groq import start_fake_groq
+from benchmarks.seed_db import count_students, seed_database, sqlite_url
+
+SCENARIOS = {
+    "risks": "/api/students/risks",
+    "risks_fast": "/api/students/risks?fast=true",
+    "dashboard": "/api/dashboard",
+    "top_risk": "/api/students/top-risk?k=20",
+    "analysis": "/api/students/{student_id}/analysis",
+}
+
+DEFAULT_SCENARIOS = ["risks", "dashboard", "analysis"]
+
+# Спаны, которые должны быть в трассе /analysis (вызовы LLM идут в пуле admission control)
+ANALYSIS_TRACE_SPANS = ("llm.explanation", "llm.recommendation")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid: int) -> List[int]:
+    """pid и все его потомки (воркеры uvicorn, процессы пула) по /proc/*/task/*/children"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            tasks = os.listdir(f"/proc/{current}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{current}/task/{task}/children", encoding="utf-8") as children:
+                    pending.extend(int(child) for child in children.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def _proc_kb(path: str, fields: Dict[str, str]) -> Dict[str, int]:
+    """Значения полей вида "Name:  123 kB" из файла /proc"""
+    values = {}
+    try:
+        with open(path, encoding="utf-8") as source:
+            for line in source:
+                name = line.split(":", 1)[0]
+                if name in fields:
+                    values[fields[name]] = int(line.split()[1])
+    except OSError:
+        pass
+    return values
+
+
+def process_memory_mb(pid: int) -> Dict[str, Optional[float]]:
+    """
+    Память сервера по /proc (только Linux), суммарно по дереву процессов
+
+    При --workers > 1 запросы обслуживают воркеры, а не супервизор uvicorn,
+    поэтому суммируются все потомки. rss_mb завышает итог на общие
+    (copy-on-write) страницы, pss_mb делит их между процессами.
+    peak_rss_mb - сумма пиков (VmHWM) отдельных процессов, верхняя оценка.
+    """
+    totals = {"rss_mb": 0, "pss_mb": 0, "peak_rss_mb": 0}
+    found = {key: False for key in totals}
+    pids = process_tree(pid)
+    for current in pids:
+        values = _proc_kb(f"/proc/{current}/status", {"VmRSS": "rss_mb", "VmHWM": "peak_rss_mb"})
+        values.update(_proc_kb(f"/proc/{current}/smaps_rollup", {"Pss": "pss_mb"}))
+        for key, kb in values.items():
+            totals[key] += kb
+            found[key] = True
+    memory = {key: round(kb / 1024, 1) if found[key] else None for key, kb in totals.items()}
+    memory["processes"] = len(pids)
+    return memory
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(port: int, env: Dict[str, str], workers: int) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log"
+    ]
+    return subprocess.Popen(command, env={**os.environ, **env})
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер завершился с кодом {process.returncode}")
+        try:
+            if httpx.get(base_url + "/api/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Сервер не ответил за {timeout:.0f} с")
+
+
+def check_analysis_trace(base_url: str, trace_file: str, timeout: float = 10.0) -> List[str]:
+    """
+    Один трассируемый запрос /analysis (traceparent с флагом sampled) для
+    студента с наибольшим риском (для Low LLM не вызывается)
+
+    Returns:
+        Спаны из ANALYSIS_TRACE_SPANS, которых нет в записанной трассе
+    """
+    student_id = httpx.get(f"{base_url}/api/students/top-risk?k=1", timeout=60.0).json()["students"][0]["student_id"]
+    trace_id = os.urandom(16).hex()
+    headers = {"traceparent": f"00-{trace_id}-{os.urandom(8).hex()}-01"}
+    httpx.get(f"{base_url}/api/students/{student_id}/analysis", headers=headers, timeout=120.0)
+
+    # Трасса пишется в файл целиком после ответа (фоновым потоком)
+    names = set()
+    deadline = time.time() + timeout
+    while not names and time.time() < deadline:
+        time.sleep(0.1)
+        try:
+            with open(trace_file, encoding="utf-8") as traces:
+                names = {
+                    record["name"]
+                    for record in map(json.loads, filter(str.strip, traces))
+                    if record["trace_id"] == trace_id
+                }
+        except FileNotFoundError:
+            pass
+    return [name for name in ANALYSIS_TRACE_SPANS if name not in names]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """req/s и перцентили задержки (мс) по успешным запросам"""
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(values.max()), 1),
+    }
+
+
+async def drive(
+    base_url: str,
+    path: str,
+    student_ids: range,
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> Dict:
+    """concurrency воркеров шлют запросы подряд; первые warmup секунд не учитываются"""
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while True:
+            url = path.format(student_id=random.choice(student_ids))
+            sent = time.perf_counter()
+            if sent >= deadline:
+                return
+            try:
+                response = await client.get(url)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            done = time.perf_counter()
+            if sent < measure_from:
+                continue
+            if ok:
+                latencies.append(done - sent)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+
+    # Запросы, начатые до дедлайна, могли закончиться позже
+    elapsed = max(time.perf_counter(), deadline) - measure_from
+    return summarize(latencies, errors, elapsed)
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Разница с прошлым прогоном по req/s и p95/p99"""
+    print(f"\n📊 Сравнение с {baseline.get('git_commit') or 'baseline'} ({baseline.get('created_at')})")
+    print(f"{'scenario':<12} {'rps':>18} {'p95 ms':>18} {'p99 ms':>18}")
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        cells = []
+        for key in ("rps", "p95_ms", "p99_ms"):
+            new_value, old_value = result.get(key), old.get(key)
+            if not new_value or not old_value:
+                cells.append(f"{'-':>18}")
+                continue
+            change = (new_value - old_value) / old_value * 100
+            cells.append(f"{old_value:>7} → {new_value:<7}{change:+4.0f}%")
+        print(f"{name:<12} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API с fake Groq")
+    parser.add_argument("--students", type=int, default=1000, help="Размер синтетической БД (1k-1M)")
+    parser.add_argument("--db", default=None, help="SQLite файл (по умолчанию .cache/bench/students_N.sqlite3)")
+    parser.add_argument("--reseed", action="store_true", help="Пересоздать БД, даже если она уже есть")
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_SCENARIOS, choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Секунд на сценарий")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Секунд прогрева (не учитываются)")
+    parser.add_argument("--workers", type=int, default=1, help="Процессов uvicorn")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-cache", action="store_true", help="Не отключать кэш ответов LLM")
+    parser.add_argument("--output", default="benchmarks/results/load_test.json")
+    parser.add_argument("--compare", default=None, help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    db_path = args.db or f".cache/bench/students_{args.students}.sqlite3"
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    database_url = sqlite_url(db_path)
+
+    if args.reseed or count_students(database_url) != args.students:
+        print(f"🌱 Заполняем {db_path}: {args.students:,} студентов...")
+        seed_database(database_url, args.students)
+
+    fake_groq = start_fake_groq(
+        latency=args.llm_latency_ms / 1000,
+        jitter=args.llm_jitter_ms / 1000,
+        error_rate=args.llm_error_rate
+    )
+    print(f"🤖 Fake Groq: {fake_groq.base_url} ({args.llm_latency_ms:.0f}±{args.llm_jitter_ms:.0f} ms)")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    trace_file = os.path.join(os.path.dirname(os.path.abspath(db_path)), "load_test_traces.jsonl")
+    if os.path.exists(trace_file):
+        os.remove(trace_file)
+    env = {
+        "DATABASE_URL": database_url,
+        "GROQ_API_KEY": "fake-key",
+        "GROQ_BASE_URL": fake_groq.base_url,
+        "LLM_CACHE_ENABLED": "true" if args.llm_cache else "false",
+        "TRACE_FILE": trace_file,
+        "DEBUG": "false",
+    }
+    server = start_server(port, env, args.workers)
+    results: Dict[str, Dict] = {}
+    missing_spans: List[str] = []
+    try:
+        wait_ready(base_url, server)
+        if "analysis" in args.scenarios and not args.llm_cache:
+            # До сценариев: ответ еще не в кэше анализа, LLM вызывается на самом деле
+            missing_spans = check_analysis_trace(base_url, trace_file)
+            if missing_spans:
+                print(f"❌ В трассе /analysis нет спанов: {', '.join(missing_spans)}")
+            else:
+                print(f"🔎 Трасса /analysis содержит {', '.join(ANALYSIS_TRACE_SPANS)}")
+        print(f"🚀 Сервер: {base_url} (workers={args.workers}), конкуренция {args.concurrency}\n")
+        print(f"{'scenario':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'pss MB':>8}")
+        print("-" * 70)
+
+        student_ids = range(1, args.students + 1)
+        for name in args.scenarios:
+            llm_before = fake_groq.requests
+            result = asyncio.run(drive(
+                base_url, SCENARIOS[name], student_ids,
+                args.concurrency, args.duration, args.warmup
+            ))
+            result["llm_requests"] = fake_groq.requests - llm_before
+            result.update(process_memory_mb(server.pid))
+            results[name] = result
+            print(
+                f"{name:<12} {result['rps']:>9} {result.get('p50_ms', '-'):>9} "
+                f"{result.get('p95_ms', '-'):>9} {result.get('p99_ms', '-'):>9} "
+                f"{result['errors']:>7} {result['pss_mb'] or result['rss_mb'] or '-':>8}"
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        fake_groq.shutdown()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "students": args.students,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "workers": args.workers,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "llm_cache": args.llm_cache,
+        },
+        "client_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "missing_trace_spans": missing_spans,
+        "results": results,
+    }
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    print(f"\n💾 Результат: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            compare(report, json.load(baseline_file))
+
+    if missing_spans:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Микробенчмарки горячих путей с проверкой регрессий по baseline
+
+Бенчмарки: ChurnPredictor.predict (одна строка и пакет), _get_feature_importance,
+db_data.get_students на 10k строк SQLite, parse_copy_data и calculate_features
+на сгенерированном дампе, сериализация Pydantic ответов.
+
+Время бенчмарка - медиана повторов (число вызовов в повторе подбирается так,
+чтобы повтор длился не меньше --min-time). Baseline снимается на той же машине;
+при сравнении бенчмарк медленнее baseline больше чем на --tolerance - регрессия
+(код выхода 1). Baseline в репозитории не хранится (время зависит от машины):
+без файла baseline проверка завершается с кодом 2.
+
+Запуск из корня проекта:
+    python -m benchmarks.micro --save-baseline            # снять baseline
+    python -m benchmarks.micro                            # сравнить с baseline
+    python -m benchmarks.micro --only predict --tolerance 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import get_settings
+from app.models.ml_model import ChurnPredictor
+
+DEFAULT_BASELINE = "benchmarks/baselines/micro.json"
+DATA_PATH = "data/softclub_training.csv"
+
+# Размер сгенерированного дампа для parse_copy_data / calculate_features
+DUMP_STUDENTS = 300
+DUMP_PROGRESS_PER_STUDENT = 20
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    """
+    Время одного вызова func (секунды): медиана и минимум по repeat повторам
+    """
+    # Калибровка: столько вызовов в повторе, чтобы он длился не меньше min_time
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def write_dump(path: str, students: int, progress_per_student: int, seed: int = 42) -> None:
+    """Дамп в формате pg_dump (COPY ... FROM stdin) с таблицами Students, ProgressBooks, StudentGroups"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as dump:
+        dump.write("-- synthetic softclub dump\n")
+        dump.write('COPY public."Students" ("Id", "FirstName", "LastName", "Email", "Status") FROM stdin;\n')
+        for student_id in range(1, students + 1):
+            dump.write(f"{student_id}\tName{student_id}\tSurname{student_id}\ts{student_id}@example.com\t{rng.randint(0, 3)}\n")
+        dump.write("\\.\n\n")
+
+        dump.write('COPY public."ProgressBooks" ("Id", "StudentId", "Date", "IsAttended", "Grade", "Notes") FROM stdin;\n')
+        record_id = 1
+        for student_id in range(1, students + 1):
+            attendance = rng.uniform(0.3, 1.0)
+            for day in range(progress_per_student):
+                attended = "t" if rng.random() < attendance else "f"
+                grade = rng.randint(0, 10) if rng.random() < 0.8 else "\\N"
+                notes = "note" if rng.random() < 0.2 else "\\N"
+                dump.write(f"{record_id}\t{student_id}\t2024-{1 + day // 28:02d}-{1 + day % 28:02d}\t{attended}\t{grade}\t{notes}\n")
+                record_id += 1
+        dump.write("\\.\n\n")
+
+        dump.write('COPY public."StudentGroups" ("Id", "StudentId", "StartedAt", "StudentGroupStatus") FROM stdin;\n')
+        for student_id in range(1, students + 1):
+            dump.write(f"{student_id}\t{student_id}\t2024-0{rng.randint(1, 9)}-01 00:00:00\t{rng.randint(0, 3)}\n")
+        dump.write("\\.\n")
+
+
+def build_benchmarks(workdir: str) -> List[Tuple[str, Callable[[], object]]]:
+    """(имя, функция) для каждого бенчмарка; тяжелая подготовка делается здесь"""
+    import parse_softclub_sql
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api.schemas import RiskAssessment, StudentRiskListResponse
+    from app.data.db_data import get_students
+    from benchmarks.seed_db import seed_database, sqlite_url
+
+    settings = get_settings()
+    predictor = ChurnPredictor(model_path=settings.MODEL_PATH)
+
+    source = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(42)
+    X = source[predictor.feature_names].to_numpy(dtype=np.float64)[rng.integers(0, len(source), size=1000)]
+    row = dict(zip(predictor.feature_names, X[0].tolist()))
+
+    # get_students: 10k студентов в отдельной SQLite БД
+    db_url = sqlite_url(os.path.join(workdir, "students_10000.sqlite3"))
+    seed_database(db_url, 10000)
+    session_factory = sessionmaker(bind=create_engine(db_url))
+
+    def hydrate_students():
+        db = session_factory()
+        try:
+            return get_students(db)
+        finally:
+            db.close()
+
+    # Парсер дампа: print внутри глушим, чтобы не искажать замер выводом
+    dump_path = os.path.join(workdir, "softclub.sql")
+    write_dump(dump_path, DUMP_STUDENTS, DUMP_PROGRESS_PER_STUDENT)
+
+    def quiet(func: Callable) -> Callable[[], object]:
+        def wrapper():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return func()
+        return wrapper
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        tables = [
+            parse_softclub_sql.parse_copy_data(dump_path, name)
+            for name in ("Students", "ProgressBooks", "StudentGroups")
+        ]
+
+    # Сериализация: ответ /api/students/risks на 1000 студентов
+    probabilities, risk_levels, confidences = predictor.predict_batch(X)
+    risk_response = StudentRiskListResponse(
+        total=len(X),
+        students=[
+            RiskAssessment(
+                student_id=i,
+                student_name=f"Student {i}",
+                student_course_name="Python",
+                student_phone_number="+992900000000",
+                risk_level=risk_level,
+                confidence=confidence
+            )
+            for i, (risk_level, confidence) in enumerate(zip(risk_levels.tolist(), confidences.tolist()))
+        ]
+    )
+    risk_payload = risk_response.model_dump()
+
+    return [
+        ("predict.single", lambda: predictor.predict(row)),
+        ("predict.batch_100", lambda: predictor.predict_batch(X[:100])),
+        ("predict.batch_1000", lambda: predictor.predict_batch(X)),
+        ("importance.single", lambda: predictor._get_feature_importance(row)),
+        ("importance.batch_1000", lambda: predictor.feature_importance_batch(X)),
+        ("db.get_students_10k", hydrate_students),
+        ("parse.copy_data", quiet(lambda: parse_softclub_sql.parse_copy_data(dump_path, "ProgressBooks"))),
+        ("parse.calculate_features", quiet(lambda: parse_softclub_sql.calculate_features(*tables))),
+        ("serialize.risks_1000_json", risk_response.model_dump_json),
+        ("serialize.risks_1000_validate", lambda: StudentRiskListResponse.model_validate(risk_payload)),
+    ]
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Имена бенчмарков, медленнее baseline больше чем на tolerance"""
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    print("-" * 68)
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"{name:<32} {'-':>12} {format_time(result['median_s']):>12} {'new':>8}")
+            continue
+        change = result["median_s"] / old["median_s"] - 1
+        marker = ""
+        if change > tolerance:
+            regressions.append(name)
+            marker = "  ❌"
+        elif change < -tolerance:
+            marker = "  🚀"
+        print(
+            f"{name:<32} {format_time(old['median_s']):>12} "
+            f"{format_time(result['median_s']):>12} {change:>+7.0%}{marker}"
+        )
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячих путей")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON с baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Записать результаты как baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Допустимое замедление относительно baseline (0.3 = +30%%)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Минимальная длительность повтора (с)")
+    parser.add_argument("--only", nargs="+", default=None, help="Только бенчмарки с этими префиксами")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="churn-micro-") as workdir:
+        print("⚙️  Подготовка данных...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            benchmarks = build_benchmarks(workdir)
+        if args.only:
+            benchmarks = [(name, func) for name, func in benchmarks if name.startswith(tuple(args.only))]
+
+        results: Dict[str, Dict] = {}
+        for name, func in benchmarks:
+            results[name] = measure(func, args.repeat, args.min_time)
+            result = results[name]
+            print(
+                f"   {name:<32} {format_time(result['median_s']):>12} "
+                f"(min {format_time(result['min_s'])}, {result['loops']} x {result['repeat']})"
+            )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "results": results,
+    }
+
+    if args.save_baseline:
+        baseline_dir = os.path.dirname(args.baseline)
+        if baseline_dir:
+            os.makedirs(baseline_dir, exist_ok=True)
+        if os.path.exists(args.baseline):
+            # Частичный прогон (--only) обновляет только свои бенчмарки
+            with open(args.baseline, encoding="utf-8") as baseline_file:
+                previous = json.load(baseline_file)
+            report["results"] = {**previous.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline сохранен: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        # Без baseline проверка ничего не проверяет: не выдаем это за успех
+        print(f"\n❌ Baseline не найден: {args.baseline} (снимите его с --save-baseline)")
+        return 2
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("environment") != report["environment"]:
+        print("\n⚠️  Baseline снят в другом окружении - сравнение может быть неточным")
+        print(f"   baseline: {baseline.get('environment')}")
+        print(f"   текущее:  {report['environment']}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ Регрессия больше {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ Регрессий нет (допуск {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
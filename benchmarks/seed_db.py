@@ -0,0 +1,124 @@
+"""
+Синтетическая БД студентов для нагрузочных тестов
+
+Строки выбираются из data/softclub_training.csv с повторами, к фичам
+добавляется шум (в пределах допустимых диапазонов), курсы - из демо-данных.
+Таблицы создаются по моделям (Base.metadata.create_all), без миграций.
+
+Запуск из корня проекта:
+    python -m benchmarks.seed_db --students 100000 --db .cache/bench/students_100000.sqlite3
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, insert, select
+
+from app.db.database import Base
+from app.db.models import Student
+
+DATA_PATH = "data/softclub_training.csv"
+
+COURSES = [
+    "Python", "SQL", "Data Science", "Machine Learning", "DevOps", "Angular",
+    "Flask", "Mobile Development", "Cybersecurity", "Java", "JavaScript",
+    "Graphic Design", "MongoDB", "Django", "Vue.js", "Web Development",
+    "UX/UI Design", "HTML/CSS", "Node.js"
+]
+
+# (колонка, шум - стандартное отклонение, минимум, максимум)
+FEATURE_NOISE = [
+    ("attendance_rate", 5.0, 0.0, 100.0),
+    ("homework_completion", 5.0, 0.0, 100.0),
+    ("test_avg_score", 5.0, 0.0, 100.0),
+    ("communication_activity", 1.0, 0, None),
+    ("days_enrolled", 10.0, 0, None),
+    ("missed_classes_streak", 1.0, 0, None),
+]
+
+
+def sqlite_url(path: str) -> str:
+    return "sqlite:///" + os.path.abspath(path)
+
+
+def synthetic_students(n: int, seed: int = 42, start_id: int = 1) -> pd.DataFrame:
+    """n синтетических студентов на основе обучающего CSV"""
+    source = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(source), size=n)
+    ids = np.arange(start_id, start_id + n)
+
+    data = {
+        "id": ids,
+        "name": source["name"].fillna("Student").str.split().str.join(" ").to_numpy()[index],
+        "email": [f"bench{student_id}@example.com" for student_id in ids.tolist()],
+        "course": np.asarray(COURSES)[rng.integers(0, len(COURSES), size=n)],
+        "phone_number": [f"+992{900000000 + student_id % 100000000}" for student_id in ids.tolist()],
+    }
+    for column, noise, low, high in FEATURE_NOISE:
+        values = source[column].to_numpy(dtype=np.float64)[index] + rng.normal(0.0, noise, size=n)
+        values = np.clip(values, low, high)
+        if isinstance(low, int):
+            values = np.rint(values).astype(np.int64)
+        else:
+            values = np.round(values, 2)
+        data[column] = values
+
+    return pd.DataFrame(data)
+
+
+def seed_database(database_url: str, n: int, seed: int = 42, chunk_size: int = 10000) -> int:
+    """
+    Пересоздать таблицы и заполнить students n синтетическими строками
+
+    Returns:
+        Количество студентов в БД
+    """
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    students = synthetic_students(n, seed)
+    with engine.begin() as connection:
+        for offset in range(0, n, chunk_size):
+            chunk = students.iloc[offset:offset + chunk_size]
+            connection.execute(insert(Student), chunk.to_dict("records"))
+
+    with engine.connect() as connection:
+        count = connection.execute(select(func.count()).select_from(Student)).scalar()
+    engine.dispose()
+    return count
+
+
+def count_students(database_url: str) -> int:
+    """Количество студентов в существующей БД (0, если таблиц нет)"""
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(Student)).scalar()
+    except Exception:
+        return 0
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетическая БД студентов для нагрузочных тестов")
+    parser.add_argument("--students", type=int, default=1000, help="Количество студентов (1k-1M)")
+    parser.add_argument("--db", default=None, help="Путь к SQLite файлу")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.db or f".cache/bench/students_{args.students}.sqlite3"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    print(f"🌱 Заполняем {path}: {args.students:,} студентов...")
+    start = time.perf_counter()
+    count = seed_database(sqlite_url(path), args.students, args.seed)
+    print(f"✅ Готово: {count:,} студентов за {time.perf_counter() - start:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
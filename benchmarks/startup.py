@@ -0,0 +1,106 @@
+"""
+Время холодного старта: импорт main, первый ответ /api/health и готовность /api/ready
+
+Каждый замер - в новом процессе интерпретатора (модули не закэшированы в
+sys.modules). Для импорта показываются самые дорогие модули по -X importtime.
+
+Запуск из корня проекта:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.load_test import free_port
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def measure_import() -> float:
+    """Секунды на import main в новом интерпретаторе"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> List[Tuple[str, float]]:
+    """Модули с наибольшим накопленным временем импорта (секунды)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True
+    ).stderr
+
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((name.rstrip(), int(cumulative) / 1e6))
+    return sorted(modules, key=lambda item: item[1], reverse=True)[:top]
+
+
+def measure_server(timeout: float = 60.0) -> Dict[str, float]:
+    """Секунды от запуска uvicorn до первого 200 на /api/health и на /api/ready"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL
+    )
+
+    timings: Dict[str, float] = {}
+    try:
+        while len(timings) < 2 and time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Сервер завершился с кодом {process.returncode}")
+            for name, path in (("health", "/api/health"), ("ready", "/api/ready")):
+                if name in timings:
+                    continue
+                try:
+                    if httpx.get(base_url + path, timeout=1.0).status_code == 200:
+                        timings[name] = time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+            time.sleep(0.1)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного старта приложения")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых дорогих импортов показать")
+    parser.add_argument("--skip-server", action="store_true", help="Только время импорта")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    print(f"📦 import main: {statistics.median(imports) * 1000:.0f} мс (медиана {args.runs} запусков)")
+
+    print(f"\n{'module':<50} {'cumulative ms':>14}")
+    print("-" * 66)
+    for name, seconds in slowest_imports(args.top):
+        print(f"{name:<50} {seconds * 1000:>14.0f}")
+
+    if args.skip_server:
+        return
+
+    runs = [measure_server() for _ in range(args.runs)]
+    health = statistics.median(run["health"] for run in runs)
+    ready = statistics.median(run["ready"] for run in runs if "ready" in run)
+    print(f"\n🚀 Первый ответ /api/health: {health * 1000:.0f} мс")
+    print(f"🔥 /api/ready (модель загружена и прогрета): {ready * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
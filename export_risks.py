@@ -0,0 +1,42 @@
+"""
+Выгрузка всех студентов с оценкой риска в NDJSON / CSV (для синхронизации CRM)
+
+Примеры:
+    python export_risks.py --format csv --output risks.csv
+    python export_risks.py --format ndjson --gzip --output risks.ndjson.gz
+"""
+import argparse
+import sys
+
+from app.core.config import get_settings
+from app.data.risk_export import EXPORT_FORMATS, gzip_stream, iter_export
+from app.models.ml_model import ChurnPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка рисков студентов")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="Сжать вывод gzip")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Размер порции скоринга")
+    parser.add_argument("--output", default="-", help="Файл вывода (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    predictor = ChurnPredictor(model_path=settings.MODEL_PATH)
+
+    chunks = iter_export(predictor, args.format, args.chunk_size)
+    if args.gzip:
+        chunks = gzip_stream(chunks)
+
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+            output.flush()
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
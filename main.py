@@ -1,17 +1,75 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from app.core.config import get_settings
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
 from app.api.routes import router
 from app.api.dashboard_routes import router as dashboard_router
+from app.api.admin_routes import router as admin_router
+from app.api.job_routes import router as job_router
+from app.api.dashboard_cache import run_dashboard_refresher
+from app.jobs.runner import run_job_heartbeat, shutdown_job_runner
+from app.models import registry
 
 settings = get_settings()
 
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# Каждый запрос к Groq httpx пишет в INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+async def load_model() -> None:
+    """Загрузка и прогрев ML модели в фоне: /api/health отвечает сразу, /api/ready - после"""
+    if registry.is_ready():
+        return
+    try:
+        await run_in_threadpool(registry.warm_up)
+    except Exception:
+        logger.exception("Не удалось загрузить ML модель")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Фоновые задачи приложения: загрузка модели, обновление снимка дашборда, пулы jobs"""
+    async def background():
+        # Снимок дашборда считается после прогрева модели, чтобы не замедлять готовность
+        await load_model()
+        await run_dashboard_refresher(settings.DASHBOARD_POLL_SECONDS)
+    
+    tasks = [
+        asyncio.create_task(background()),
+        asyncio.create_task(
+            run_job_heartbeat(settings.JOBS_HEARTBEAT_SECONDS, settings.JOBS_HEARTBEAT_TIMEOUT_SECONDS)
+        )
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        shutdown_job_runner()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     description="AI модуль прогнозирования оттока студентов для Softclub CRM",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -26,8 +84,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(TracingMiddleware)
+
+if settings.PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
 app.include_router(dashboard_router, prefix="/api", tags=["Dashboard"])
+app.include_router(job_router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"], include_in_schema=False)
 
 
 @app.get("/")
@@ -40,11 +108,24 @@ async def root():
         "endpoints": {
             "list_risks": "/api/students/risks",
             "detailed_analysis": "/api/students/{student_id}/analysis",
-            "health": "/api/health"
+            "analysis_stream": "/api/students/{student_id}/analysis/stream",
+            "health": "/api/health",
+            "ready": "/api/ready",
+            "jobs": "/api/jobs",
+            "metrics": "/metrics"
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в формате Prometheus: задержки по маршрутам и этапам, LLM токены, кэши"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 
 
 def main():
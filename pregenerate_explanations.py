@@ -0,0 +1,46 @@
+"""
+Ночная генерация LLM объяснений для студентов High/Medium риска
+
+Обрабатывает только студентов, у которых изменился риск или фичи.
+Запуск по cron, например:
+    0 3 * * * cd /opt/srm-softclub && .venv/bin/python pregenerate_explanations.py
+"""
+import argparse
+
+from app.jobs.pregenerate import pregenerate_explanations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная генерация LLM объяснений")
+    parser.add_argument(
+        "--risk-levels", nargs="+", default=None,
+        help="Уровни риска для генерации (по умолчанию PREGEN_RISK_LEVELS)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Перегенерировать даже актуальные объяснения"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🌙 ПАКЕТНАЯ ГЕНЕРАЦИЯ ОБЪЯСНЕНИЙ")
+    print("=" * 60)
+
+    def progress(done, total):
+        if total and (done == total or done % 10 == 0):
+            print(f"   Обработано {done}/{total}")
+
+    summary = pregenerate_explanations(
+        risk_levels=args.risk_levels,
+        force=args.force,
+        progress=progress
+    )
+
+    print(f"\n📊 Проверено студентов: {summary['checked']}")
+    print(f"   ✅ Сгенерировано: {summary['generated']}")
+    print(f"   ⏭️  Актуальны / не в группе риска: {summary['skipped']}")
+    print(f"   ❌ Ошибок: {summary['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Пересчет сохраненных оценок риска (student_scores)
+
+Пока оценки актуальны (текущая модель, посчитаны после последнего изменения
+студентов), /api/students/top-risk читает их по индексу вместо скоринга.
+Запуск по cron или после обновления данных/модели, например:
+    */30 * * * * cd /opt/srm-softclub && .venv/bin/python rescore_students.py
+
+Порции запуска считают --workers локальных процессов; на других узлах к нему
+можно подключить rescore_worker.py.
+"""
+import argparse
+
+from app.jobs.rescore import rescore_students
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет оценок риска студентов")
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000,
+        help="Размер порции (студентов)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Сколько локальных процессов считают порции"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔄 ПЕРЕСЧЕТ ОЦЕНОК РИСКА")
+    print("=" * 60)
+
+    def progress(scored):
+        print(f"   Оценено {scored}")
+
+    summary = rescore_students(chunk_size=args.chunk_size, workers=args.workers, progress=progress)
+
+    print(f"\n✅ Оценено студентов: {summary['scored']} (запуск {summary['run_id']}, порций {summary['chunks']})")
+    print(f"   Версия модели: {summary['model_version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Воркер распределенного пересчета оценок риска
+
+Подключается к запуску пересчета (rescore_students.py или POST /api/jobs
+с kind=rescore) и считает его порции вместе с остальными воркерами. Можно
+запускать на любом узле с доступом к БД и той же моделью (MODEL_PATH):
+    python rescore_worker.py                 # последний активный запуск
+    python rescore_worker.py --run-id 12
+    python rescore_worker.py --follow        # ждать новых запусков (systemd)
+"""
+import argparse
+import time
+
+from app.core.config import get_settings
+from app.data.rescore_queue import get_active_rescore_run
+from app.jobs.rescore import run_rescore_worker
+from app.models.ml_model import ChurnPredictor
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Воркер распределенного пересчета оценок риска")
+    parser.add_argument("--run-id", type=int, default=None, help="ID запуска (по умолчанию последний активный)")
+    parser.add_argument(
+        "--follow", action="store_true",
+        help="После завершения запуска ждать следующий"
+    )
+    parser.add_argument("--lease-seconds", type=float, default=settings.RESCORE_LEASE_SECONDS)
+    parser.add_argument("--poll-seconds", type=float, default=settings.RESCORE_POLL_SECONDS)
+    args = parser.parse_args()
+
+    predictor = ChurnPredictor(model_path=settings.MODEL_PATH)
+    print(f"🔄 Воркер пересчета, модель {predictor.model_version}")
+
+    run_id = args.run_id
+    while True:
+        if run_id is None:
+            run = get_active_rescore_run()
+            if run is None:
+                if not args.follow:
+                    print("⏭️  Нет активных запусков")
+                    return
+                time.sleep(args.poll_seconds)
+                continue
+            if run["model_version"] != predictor.model_version:
+                # Запуск новой модели: воркер со старой моделью в нем не участвует
+                print(f"⚠️  Запуск {run['id']} считает модель {run['model_version']}, перезапустите воркер")
+                return
+            run_id = run["id"]
+
+        started = time.perf_counter()
+        summary = run_rescore_worker(
+            run_id,
+            predictor=predictor,
+            lease_seconds=args.lease_seconds,
+            poll_seconds=args.poll_seconds
+        )
+        elapsed = time.perf_counter() - started
+        print(
+            f"✅ Запуск {run_id}: порций {summary['chunks']}, студентов {summary['scored']} "
+            f"за {elapsed:.1f} с"
+        )
+
+        if args.run_id is not None or not args.follow:
+            return
+        run_id = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Ежедневный снимок риска для трендов дашборда
+
+Записывает изменения риска по студентам и дневные агрегаты по уровням и курсам.
+Запуск по cron, например:
+    30 2 * * * cd /opt/srm-softclub && .venv/bin/python snapshot_risks.py
+"""
+import argparse
+import datetime
+
+from app.jobs.risk_snapshot import take_risk_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ежедневный снимок риска студентов")
+    parser.add_argument(
+        "--date", type=datetime.date.fromisoformat, default=None,
+        help="Дата снимка YYYY-MM-DD (по умолчанию сегодня)"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=None,
+        help="Порог изменения вероятности (по умолчанию RISK_SNAPSHOT_MIN_DELTA)"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📸 СНИМОК РИСКА СТУДЕНТОВ")
+    print("=" * 60)
+
+    summary = take_risk_snapshot(snapshot_date=args.date, min_delta=args.min_delta)
+
+    print(f"\n📅 Дата: {summary['date']}")
+    print(f"   Студентов: {summary['students']}")
+    print(f"   ✏️  Изменений записано: {summary['changed']}")
+    print(f"   🗑️  Удалено: {summary['removed']}")
+
+
+if __name__ == "__main__":
+    main()